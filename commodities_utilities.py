@@ -1,32 +1,249 @@
 # pylint: disable=line-too-long
 """Utility functions for commodities_runner"""
 
+from __future__ import annotations
 
-import io
+import json
+import os
+import time
+from typing import TYPE_CHECKING
 
-import pandas
-import requests
-from pandas import DataFrame
-from xlsxwriter import Workbook
-from xlsxwriter.workbook import Worksheet
+import polars
 
+from html_utilities import read_tables
 
-def get_commodities_frames() -> list[DataFrame]:
+# xlsxwriter is only needed by commodities_runner, and fetch_utilities only when the
+# cache is stale, so neither is imported when commodities_xw is served from the cache
+if TYPE_CHECKING:
+    from xlsxwriter import Workbook
+    from xlsxwriter.format import Format
+    from xlsxwriter.workbook import Worksheet
+
+COMMODITIES_URL = "https://tradingeconomics.com/commodities"
+CACHE_DIR = os.path.join("Cache", "Commodities")
+CACHE_TTL = 600  # Seconds the cached tables are used before the page is revalidated
+PERCENT_COLUMNS = ["%", "Weekly", "Monthly", "YoY"]
+COMMODITIES_SCHEMA = {
+    "Category": polars.Utf8,
+    "Commodity": polars.Utf8,
+    "Price": polars.Float64,
+    "Day": polars.Float64,
+    "%": polars.Float64,
+    "Weekly": polars.Float64,
+    "Monthly": polars.Float64,
+    "YoY": polars.Float64,
+    "Date": polars.Utf8,
+}
+TABLE_SCHEMA = {"Price": polars.Float64, "Day": polars.Float64}
+SECTION_DROP = ["Price", "Day", "%"]  # Columns left out of the written sections
+
+
+def get_commodities_frame(
+    ttl: float = CACHE_TTL, cache_dir: str = CACHE_DIR
+) -> polars.DataFrame:
     """
-    Returns list of Pandas dataframes read from html page
+    Returns every commodity table as one typed frame with a Category column.  The parsed
+    frame is cached in cache_dir and reused for ttl seconds.  After that the page is
+    revalidated with If-None-Match/If-Modified-Since, and only downloaded and parsed again
+    if the server reports it has changed
+
+    Args:
+        ttl: Seconds the cached frame is used without contacting the site
+        cache_dir: Directory holding the cached frame and its validators
 
     Returns:
-        List of pandas frames for iteration
+        Frame with the columns in COMMODITIES_SCHEMA, in page order
+    """
+    frame_path = os.path.join(cache_dir, "commodities.parquet")
+    meta_path = os.path.join(cache_dir, "commodities.json")
+
+    meta = {}
+    if os.path.exists(frame_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as file:
+            meta = json.load(file)
+
+        if time.time() - meta["fetched"] < ttl:
+            return polars.read_parquet(frame_path)
+
+    header_info = {}
+    if meta.get("etag") is not None:
+        header_info["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified") is not None:
+        header_info["If-Modified-Since"] = meta["last_modified"]
+
+    import fetch_utilities  # pylint: disable=import-outside-toplevel
+
+    data = fetch_utilities.get(COMMODITIES_URL, headers=header_info)
+
+    if data.status_code == 304 and len(meta) > 0:
+        frame = polars.read_parquet(frame_path)
+    else:
+        data.raise_for_status()
+        frame = parse_commodities(data.text)
+        os.makedirs(cache_dir, exist_ok=True)
+        frame.write_parquet(frame_path)
+
+    meta = {
+        "fetched": time.time(),
+        "etag": data.headers.get("ETag", meta.get("etag")),
+        "last_modified": data.headers.get("Last-Modified", meta.get("last_modified")),
+    }
+    with open(meta_path, "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+
+    return frame
 
+
+def parse_commodities(html: str) -> polars.DataFrame:
     """
-    url = "https://tradingeconomics.com/commodities"
+    Parses every table on the commodities page into one typed frame.  The first column of
+    each table is named after its category, e.g. Energy, so it becomes the Category column.
+    The percentages of every table are parsed in a single vectorised pass
+
+    Args:
+        html: Commodities page
+
+    Returns:
+        Frame with the columns in COMMODITIES_SCHEMA, percentages as fractions
+    """
+    frames = []
+
+    for table in read_tables(html, schema=TABLE_SCHEMA):
+        category = table.columns[0]
+        frames.append(
+            table.rename({category: "Commodity"})
+            .with_columns(polars.lit(category).alias("Category"))
+            .select(list(COMMODITIES_SCHEMA))
+        )
+
+    frame = polars.concat(frames).with_columns(
+        polars.col(PERCENT_COLUMNS).str.strip_chars_end("%").cast(polars.Float64)
+        / 100.0
+    )
+
+    return frame.cast(COMMODITIES_SCHEMA)
+
 
-    header_info = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+def get_commodity_sections(frame: polars.DataFrame) -> list[polars.DataFrame]:
+    """
+    Splits the output of get_commodities_frame into the sections written to the sheet,
+    with the first column named after the category as on the page
+
+    Args:
+        frame: Output of get_commodities_frame
+
+    Returns:
+        List of frames, one per category in page order
+    """
+    return [
+        section.drop(["Category"] + SECTION_DROP).rename(
+            {"Commodity": section["Category"][0]}
+        )
+        for section in frame.partition_by("Category", maintain_order=True)
+    ]
+
+
+def get_section_formats(WORKBOOK: Workbook) -> dict[str, Format]:
+    """
+    Creates the formats shared by every commodity section.  Formats are created once per
+    workbook rather than once per section
+
+    Args:
+        WORKBOOK: Workbook to create the formats in
+
+    Returns:
+        Dictionary of format names to formats
+    """
+    return {
+        "header": WORKBOOK.add_format(
+            {
+                "bold": True,
+                "font_color": "white",
+                "bg_color": "black",
+                "font": "Tenorite",
+                "border": 2,
+                "valign": "vcenter",
+            }
+        ),
+        "name": WORKBOOK.add_format(
+            {
+                "font_color": "white",
+                "bg_color": "black",
+                "font": "Tenorite",
+                "border": 2,
+            }
+        ),
+        "percent": WORKBOOK.add_format(
+            {"font": "Tenorite", "num_format": "0.00%", "border": 2, "bold": True}
+        ),
+        "date": WORKBOOK.add_format(
+            {
+                "font_color": "white",
+                "bg_color": "black",
+                "font": "Tenorite",
+                "border": 2,
+                "bold": True,
+            }
+        ),
     }
 
-    data = requests.get(url, headers=header_info, timeout=5)
-    return pandas.read_html(io.StringIO(data.text))
+
+def write_commodity_sections(
+    WORKBOOK: Workbook,
+    worksheet: Worksheet,
+    sections: list[polars.DataFrame],
+    first_row: int,
+    first_col: int,
+):
+    """
+    Writes each section as a table, one below the other with a blank row between them.
+    Every table shares the formats from get_section_formats
+
+    Args:
+        WORKBOOK: Workbook to create formats
+        worksheet: Worksheet to write data to
+        sections: Output of get_commodity_sections
+        first_row: Zero indexed row of the first header
+        first_col: Zero indexed column of the name column
+    """
+    formats = get_section_formats(WORKBOOK)
+    column_formats = ["name", "percent", "percent", "percent", "date"]
+
+    worksheet.set_column_pixels(first_col, first_col, 210)
+    worksheet.set_column_pixels(first_col + 1, first_col + 4, 100)
+
+    row = first_row
+    for frame in sections:
+        last_row = row + frame.height
+        worksheet.add_table(
+            row,
+            first_col,
+            last_row,
+            first_col + frame.width - 1,
+            {
+                "data": frame.rows(),
+                "columns": [
+                    {
+                        "header": name,
+                        "header_format": formats["header"],
+                        "format": formats[column_formats[count]],
+                    }
+                    for count, name in enumerate(frame.columns)
+                ],
+            },
+        )
+
+        for count, name in enumerate(frame.columns):
+            if column_formats[count] == "percent":
+                worksheet.conditional_format(
+                    row + 1,
+                    first_col + count,
+                    last_row,
+                    first_col + count,
+                    {"type": "3_color_scale"},
+                )
+
+        row = last_row + 2
 
 
 def write_url(WORKBOOK: Workbook, worksheet: Worksheet, cell_range: str):
@@ -52,4 +269,3 @@ def write_url(WORKBOOK: Workbook, worksheet: Worksheet, cell_range: str):
     worksheet.merge_range(
         cell_range, "https://tradingeconomics.com/commodities", merge_format
     )  # pyright: ignore[reportGeneralTypeIssues]
-
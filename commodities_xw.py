@@ -1,44 +1,45 @@
 # pylint: disable=line-too-long
-"""Test workpad for new code """
+"""Test workpad for new code"""
 
-
-import io
 from datetime import datetime
 
-import pandas
-import requests
 import xlwings
 
+from commodities_utilities import get_commodities_frame, get_commodity_sections
+from xw_utilities import get_refreshed, suspend_app
+
 
 def run(sheet_name: str):
     """Scrapes commodity data for Excel"""
-    url = "https://tradingeconomics.com/commodities"
-
-    header_info = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-    }
-
-    data = requests.get(url, headers=header_info, timeout=5)
-    frames = pandas.read_html(io.StringIO(data.text))
+    workbook = xlwings.Book.caller()
 
-    column = "B"
-    row = 4
+    with suspend_app(workbook, "commodities_xw"):
+        blocks = get_refreshed("commodities", get_commodity_blocks)
 
-    for frame in frames:
-        columns = ["Weekly", "Monthly", "YoY"]
-        for col in columns:
-            frame[col] = frame[col].str.rstrip("%").astype("float") / (100.0)
+        column = "B"
+        row = 4
 
-        frame = frame.drop(columns=["%", "Price", "Day"])
+        sheet = workbook.sheets[sheet_name]
 
-        cell = column + str(row)
-        row = row + frame.shape[0] + 2
+        for block in blocks:
+            cell = column + str(row)
+            row = row + len(block) + 1
 
-        workbook = xlwings.Book.caller()
-        sheet = workbook.sheets[sheet_name]
-        sheet.range(cell).options(pandas.DataFrame, header=1, index=False).value = frame
+            sheet.range(cell).value = block
 
         update_time = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
         sheet["I15"].value = update_time
         sheet.range("I15").select()
 
+
+def get_commodity_blocks() -> list[list[list]]:
+    """
+    Returns each commodity section as a block of cells with its header row first
+
+    Returns:
+        List of blocks in page order
+    """
+    return [
+        [frame.columns] + [list(values) for values in frame.rows()]
+        for frame in get_commodity_sections(get_commodities_frame())
+    ]
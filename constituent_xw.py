@@ -1,12 +1,34 @@
-"""Test workpad for new code """
+"""Test workpad for new code"""
 
-import io
+import concurrent.futures
 from datetime import datetime
 
-import pandas
-import requests
 import xlwings
 
+from html_utilities import CHUNK_SIZE, read_table
+from xw_utilities import get_refreshed, suspend_app
+
+HEADER = {"X-Requested-With": "XMLHttpRequest"}
+
+# URLs to scrape
+URLS = [
+    "https://www.slickcharts.com/sp500/performance",
+    "https://www.slickcharts.com/nasdaq100/performance",
+    "https://www.slickcharts.com/dowjones/performance",
+]
+
+# Number of top rows to get (How many constituents from the top to gather)
+TOP_COUNT = [20, 20, 15]
+
+# Number of bottom rows to get (How many constituents from the bottom to gather)
+BOTTOM_COUNT = [21, 21, 15]
+
+# Top left cell of each region, the Company, Symbol and YTD Return columns are
+# written as one block
+TOP_POSITIONS = ["D6", "L6", "D66"]
+BOTTOM_POSITIONS = ["D28", "L28", "D83"]
+COLUMNS = ["Company", "Symbol", "YTD Return"]
+
 
 def run(sheet_name: str):
     """
@@ -15,62 +37,73 @@ def run(sheet_name: str):
     Args:
         sheet_name: Name of sheet to write to
     """
-    header = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/50.0.2661.75 Safari/537.36",  # pylint: disable=line-too-long
-        "X-Requested-With": "XMLHttpRequest",
-    }
-
-    # URLs to scrape
-    urls = [
-        "https://www.slickcharts.com/sp500/performance",
-        "https://www.slickcharts.com/nasdaq100/performance",
-        "https://www.slickcharts.com/dowjones/performance",
-    ]
-
-    # Number of top rows to get (How many constituents from the top to gather)
-    top_count = [20, 20, 15]
-
-    # Number of bottom rows to get (How many constituents from the bottom to gather)
-    bottom_count = [21, 21, 15]
-
-    # Position to write top data
-    top_positions = [
-        ["D6", "E6", "F6"],
-        ["L6", "M6", "N6"],
-        ["D66", "E66", "F66"],
-    ]
-
-    # Position to write bottom data
-    bottom_positions = [
-        ["D28", "E28", "F28"],
-        ["L28", "M28", "N28"],
-        ["D83", "E83", "F83"],
-    ]
-
-    for count, url in enumerate(urls):
-        html_data = requests.get(url, timeout=5, headers=header)
-
-        returns_table = pandas.read_html(io.StringIO(html_data.text))[0]
-        top = returns_table.head(top_count[count])
-        bottom = returns_table.tail(bottom_count[count])
-
-        company = top["Company"].tolist()
-        tickers = top["Symbol"].tolist()
-        ytd = top["YTD Return"].tolist()
-
-        workbook = xlwings.Book.caller()
+    workbook = xlwings.Book.caller()
+
+    with suspend_app(workbook, "constituent_xw"):
+        regions = get_refreshed("constituents", get_constituents)
+
         sheet = workbook.sheets[sheet_name]
-        sheet.range(top_positions[count][0]).options(transpose=True).value = company
-        sheet.range(top_positions[count][1]).options(transpose=True).value = tickers
-        sheet.range(top_positions[count][2]).options(transpose=True).value = ytd
 
-        company = bottom["Company"].tolist()
-        tickers = bottom["Symbol"].tolist()
-        ytd = bottom["YTD Return"].tolist()
+        for count, (top, bottom) in enumerate(regions):
+            sheet.range(TOP_POSITIONS[count]).value = top
+            sheet.range(BOTTOM_POSITIONS[count]).value = bottom
+
+        sheet["S15"].value = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+
+def get_constituents() -> list[tuple[list[list], list[list]]]:
+    """
+    Returns the top and bottom constituents of every configured index
+
+    Returns:
+        List of (top rows, bottom rows) in the same order as URLS
+    """
+    return get_constituent_regions(URLS, TOP_COUNT, BOTTOM_COUNT)
+
+
+def get_constituent_regions(
+    urls: list[str], top_count: list[int], bottom_count: list[int]
+) -> list[tuple[list[list], list[list]]]:
+    """
+    Fetches and parses every performance page at once over the host's pooled connections,
+    so the refresh takes as long as the slowest page rather than the sum of them
+
+    Args:
+        urls: Slickcharts performance pages
+        top_count: Number of constituents to take from the top of each page
+        bottom_count: Number of constituents to take from the bottom of each page
+
+    Returns:
+        List of (top rows, bottom rows) in the same order as urls
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        return list(executor.map(get_constituent_region, urls, top_count, bottom_count))
+
+
+def get_constituent_region(
+    url: str, top_count: int, bottom_count: int
+) -> tuple[list[list], list[list]]:
+    """
+    Streams one performance page and parses the top and bottom constituents.  Only the
+    returns table is parsed, and the rest of the page isn't read once it has closed
+
+    Args:
+        url: Slickcharts performance page
+        top_count: Number of constituents to take from the top
+        bottom_count: Number of constituents to take from the bottom
+
+    Returns:
+        (top rows, bottom rows) of Company, Symbol and YTD Return
+    """
+    import fetch_utilities  # pylint: disable=import-outside-toplevel
+
+    with fetch_utilities.get(url, headers=HEADER, stream=True) as html_data:
+        html_data.encoding = html_data.encoding or "utf-8"
+        returns_table = read_table(
+            html_data.iter_content(CHUNK_SIZE, decode_unicode=True), 0
+        )
 
-        sheet.range(bottom_positions[count][0]).options(transpose=True).value = company
-        sheet.range(bottom_positions[count][1]).options(transpose=True).value = tickers
-        sheet.range(bottom_positions[count][2]).options(transpose=True).value = ytd
+    top = returns_table.head(top_count).select(COLUMNS)
+    bottom = returns_table.tail(bottom_count).select(COLUMNS)
 
-        update_time = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        sheet["S15"].value = update_time
+    return [list(row) for row in top.rows()], [list(row) for row in bottom.rows()]
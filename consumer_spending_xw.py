@@ -1,36 +1,64 @@
-"""Opens latest building permits"""
+"""Refreshes the latest weekly consumer spending"""
 
-import sys
 from datetime import datetime
 
-import requests
 import xlwings
 
+from report_utilities import locate_report
+from spending_utilities import get_spending_block, update_spending
+from xw_utilities import get_refreshed, suspend_app
 
-def run():
-    """Checks for last month's report"""
-    current_month = datetime.now().month
-    current_year = datetime.now().year
+SPENDING_URL = "https://www.bea.gov/system/files/{year}-{month}/weekly-event-study-of-spending-v41-n1.xlsx"  # pylint: disable=line-too-long
+# Spending reports are filed under the month they are uploaded in, so a newer one can
+# appear from the start of the next month
+PUBLICATION_LAG = 0
+PUBLICATION_DAY = 1
 
-    # If January, then previous month will be last year
-    if current_month == 1:
-        current_year = current_year - 1
 
-    while current_month > 0:
-        # Ensure leading 0 for dates
-        str_month = str(current_month) if current_month >= 10 else f"0{current_month}"
-        url = f"https://www.bea.gov/system/files/{current_year}-{str_month}/weekly-event-study-of-spending-v41-n1.xlsx"
+def run(sheet_name: str = "Consumer Spending"):
+    """
+    Refreshes weekly consumer spending from the latest report, written into the workbook
+    in one block
 
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            print(f"Web site exists: {url}")
-            workbook = xlwings.Book.caller()
-            macro = workbook.macro("OpenLink")
-            macro(url)
+    Args:
+        sheet_name: Name of the sheet to write to, added if missing
+    """
+    workbook = xlwings.Book.caller()
 
-            sys.exit(0)
-        else:
-            print(f"Web site does not exist: {url}")
+    with suspend_app(workbook, "consumer_spending_xw"):
+        block = get_refreshed("spending", get_spending_data)
 
-        current_month = current_month - 1
+        if block is None:
+            print("No report found")
+            return
 
+        if sheet_name not in [sheet.name for sheet in workbook.sheets]:
+            workbook.sheets.add(sheet_name)
+
+        sheet = workbook.sheets[sheet_name]
+        sheet.range("B4").value = block
+        sheet["B2"].value = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+
+def get_spending_data() -> list[list] | None:
+    """
+    Locates the latest report and adds it to the local history
+
+    Returns:
+        Block of cells from get_spending_block, or None if no report was found
+    """
+    url = find_report_url()
+    if url is None:
+        return None
+
+    return get_spending_block(update_spending(url))
+
+
+def find_report_url() -> str | None:
+    """
+    Locates the most recent report, see report_utilities.locate_report
+
+    Returns:
+        URL of the report, or None if no report was found
+    """
+    return locate_report("spending", SPENDING_URL, PUBLICATION_LAG, PUBLICATION_DAY)
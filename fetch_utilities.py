@@ -0,0 +1,234 @@
+# pylint: disable=line-too-long
+"""Shared HTTP fetching with a connection pool, retries and a circuit breaker per host"""
+
+import threading
+import time
+import urllib.parse
+
+import requests
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+TIMEOUT = 5  # Seconds to wait for a host to connect or send data
+RETRIES = 3  # Retries after the first attempt of a request
+BACKOFF = 0.5  # Seconds before the first retry, doubled for each retry after it
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = 16  # Connections kept open to each host
+BREAKER_FAILURES = 5  # Failed requests in a row that open a host's circuit breaker
+BREAKER_RESET = 60  # Seconds an open breaker fails requests before letting one through
+
+# Base of every error raised by request, so callers can catch it without importing requests
+RequestException = requests.RequestException
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without contacting a host while its circuit breaker is open"""
+
+
+class Host:
+    """
+    Connection pool, circuit breaker and metrics for one host.  The breaker opens after
+    BREAKER_FAILURES failed requests in a row, and while open every request fails at once.
+    After BREAKER_RESET seconds requests are let through again, the first success closes
+    the breaker and a failure opens it for another BREAKER_RESET seconds
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=POOL_SIZE
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.metrics = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "rejected": 0,
+            "bytes": 0,
+            "seconds": 0.0,
+            "max_seconds": 0.0,
+        }
+
+    def check_breaker(self, host_name: str):
+        """
+        Raises CircuitOpenError if the breaker is open
+
+        Args:
+            host_name: Name of the host for the error message
+        """
+        with self.lock:
+            if (
+                self.opened_at is not None
+                and time.monotonic() - self.opened_at < BREAKER_RESET
+            ):
+                self.metrics["rejected"] += 1
+                raise CircuitOpenError(f"Circuit breaker open for {host_name}")
+
+    def record(self, success: bool, seconds: float, size: int, retries: int):
+        """
+        Records the outcome of a request, opening or closing the breaker
+
+        Args:
+            success: True if the host answered without a server error
+            seconds: Time taken including retries
+            size: Bytes received
+            retries: Number of retries made
+        """
+        with self.lock:
+            self.metrics["requests"] += 1
+            self.metrics["retries"] += retries
+            self.metrics["bytes"] += size
+            self.metrics["seconds"] += seconds
+            self.metrics["max_seconds"] = max(self.metrics["max_seconds"], seconds)
+
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+
+            self.metrics["failures"] += 1
+            self.failures += 1
+            if self.failures >= BREAKER_FAILURES:
+                self.opened_at = time.monotonic()
+
+
+HOSTS: dict[str, Host] = {}
+HOSTS_LOCK = threading.Lock()
+
+
+def get_host(url: str) -> tuple[str, Host]:
+    """
+    Returns the Host for a url, creating it on first use
+
+    Args:
+        url: URL being requested
+
+    Returns:
+        Tuple of the host name and its Host
+    """
+    host_name = urllib.parse.urlsplit(url).netloc
+
+    with HOSTS_LOCK:
+        if host_name not in HOSTS:
+            HOSTS[host_name] = Host()
+
+        return host_name, HOSTS[host_name]
+
+
+def request(
+    method: str,
+    url: str,
+    timeout: float = TIMEOUT,
+    retries: int = RETRIES,
+    **kwargs,
+) -> requests.Response:
+    """
+    Makes a request over the host's pooled session.  Connection errors, timeouts and
+    RETRY_STATUSES are retried with exponential backoff, other statuses are returned as
+    they are for the caller to check
+
+    Args:
+        method: HTTP method, e.g. GET
+        url: URL to request
+        timeout: Seconds to wait for the host to connect or send data
+        retries: Retries after the first attempt
+        **kwargs: Passed on to requests, e.g. headers or stream
+
+    Returns:
+        The response, with the body already read unless stream is set
+    """
+    host_name, host = get_host(url)
+    host.check_breaker(host_name)
+    start = time.perf_counter()
+
+    for attempt in range(retries + 1):
+        try:
+            response = host.session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                host.record(False, time.perf_counter() - start, 0, attempt)
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                break
+            response.close()
+
+        time.sleep(BACKOFF * 2**attempt)
+
+    if kwargs.get("stream", False):
+        size = int(response.headers.get("Content-Length", 0))
+    else:
+        size = len(response.content)
+
+    host.record(
+        response.status_code not in RETRY_STATUSES,
+        time.perf_counter() - start,
+        size,
+        attempt,
+    )
+
+    return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    Makes a GET request, see request
+
+    Args:
+        url: URL to request
+        **kwargs: Passed on to request, e.g. headers, stream or timeout
+
+    Returns:
+        The response
+    """
+    return request("GET", url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    """
+    Makes a HEAD request, see request
+
+    Args:
+        url: URL to request
+        **kwargs: Passed on to request, e.g. allow_redirects
+
+    Returns:
+        The response
+    """
+    return request("HEAD", url, **kwargs)
+
+
+def get_metrics() -> dict[str, dict]:
+    """
+    Returns a copy of the metrics of every host used so far
+
+    Returns:
+        Dictionary of host names to requests, retries, failures, rejected, bytes, seconds
+        and max_seconds
+    """
+    with HOSTS_LOCK:
+        hosts = dict(HOSTS)
+
+    metrics = {}
+    for host_name, host in hosts.items():
+        with host.lock:
+            metrics[host_name] = dict(host.metrics)
+
+    return metrics
+
+
+def print_metrics():
+    """Prints the requests, bytes and average latency of each host"""
+    for host_name, metrics in get_metrics().items():
+        average = metrics["seconds"] / max(metrics["requests"], 1)
+        print(
+            f"[Fetch] {host_name}: {metrics['requests']} requests, "
+            f"{metrics['retries']} retries, {metrics['failures']} failures, "
+            f"{metrics['bytes'] / 1024:.0f}KB, {average:.2f}s average, "
+            f"{metrics['max_seconds']:.2f}s max"
+        )
@@ -1,12 +1,47 @@
 # pylint: disable=line-too-long
 """Functions to download data from Financial Modelling Prep"""
 
-import requests
+import contextlib
+import gzip
+import json
+import os
+import threading
+import time
+
+import fetch_utilities
 
 # Globals
 API_KEY = ""
 LIMIT = 5  # Used to limit amount of returned data in some calls
 
+# Fixture capture.  "record" saves every raw response into FIXTURE_DIR, "replay" serves
+# responses from FIXTURE_DIR without touching the network and "" disables both
+FIXTURE_MODE = os.environ.get("FMP_FIXTURE_MODE", "")
+FIXTURE_DIR = os.path.join("Test Data", "Fixtures")
+
+
+class RateLimiter:
+    """Spaces out requests so no more than calls_per_minute are made, shared across threads"""
+
+    def __init__(self, calls_per_minute: int):
+        self.interval = 60 / calls_per_minute
+        self.next_call = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until the next request slot is free"""
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Set to a RateLimiter to throttle every request, e.g. for long universe scans
+RATE_LIMITER: RateLimiter | None = None
+
 
 def fmp_check_symbols(input_list: list[str]) -> list[str]:
     """
@@ -85,6 +120,96 @@ def check_for_error(json_data):
     return "Error Message" in json_data
 
 
+def fixture_path(fixture_name: str) -> str:
+    """
+    Returns the path of the compressed JSON file holding a recorded response
+
+    Args:
+        fixture_name: Name of the recording, e.g. press_releases_NVDA
+
+    Returns:
+        Path to the .json.gz file
+    """
+    return os.path.join(FIXTURE_DIR, f"{fixture_name}.json.gz")
+
+
+@contextlib.contextmanager
+def use_fixtures(mode: str = "replay", fixture_dir: str | None = None):
+    """
+    Switches FIXTURE_MODE, and FIXTURE_DIR if passed, for the duration of a with block,
+    restoring both on exit
+
+    Args:
+        mode: "record", "replay" or "" to disable both
+        fixture_dir: Directory holding the recordings, or None to keep FIXTURE_DIR
+    """
+    global FIXTURE_MODE, FIXTURE_DIR  # pylint: disable=W0603
+    fixture_mode, previous_dir = FIXTURE_MODE, FIXTURE_DIR
+
+    FIXTURE_MODE = mode
+    if fixture_dir is not None:
+        FIXTURE_DIR = fixture_dir
+
+    try:
+        yield
+    finally:
+        FIXTURE_MODE, FIXTURE_DIR = fixture_mode, previous_dir
+
+
+def save_fixture(fixture_name: str, json_data):
+    """
+    Writes a raw response to FIXTURE_DIR as gzipped JSON
+
+    Args:
+        fixture_name: Name of the recording
+        json_data: Decoded JSON response
+    """
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with gzip.open(fixture_path(fixture_name), "wt", encoding="utf-8") as fixture_file:
+        json.dump(json_data, fixture_file, separators=(",", ":"))
+
+
+def load_fixture(fixture_name: str):
+    """
+    Reads a response previously written by save_fixture
+
+    Args:
+        fixture_name: Name of the recording
+
+    Returns:
+        Decoded JSON response
+    """
+    with gzip.open(fixture_path(fixture_name), "rt", encoding="utf-8") as fixture_file:
+        return json.load(fixture_file)
+
+
+def get_json(url: str, fixture_name: str):
+    """
+    Downloads and decodes the JSON at url.  Depending on FIXTURE_MODE the response is also
+    recorded, or replayed from disk instead of being downloaded
+
+    Args:
+        url: Full url including the API key
+        fixture_name: Name to record or replay the response under.  Never include the API key
+
+    Returns:
+        Decoded JSON response
+    """
+    if FIXTURE_MODE == "replay":
+        return load_fixture(fixture_name)
+
+    if RATE_LIMITER is not None:
+        RATE_LIMITER.wait()
+
+    json_data = fetch_utilities.get(url).json()
+
+    # Error payloads, e.g. from a missing API key, would be replayed as if FMP sent them
+    if FIXTURE_MODE == "record" and not check_for_error(json_data):
+        save_fixture(fixture_name, json_data)
+
+    return json_data
+
+
 def fmp_symbol_list() -> list[dict]:
     """Returns json array of all fmp supported symbols
 
@@ -104,7 +229,7 @@ def fmp_symbol_list() -> list[dict]:
     """
     url = f"https://financialmodelingprep.com/api/v3/stock/list?apikey={API_KEY}"
 
-    return requests.get(url, timeout=5).json()
+    return get_json(url, "symbol_list")
 
 
 def fmp_ratios(ticker: str) -> list[dict]:
@@ -126,7 +251,7 @@ def fmp_ratios(ticker: str) -> list[dict]:
         + str(LIMIT)
     )
 
-    return requests.get(url, timeout=5).json()
+    return get_json(url, f"ratios_{ticker}")
 
 
 def fmp_key_metrics(ticker: str) -> list[dict]:
@@ -148,7 +273,7 @@ def fmp_key_metrics(ticker: str) -> list[dict]:
         + str(LIMIT)
     )
 
-    return requests.get(url, timeout=5).json()
+    return get_json(url, f"key_metrics_{ticker}")
 
 
 def fmp_company_profile(ticker: str) -> dict:
@@ -169,15 +294,16 @@ def fmp_company_profile(ticker: str) -> dict:
         + API_KEY
     )
 
-    return requests.get(url, timeout=5).json()[0]
+    return get_json(url, f"company_profile_{ticker}")[0]
 
 
-def fmp_press_releases(ticker: str) -> list[dict]:
+def fmp_press_releases(ticker: str, page: int = 0) -> list[dict]:
     """
-    Returns json array of press release information
+    Returns json array of press release information, newest first
 
     Args:
         ticker: Symbol to search for on FMP
+        page: Page of older releases to return, 0 being the newest
 
     Returns:
         List of json dictionaries
@@ -191,8 +317,12 @@ def fmp_press_releases(ticker: str) -> list[dict]:
       },
       ...
     """
-    url = f"https://financialmodelingprep.com/api/v3/press-releases/{ticker}?apikey={API_KEY}"
-    return requests.get(url, timeout=5).json()
+    url = f"https://financialmodelingprep.com/api/v3/press-releases/{ticker}?page={page}&apikey={API_KEY}"
+
+    if page == 0:
+        return get_json(url, f"press_releases_{ticker}")
+
+    return get_json(url, f"press_releases_{ticker}_{page}")
 
 
 def fmp_sales_per_segment(ticker: str) -> list[dict]:
@@ -219,7 +349,7 @@ def fmp_sales_per_segment(ticker: str) -> list[dict]:
 
     """
     url = f"https://financialmodelingprep.com/api/v4/revenue-product-segmentation?symbol={ticker}&structure=flat&period=annual&apikey={API_KEY}"
-    return requests.get(url, timeout=5).json()
+    return get_json(url, f"sales_per_segment_{ticker}")
 
 
 def fmp_sales_per_region(ticker: str) -> list[dict]:
@@ -244,7 +374,7 @@ def fmp_sales_per_region(ticker: str) -> list[dict]:
       ...
     """
     url = f"https://financialmodelingprep.com/api/v4/revenue-geographic-segmentation?symbol={ticker}&structure=flat&apikey={API_KEY}"
-    return requests.get(url, timeout=5).json()
+    return get_json(url, f"sales_per_region_{ticker}")
 
 
 def fmp_historical_prices(ticker: str) -> dict:
@@ -272,7 +402,7 @@ def fmp_historical_prices(ticker: str) -> dict:
     """
 
     url = f"https://financialmodelingprep.com/api/v3/historical-price-full/{ticker}?serietype=line&apikey={API_KEY}"
-    return requests.get(url, timeout=5).json()
+    return get_json(url, f"historical_prices_{ticker}")
 
 
 def fmp_balance_sheet_annual(ticker) -> list[dict]:
@@ -295,6 +425,4 @@ def fmp_balance_sheet_annual(ticker) -> list[dict]:
         + API_KEY
     )
 
-    return requests.get(url, timeout=5).json()
-
-
+    return get_json(url, f"balance_sheet_annual_{ticker}")
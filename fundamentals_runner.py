@@ -0,0 +1,30 @@
+"""Scans fundamentals for every stock on an exchange into the local parquet store"""
+
+import sys
+
+import requests
+
+from fundamentals_utilities import (
+    FUNDAMENTALS_DIR,
+    read_fundamentals,
+    scan_fundamentals,
+)
+
+# An interrupted scan resumes on the next run, set to True to start over instead
+REFRESH = False
+
+EXCHANGE = input("Exchange (e.g. NASDAQ): ").strip().upper()
+
+try:
+    scan_fundamentals(EXCHANGE, refresh=REFRESH)
+except (requests.RequestException, ValueError) as error:
+    print(f"\n[Error] Scan interrupted: {error}")
+    print("[Error] Run again to resume from the last completed chunk")
+    sys.exit(1)
+
+summary = (
+    read_fundamentals().filter(exchange=EXCHANGE).select("ticker").unique().collect()
+)
+print(
+    f"\n[Completed] {summary.shape[0]} {EXCHANGE} tickers stored in {FUNDAMENTALS_DIR}"
+)
@@ -0,0 +1,243 @@
+"""Utility functions for fundamentals_runner.py, scanning a whole exchange into a parquet store"""
+
+import glob
+import json
+import os
+
+import polars
+
+import fmp
+from fmp import RateLimiter, fmp_symbol_list
+from ratios_utilities import (
+    compile_ratios,
+    get_panel_frame,
+    prefetch_ratio_data,
+    safe_divide,
+)
+
+FUNDAMENTALS_DIR = os.path.join("Cache", "Fundamentals")
+CHUNK_SIZE = 50  # Tickers per parquet part, peak memory scales with this
+CALLS_PER_MINUTE = 300  # FMP plan limit
+SCAN_WORKERS = 8  # Maximum requests in flight within a chunk
+
+FUNDAMENTALS = [
+    ["Date", "ratios.date", False],
+    ["Current Ratio", "ratios.currentRatio", True],
+    ["Quick Ratio", "ratios.quickRatio", True],
+    ["ROA", "ratios.returnOnAssets", True],
+    ["ROE", "ratios.returnOnEquity", True],
+    ["ROIC", "metrics.roic", True],
+    ["PE", "ratios.priceEarningsRatio", True],
+    ["PEG", "ratios.priceEarningsToGrowthRatio", True],
+    ["Price to Sales", "ratios.priceToSalesRatio", True],
+    ["Net Profit Margin", "ratios.netProfitMargin", True],
+    ["Dividend Yield", "ratios.dividendYield", True],
+    ["Interest Coverage", "metrics.interestCoverage", True],
+    ["Debt to Equity", "metrics.debtToEquity", True],
+    ["Debt to Assets", "metrics.debtToAssets", True],
+    ["Free Cashflow Yield", "metrics.freeCashFlowYield", True],
+    ["Market Cap", "metrics.marketCap", False],
+    ["Total Assets", "balance.totalAssets", False],
+    ["Total Debt", "balance.totalDebt", False],
+    [
+        "Working Capital to Assets",
+        safe_divide(
+            polars.col("metrics.workingCapital"), polars.col("balance.totalAssets")
+        ),
+        True,
+    ],
+]
+
+
+def get_universe(exchange: str) -> list[str]:
+    """
+    Returns every stock symbol FMP lists for an exchange
+
+    Args:
+        exchange: Short exchange name, e.g. NASDAQ
+
+    Returns:
+        Sorted list of symbols
+    """
+    return sorted(
+        symbol["symbol"]
+        for symbol in fmp_symbol_list()
+        if symbol.get("exchangeShortName") == exchange and symbol.get("type") == "stock"
+    )
+
+
+def get_partition_dir(store_dir: str, exchange: str) -> str:
+    """
+    Returns the hive style partition directory for an exchange, e.g. exchange=NASDAQ
+
+    Args:
+        store_dir: Root of the parquet store
+        exchange: Short exchange name
+
+    Returns:
+        Directory path
+    """
+    return os.path.join(store_dir, f"exchange={exchange}")
+
+
+def load_checkpoint(partition_dir: str) -> dict | None:
+    """
+    Reads the scan checkpoint for a partition
+
+    Args:
+        partition_dir: Output of get_partition_dir
+
+    Returns:
+        dict{"symbols": [...], "chunk_size": int, "completed": [chunk numbers]} or None
+    """
+    path = os.path.join(partition_dir, "checkpoint.json")
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def save_checkpoint(partition_dir: str, checkpoint: dict):
+    """
+    Writes the scan checkpoint, replacing the old one in a single step so an interrupted
+    write never leaves it half written
+
+    Args:
+        partition_dir: Output of get_partition_dir
+        checkpoint: Checkpoint dictionary, see load_checkpoint
+    """
+    path = os.path.join(partition_dir, "checkpoint.json")
+
+    with open(path + ".tmp", "w", encoding="utf-8") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+
+    os.replace(path + ".tmp", path)
+
+
+def has_data(ticker_data: dict) -> bool:
+    """
+    Returns True if every endpoint returned a non empty list for the ticker
+
+    Args:
+        ticker_data: A ticker's entry from prefetch_ratio_data
+
+    Returns:
+        True if the ticker can be added to the panel
+    """
+    return all(
+        isinstance(json_data, list) and len(json_data) > 0
+        for json_data in ticker_data.values()
+    )
+
+
+def is_complete(checkpoint: dict) -> bool:
+    """
+    Returns True if every chunk in the checkpoint has been written
+
+    Args:
+        checkpoint: Checkpoint dictionary, see load_checkpoint
+
+    Returns:
+        True if the scan finished
+    """
+    chunk_size = checkpoint["chunk_size"]
+    num_chunks = (len(checkpoint["symbols"]) + chunk_size - 1) // chunk_size
+    return set(range(num_chunks)) <= set(checkpoint["completed"])
+
+
+def scan_fundamentals(
+    exchange: str,
+    store_dir: str = FUNDAMENTALS_DIR,
+    chunk_size: int = CHUNK_SIZE,
+    calls_per_minute: int = CALLS_PER_MINUTE,
+    workers: int = SCAN_WORKERS,
+    ratios: list | None = None,
+    refresh: bool = False,
+) -> int:
+    """
+    Downloads fundamentals for every stock on an exchange, chunk by chunk, writing each
+    chunk as a parquet part of the long panel frame (see ratios_utilities.get_panel_frame).
+    Only one chunk is held in memory at a time.  Completed chunks are checkpointed, so
+    running again after an interruption resumes where the scan stopped.  Once every chunk
+    is complete the next run starts a fresh snapshot, re-reading the exchange's symbols
+    and replacing the old parts, as does any run with refresh set
+
+    Args:
+        exchange: Short exchange name, e.g. NASDAQ
+        store_dir: Root of the parquet store
+        chunk_size: Tickers per part
+        calls_per_minute: Maximum FMP requests per minute
+        workers: Maximum requests in flight
+        ratios: Ratio spec to use, defaults to FUNDAMENTALS
+        refresh: Start a fresh snapshot even if an interrupted scan could be resumed
+
+    Returns:
+        Number of chunks written by this run
+    """
+    plan = compile_ratios(FUNDAMENTALS if ratios is None else ratios)
+    partition_dir = get_partition_dir(store_dir, exchange)
+    os.makedirs(partition_dir, exist_ok=True)
+
+    checkpoint = load_checkpoint(partition_dir)
+    if (
+        refresh
+        or checkpoint is None
+        or checkpoint["chunk_size"] != chunk_size
+        or is_complete(checkpoint)
+    ):
+        checkpoint = {
+            "symbols": get_universe(exchange),
+            "chunk_size": chunk_size,
+            "completed": [],
+        }
+        for part in glob.glob(os.path.join(partition_dir, "part-*.parquet")):
+            os.remove(part)
+        save_checkpoint(partition_dir, checkpoint)
+
+    symbols = checkpoint["symbols"]
+    completed = set(checkpoint["completed"])
+    num_chunks = (len(symbols) + chunk_size - 1) // chunk_size
+    written = 0
+
+    rate_limiter = fmp.RATE_LIMITER
+    fmp.RATE_LIMITER = RateLimiter(calls_per_minute)
+
+    try:
+        for chunk in range(num_chunks):
+            if chunk in completed:
+                continue
+
+            tickers = symbols[chunk * chunk_size : (chunk + 1) * chunk_size]
+            data = prefetch_ratio_data(tickers, plan["endpoints"], workers)
+            tickers = [ticker for ticker in tickers if has_data(data[ticker])]
+
+            if len(tickers) > 0:
+                get_panel_frame(tickers, plan, data).write_parquet(
+                    os.path.join(partition_dir, f"part-{chunk:05d}.parquet")
+                )
+
+            completed.add(chunk)
+            checkpoint["completed"] = sorted(completed)
+            save_checkpoint(partition_dir, checkpoint)
+            written = written + 1
+            print(f"[Processing] {exchange} chunk {chunk + 1}/{num_chunks} completed")
+    finally:
+        fmp.RATE_LIMITER = rate_limiter
+
+    return written
+
+
+def read_fundamentals(store_dir: str = FUNDAMENTALS_DIR) -> polars.LazyFrame:
+    """
+    Lazily reads every scanned exchange, with the partition as an exchange column
+
+    Args:
+        store_dir: Root of the parquet store
+
+    Returns:
+        LazyFrame with exchange, ticker, metric, period, date and value columns
+    """
+    return polars.scan_parquet(
+        os.path.join(store_dir, "*", "*.parquet"), hive_partitioning=True
+    )
@@ -0,0 +1,47 @@
+# pylint: disable=line-too-long
+"""Benchmarks html_utilities.read_tables against pandas.read_html on saved pages"""
+
+import os
+
+from html_utilities import benchmark_read_tables
+
+PAGE_DIR = os.path.join("Test Data", "Pages")
+REPEAT = 20
+
+# Pages are replayed from PAGE_DIR, set to True to save fresh copies from their urls first
+RECORD = False
+
+# Saved page name: (url the page is recorded from, tables the scraper extracts)
+PAGES = {
+    "commodities": ("https://tradingeconomics.com/commodities", None),
+    "sp500_performance": ("https://www.slickcharts.com/sp500/performance", [0]),
+    "ura_holdings": ("https://stockanalysis.com/etf/ura/holdings/", [0]),
+}
+
+if RECORD:
+    import fetch_utilities
+
+    os.makedirs(PAGE_DIR, exist_ok=True)
+    for name, (url, _) in PAGES.items():
+        print(f"[Recording] {name}")
+        with open(
+            os.path.join(PAGE_DIR, f"{name}.html"), "w", encoding="utf-8"
+        ) as file:
+            file.write(fetch_utilities.get(url).text)
+
+for name, (url, select) in PAGES.items():
+    page_path = os.path.join(PAGE_DIR, f"{name}.html")
+
+    if not os.path.exists(page_path):
+        print(f"[Missing] {page_path}, run with RECORD = True to save it from {url}")
+        continue
+
+    with open(page_path, encoding="utf-8") as file:
+        html_text = file.read()
+
+    timings = benchmark_read_tables(html_text, select, REPEAT)
+    print(
+        f"[Benchmark] {name}: read_tables {timings['read_tables'] * 1000:.1f}ms, "
+        f"read_html {timings['read_html'] * 1000:.1f}ms, "
+        f"{timings['read_html'] / timings['read_tables']:.1f}x"
+    )
@@ -0,0 +1,311 @@
+"""Extracts selected tables from a HTML page straight into polars frames"""
+
+import html.parser
+import time
+from collections.abc import Iterable
+
+import polars
+
+CHUNK_SIZE = 65536  # Characters fed to the parser at a time
+
+
+class TableParser(html.parser.HTMLParser):
+    """
+    Collects the rows of the selected tables as HTML is fed in.  Tables are selected by
+    their position on the page, counting from 0, or by their id attribute.  done is set
+    once every selected table has closed, so the rest of the page need not be parsed
+    """
+
+    def __init__(self, select: list[int | str] | None):
+        super().__init__(convert_charrefs=True)
+        self.select = select
+        # Keys still to close, a table selected by both position and id closes both
+        self.remaining = set(select) if select is not None else None
+        self.table_count = 0
+        self.stack: list[dict | None] = []
+        self.tables: dict[int | str, dict] = {}
+        self.done = False
+
+    def get_keys(self, position: int, table_id: str | None) -> list[int | str]:
+        """
+        Returns the keys a table is selected by, empty if it isn't selected
+
+        Args:
+            position: Position of the table on the page
+            table_id: id attribute of the table
+
+        Returns:
+            Position, id or both that select the table
+        """
+        if self.select is None:
+            return [position]
+
+        return [key for key in (position, table_id) if key in self.select]
+
+    def current(self) -> dict | None:
+        """Returns the innermost open table if it is selected, otherwise None"""
+        if len(self.stack) == 0:
+            return None
+
+        return self.stack[-1]
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]):
+        if tag == "table":
+            keys = self.get_keys(self.table_count, dict(attrs).get("id"))
+            self.table_count += 1
+
+            table = None
+            if len(keys) > 0:
+                table = {
+                    "keys": keys,
+                    "header": None,
+                    "rows": [],
+                    "row": None,
+                    "cell": None,
+                    "in_head": False,
+                    "all_th": True,
+                }
+                for key in keys:
+                    self.tables[key] = table
+
+            self.stack.append(table)
+            return
+
+        table = self.current()
+        if table is None:
+            return
+
+        if tag == "thead":
+            table["in_head"] = True
+        elif tag == "tr":
+            end_row(table)
+            table["row"] = []
+            table["all_th"] = True
+        elif tag in ("td", "th"):
+            end_cell(table)
+            if table["row"] is None:
+                table["row"] = []
+            table["cell"] = []
+            table["all_th"] = table["all_th"] and tag == "th"
+        elif tag == "br" and table["cell"] is not None:
+            table["cell"].append(" ")
+
+    def handle_endtag(self, tag: str):
+        if tag == "table":
+            if len(self.stack) == 0:
+                return
+
+            table = self.stack.pop()
+            if table is None:
+                return
+
+            end_row(table)
+            if self.remaining is not None:
+                self.remaining.difference_update(table["keys"])
+                self.done = len(self.remaining) == 0
+            return
+
+        table = self.current()
+        if table is None:
+            return
+
+        if tag in ("td", "th"):
+            end_cell(table)
+        elif tag == "tr":
+            end_row(table)
+        elif tag == "thead":
+            end_row(table)
+            table["in_head"] = False
+
+    def handle_data(self, data: str):
+        table = self.current()
+        if table is not None and table["cell"] is not None:
+            table["cell"].append(data)
+
+
+def end_cell(table: dict):
+    """
+    Adds the open cell, if any, to the open row with its whitespace collapsed
+
+    Args:
+        table: Table being collected by TableParser
+    """
+    if table["cell"] is None:
+        return
+
+    table["row"].append(" ".join("".join(table["cell"]).split()))
+    table["cell"] = None
+
+
+def end_row(table: dict):
+    """
+    Adds the open row, if any, to the table.  The first row in a thead, or made up only of
+    th cells, becomes the header
+
+    Args:
+        table: Table being collected by TableParser
+    """
+    end_cell(table)
+    if table["row"] is None:
+        return
+
+    if table["header"] is None and (table["in_head"] or table["all_th"]):
+        table["header"] = table["row"]
+    elif not table["in_head"] and len(table["row"]) > 0:
+        table["rows"].append(table["row"])
+
+    table["row"] = None
+
+
+def read_tables(
+    html_text: str | Iterable[str],
+    select: list[int | str] | None = None,
+    schema: dict[str, polars.DataType] | None = None,
+) -> list[polars.DataFrame]:
+    """
+    Extracts the selected tables into polars frames.  The HTML is fed to the parser in
+    chunks and parsing stops as soon as the last selected table closes, so the rest of the
+    page, and any other tables, are never parsed
+
+    Args:
+        html_text: Page, or an iterable of chunks of it such as a streamed response
+        select: Positions, counting from 0, or ids of the tables.  None for every table
+        schema: Dictionary of column names to types.  Columns not in schema are strings,
+            and numeric columns have thousands separators removed before casting
+
+    Returns:
+        List of frames in the order of select, or page order if select is None
+    """
+    parser = TableParser(select)
+
+    chunks = html_text
+    if isinstance(html_text, str):
+        chunks = [
+            html_text[start : start + CHUNK_SIZE]
+            for start in range(0, len(html_text), CHUNK_SIZE)
+        ]
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    else:
+        parser.close()
+        for table in parser.stack:
+            if table is not None:
+                end_row(table)
+
+    keys = select if select is not None else list(parser.tables)
+    for key in keys:
+        if key not in parser.tables:
+            raise ValueError(f"Table {key} not found")
+
+    return [to_frame(parser.tables[key], schema) for key in keys]
+
+
+def read_table(
+    html_text: str | Iterable[str],
+    select: int | str = 0,
+    schema: dict[str, polars.DataType] | None = None,
+) -> polars.DataFrame:
+    """
+    Extracts a single table, see read_tables
+
+    Args:
+        html_text: Page, or an iterable of chunks of it such as a streamed response
+        select: Position, counting from 0, or id of the table
+        schema: Dictionary of column names to types
+
+    Returns:
+        Frame of the table
+    """
+    return read_tables(html_text, [select], schema)[0]
+
+
+def to_frame(
+    table: dict, schema: dict[str, polars.DataType] | None
+) -> polars.DataFrame:
+    """
+    Builds a frame from a table collected by TableParser.  Duplicate header names are
+    suffixed .1, .2 etc. as read_html does, and empty cells become nulls
+
+    Args:
+        table: Table collected by TableParser
+        schema: Dictionary of column names to types
+
+    Returns:
+        Frame of the table
+    """
+    header = table["header"]
+    if header is None:
+        width = max([len(row) for row in table["rows"]], default=0)
+        header = [str(count) for count in range(width)]
+
+    names: list[str] = []
+    for name in header:
+        unique_name, count = name, 0
+        while unique_name in names:
+            count += 1
+            unique_name = f"{name}.{count}"
+        names.append(unique_name)
+
+    width = len(names)
+    rows = [
+        [value if value != "" else None for value in row[:width]]
+        + [None] * (width - len(row))
+        for row in table["rows"]
+    ]
+
+    frame = polars.DataFrame(
+        rows, schema={name: polars.Utf8 for name in names}, orient="row"
+    )
+
+    if schema is None:
+        return frame
+
+    return frame.with_columns(
+        [
+            (
+                polars.col(name).str.replace_all(",", "").cast(dtype)
+                if dtype.is_numeric()
+                else polars.col(name).cast(dtype)
+            )
+            for name, dtype in schema.items()
+            if name in frame.columns
+        ]
+    )
+
+
+def benchmark_read_tables(
+    html_text: str, select: list[int] | None, repeat: int = 10
+) -> dict[str, float]:
+    """
+    Times read_tables against pandas.read_html followed by polars.from_pandas on a page
+
+    Args:
+        html_text: Page to parse
+        select: Positions of the tables to extract, or None for every table
+        repeat: Number of times each parser is run
+
+    Returns:
+        Dictionary of parser name to average seconds per run
+    """
+    import io  # pylint: disable=import-outside-toplevel
+
+    import pandas  # pylint: disable=import-outside-toplevel
+
+    timings = {}
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        read_tables(html_text, select)
+    timings["read_tables"] = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        frames = pandas.read_html(io.StringIO(html_text))
+        for key in select if select is not None else range(len(frames)):
+            polars.from_pandas(frames[key])
+    timings["read_html"] = (time.perf_counter() - start) / repeat
+
+    return timings
@@ -0,0 +1,196 @@
+"""Parses the Census state building permits reports into a local history"""
+
+import os
+import re
+from datetime import date
+
+import polars
+
+from report_utilities import REPORT_DIR, download_report, read_report, update_history
+
+PERMITS_HISTORY = os.path.join(REPORT_DIR, "permits.parquet")
+PERMIT_MONTHS = 13  # Months of totals written to the sheet
+STATES = [
+    "United States",
+    "Alabama",
+    "Alaska",
+    "Arizona",
+    "Arkansas",
+    "California",
+    "Colorado",
+    "Connecticut",
+    "Delaware",
+    "District of Columbia",
+    "Florida",
+    "Georgia",
+    "Hawaii",
+    "Idaho",
+    "Illinois",
+    "Indiana",
+    "Iowa",
+    "Kansas",
+    "Kentucky",
+    "Louisiana",
+    "Maine",
+    "Maryland",
+    "Massachusetts",
+    "Michigan",
+    "Minnesota",
+    "Mississippi",
+    "Missouri",
+    "Montana",
+    "Nebraska",
+    "Nevada",
+    "New Hampshire",
+    "New Jersey",
+    "New Mexico",
+    "New York",
+    "North Carolina",
+    "North Dakota",
+    "Ohio",
+    "Oklahoma",
+    "Oregon",
+    "Pennsylvania",
+    "Rhode Island",
+    "South Carolina",
+    "South Dakota",
+    "Tennessee",
+    "Texas",
+    "Utah",
+    "Vermont",
+    "Virginia",
+    "Washington",
+    "West Virginia",
+    "Wisconsin",
+    "Wyoming",
+]
+MONTH_PATTERN = re.compile(r"(\d{4})(\d{2})\.xls$")
+
+
+def get_report_month(url: str) -> date:
+    """
+    Returns the month a report covers from its URL, e.g. statemonthly_202512.xls
+
+    Args:
+        url: URL of the report
+
+    Returns:
+        First day of the month
+    """
+    match = MONTH_PATTERN.search(url)
+    if match is None:
+        raise ValueError(f"No month in {url}")
+
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def parse_permits(report: polars.DataFrame, month: date) -> polars.DataFrame:
+    """
+    Parses a state permits report.  The unit columns are found by the header row holding
+    Total, and the state rows by their names, so title and note rows are skipped.  Only the
+    first row for each state is kept
+
+    Args:
+        report: Output of read_report
+        month: Month the report covers
+
+    Returns:
+        Frame of State, Month and one Int64 column per unit column, e.g. Total
+    """
+    rows = report.rows()
+
+    header_index = next(
+        (
+            count
+            for count, row in enumerate(rows)
+            if "Total" in [str(cell).strip() for cell in row]
+        ),
+        None,
+    )
+    if header_index is None:
+        raise ValueError("Column Total not found, the permits layout has changed")
+
+    header = [
+        str(cell).strip() if cell is not None else "" for cell in rows[header_index]
+    ]
+    total_col = header.index("Total")
+    unit_cols = [
+        count for count in range(total_col, len(header)) if header[count] != ""
+    ]
+
+    state_rows = []
+    for row in rows[header_index + 1 :]:
+        names = [str(cell).strip() for cell in row[:total_col] if cell is not None]
+        state = next((name for name in names if name in STATES), None)
+        if state is not None and state not in [row[0] for row in state_rows]:
+            state_rows.append([state] + [row[count] for count in unit_cols])
+
+    if len(state_rows) == 0:
+        raise ValueError("No states found, the permits layout has changed")
+
+    unit_names = [header[count] for count in unit_cols]
+    frame = polars.DataFrame(
+        state_rows,
+        schema={name: polars.Utf8 for name in ["State"] + unit_names},
+        orient="row",
+    )
+
+    return frame.select(
+        polars.col("State"),
+        polars.lit(month).alias("Month"),
+        polars.col(unit_names)
+        .str.replace_all(",", "")
+        .cast(polars.Float64, strict=False)
+        .cast(polars.Int64),
+    )
+
+
+def update_permits(url: str, history_path: str = PERMITS_HISTORY) -> polars.DataFrame:
+    """
+    Downloads, parses and stores the report at url, unless its month is already stored
+
+    Args:
+        url: URL of the report, see state_permits_xw.find_report_url
+        history_path: Parquet file holding the history
+
+    Returns:
+        History of every stored month
+    """
+    month = get_report_month(url)
+
+    if os.path.exists(history_path):
+        history = polars.read_parquet(history_path)
+        if month in history["Month"].to_list():
+            return history
+
+    report = read_report(download_report(url))
+    return update_history(parse_permits(report, month), history_path, "Month")
+
+
+def get_permits_block(
+    history: polars.DataFrame, months: int = PERMIT_MONTHS
+) -> list[list]:
+    """
+    Lays out the Total permits of the latest months with a row per state and a column per
+    month, newest first, for writing to the sheet in one block
+
+    Args:
+        history: Output of update_permits
+        months: Number of months to include
+
+    Returns:
+        Header row of State and month names, then a row per state
+    """
+    latest = history["Month"].unique().sort(descending=True).head(months).to_list()
+    frame = (
+        history.filter(polars.col("Month").is_in(latest))
+        .pivot(on="Month", index="State", values="Total")
+        .select(["State"] + [str(month) for month in latest])
+    )
+
+    state_order = {state: count for count, state in enumerate(STATES)}
+    rows = sorted(frame.rows(), key=lambda row: state_order[row[0]])
+
+    return [["State"] + [month.strftime("%b %Y") for month in latest]] + [
+        list(row) for row in rows
+    ]
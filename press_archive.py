@@ -0,0 +1,400 @@
+"""Local archive of press releases with an inverted index over title and text"""
+
+import concurrent.futures
+import glob
+import os
+import re
+from datetime import date
+
+import polars
+
+from fmp import check_for_error, fmp_press_releases
+
+ARCHIVE_DIR = os.path.join("Cache", "Press")
+PAGE_DEPTH = 5  # Pages of history pulled when backfilling a ticker
+PAGE_WORKERS = 5  # Pages requested at once during a backfill
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> set[str]:
+    """
+    Splits text into the set of lower case words used as index keys
+
+    Args:
+        text: Title or body of a press release
+
+    Returns:
+        Set of unique tokens
+    """
+    if text is None:
+        return set()
+
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+class PressArchive:
+    """
+    Press releases keyed by (symbol, date, title), stored as parquet parts in archive_dir.
+    Each call to save writes only the releases added since the last save, so the archive
+    grows incrementally as new releases are fetched
+    """
+
+    def __init__(self, archive_dir: str = ARCHIVE_DIR):
+        self.archive_dir = archive_dir
+        self.symbols: list[str] = []
+        self.dates: list[str] = []
+        self.titles: list[str] = []
+        self.texts: list[str] = []
+        self.keys: set[tuple[str, str, str]] = set()
+        self.index: dict[str, set[int]] = {}
+        self.latest: dict[str, str] = {}
+        self.saved_count = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def load(self):
+        """Reads every saved part and rebuilds the in memory index"""
+        release_parts = sorted(
+            glob.glob(os.path.join(self.archive_dir, "releases_*.parquet"))
+        )
+        if len(release_parts) == 0:
+            return
+
+        releases = polars.concat([polars.read_parquet(part) for part in release_parts])
+        for symbol, release_date, title, text in releases.iter_rows():
+            self.symbols.append(symbol)
+            self.dates.append(release_date)
+            self.titles.append(title)
+            self.texts.append(text)
+            self.keys.add((symbol, release_date, title))
+            self.update_latest(symbol, release_date)
+
+        postings = polars.concat(
+            [
+                polars.read_parquet(part)
+                for part in sorted(
+                    glob.glob(os.path.join(self.archive_dir, "postings_*.parquet"))
+                )
+            ]
+        )
+        grouped = postings.group_by("token").agg(polars.col("doc_id"))
+        for token, doc_ids in grouped.iter_rows():
+            self.index[token] = set(doc_ids)
+
+        self.saved_count = len(self.symbols)
+
+    def add_releases(self, releases: list[dict]) -> int:
+        """
+        Adds releases in the fmp_press_releases format, skipping any already archived
+
+        Args:
+            releases: List of dictionaries with symbol, date, title and text keys
+
+        Returns:
+            Number of releases added
+        """
+        added = 0
+
+        for release in releases:
+            key = (release["symbol"], release["date"], release["title"])
+            if key in self.keys:
+                continue
+
+            doc_id = len(self.symbols)
+            self.keys.add(key)
+            self.symbols.append(release["symbol"])
+            self.dates.append(release["date"])
+            self.titles.append(release["title"])
+            self.texts.append(release.get("text") or "")
+            self.update_latest(release["symbol"], release["date"])
+
+            for token in tokenize(release["title"]) | tokenize(release.get("text")):
+                self.index.setdefault(token, set()).add(doc_id)
+
+            added = added + 1
+
+        return added
+
+    def save(self):
+        """Writes releases added since the last save as a new parquet part"""
+        if self.saved_count == len(self.symbols):
+            return
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        start = self.saved_count
+        end = len(self.symbols)
+        part_name = f"{start:08d}.parquet"
+
+        polars.DataFrame(
+            {
+                "symbol": self.symbols[start:end],
+                "date": self.dates[start:end],
+                "title": self.titles[start:end],
+                "text": self.texts[start:end],
+            }
+        ).write_parquet(os.path.join(self.archive_dir, f"releases_{part_name}"))
+
+        tokens: list[str] = []
+        doc_ids: list[int] = []
+        for doc_id in range(start, end):
+            for token in tokenize(self.titles[doc_id]) | tokenize(self.texts[doc_id]):
+                tokens.append(token)
+                doc_ids.append(doc_id)
+
+        polars.DataFrame(
+            {"token": tokens, "doc_id": doc_ids},
+            schema={"token": polars.Utf8, "doc_id": polars.UInt32},
+        ).write_parquet(os.path.join(self.archive_dir, f"postings_{part_name}"))
+
+        self.saved_count = end
+
+    def update_latest(self, symbol: str, release_date: str):
+        """
+        Raises the high-water mark for symbol if release_date is newer
+
+        Args:
+            symbol: Ticker symbol
+            release_date: Date string, e.g. 2023-08-24 17:00:00
+        """
+        if release_date > self.latest.get(symbol, ""):
+            self.latest[symbol] = release_date
+
+    def latest_date(self, symbol: str) -> str | None:
+        """
+        Returns the high-water mark for a symbol, the newest archived release date
+
+        Args:
+            symbol: Ticker symbol
+
+        Returns:
+            Date string, e.g. 2023-08-24 17:00:00, or None if nothing is archived
+        """
+        return self.latest.get(symbol)
+
+    def releases(self, symbol: str) -> list[dict]:
+        """
+        Returns every archived release for symbol, newest first, in the fmp_press_releases
+        format
+
+        Args:
+            symbol: Ticker symbol
+
+        Returns:
+            List of dictionaries with symbol, date, title and text keys
+        """
+        releases = [
+            {
+                "symbol": symbol,
+                "date": self.dates[doc_id],
+                "title": self.titles[doc_id],
+                "text": self.texts[doc_id],
+            }
+            for doc_id, doc_symbol in enumerate(self.symbols)
+            if doc_symbol == symbol
+        ]
+        releases.sort(key=lambda release: release["date"], reverse=True)
+        return releases
+
+    def search(
+        self,
+        terms: str | list[str],
+        symbols: list[str] | None = None,
+        start: date | str | None = None,
+        end: date | str | None = None,
+    ) -> polars.DataFrame:
+        """
+        Returns releases containing every word in terms, newest first.  The Symbol, Date
+        and Title columns match the frame from press_utilities.get_frames so the result
+        can be joined straight onto it
+
+        Args:
+            terms: Word or list of words that must all appear in the title or text
+            symbols: Only return releases for these tickers
+            start: Earliest date to include, e.g. 2022-01-01
+            end: Latest date to include
+
+        Returns:
+            DataFrame with Symbol, Date and Title columns
+        """
+        if isinstance(terms, str):
+            terms = terms.split()
+
+        doc_ids: set[int] | None = None
+        for term in terms:
+            for token in tokenize(term):
+                postings = self.index.get(token, set())
+                doc_ids = set(postings) if doc_ids is None else doc_ids & postings
+
+        symbol_set = None if symbols is None else {symbol.upper() for symbol in symbols}
+        start_str = None if start is None else str(start)
+        end_str = None if end is None else f"{end} 99"  # Include the whole end day
+
+        matches = []
+        for doc_id in doc_ids or set():
+            if symbol_set is not None and self.symbols[doc_id] not in symbol_set:
+                continue
+            if start_str is not None and self.dates[doc_id] < start_str:
+                continue
+            if end_str is not None and self.dates[doc_id] > end_str:
+                continue
+            matches.append(doc_id)
+
+        matches.sort(key=lambda doc_id: self.dates[doc_id], reverse=True)
+
+        return polars.DataFrame(
+            {
+                "Symbol": [self.symbols[doc_id] for doc_id in matches],
+                "Date": [self.dates[doc_id] for doc_id in matches],
+                "Title": [self.titles[doc_id] for doc_id in matches],
+            },
+            schema={"Symbol": polars.Utf8, "Date": polars.Utf8, "Title": polars.Utf8},
+        )
+
+
+def fetch_press_release_pages(ticker: str, depth: int, workers: int) -> list[dict]:
+    """
+    Downloads the first depth pages of press releases concurrently.  Used for backfills
+
+    Args:
+        ticker: Symbol for FMP
+        depth: Number of pages to request
+        workers: Maximum number of pages requested at once
+
+    Returns:
+        Releases from every page up to the first empty one, newest first
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = list(
+            executor.map(lambda page: fmp_press_releases(ticker, page), range(depth))
+        )
+
+    releases: list[dict] = []
+    for page_releases in pages:
+        if check_for_error(page_releases) or len(page_releases) == 0:
+            break
+
+        releases.extend(page_releases)
+
+    return releases
+
+
+def fetch_new_press_releases(
+    ticker: str, high_water_mark: str, depth: int
+) -> list[dict]:
+    """
+    Downloads pages one at a time until a release older than high_water_mark is seen,
+    so routine runs usually cost a single request.  Releases stamped with the same time
+    as high_water_mark are kept, as several releases can share a timestamp, and the
+    archive drops the ones it already holds
+
+    Args:
+        ticker: Symbol for FMP
+        high_water_mark: Date of the newest archived release, e.g. 2023-08-24 17:00:00
+        depth: Maximum number of pages to request
+
+    Returns:
+        Releases at or after high_water_mark, newest first
+    """
+    releases: list[dict] = []
+
+    for page in range(depth):
+        page_releases = fmp_press_releases(ticker, page)
+        if check_for_error(page_releases) or len(page_releases) == 0:
+            break
+
+        new_releases = [
+            release for release in page_releases if release["date"] >= high_water_mark
+        ]
+        releases.extend(new_releases)
+
+        if any(release["date"] < high_water_mark for release in page_releases):
+            break
+
+    return releases
+
+
+def download_press_releases(
+    ticker: str,
+    archive: PressArchive | None = None,
+    depth: int = PAGE_DEPTH,
+    workers: int = PAGE_WORKERS,
+    backfill: bool = False,
+) -> list[dict]:
+    """
+    Downloads press releases for ticker without adding them to the archive.  If the
+    archive already holds releases for the ticker, only pages down to its high-water
+    mark are requested, otherwise (or when backfill is True) the first depth pages are
+    pulled in parallel
+
+    Args:
+        ticker: Symbol for FMP
+        archive: Archive holding the high-water mark, or None to always fetch depth pages
+        depth: Maximum number of pages to request
+        workers: Maximum number of pages requested at once during a backfill
+        backfill: Ignore the high-water mark and pull depth pages of history
+
+    Returns:
+        The downloaded releases, newest first
+    """
+    high_water_mark = None if archive is None else archive.latest_date(ticker)
+
+    if backfill or high_water_mark is None:
+        return fetch_press_release_pages(ticker, depth, workers)
+
+    return fetch_new_press_releases(ticker, high_water_mark, depth)
+
+
+def fetch_press_releases(
+    ticker: str,
+    archive: PressArchive | None = None,
+    depth: int = PAGE_DEPTH,
+    workers: int = PAGE_WORKERS,
+    backfill: bool = False,
+) -> list[dict]:
+    """
+    Downloads press releases for ticker, see download_press_releases, then indexes and
+    saves any new ones into the archive
+
+    Args:
+        ticker: Symbol for FMP
+        archive: Archive to add the releases to, or None to only download
+        depth: Maximum number of pages to request
+        workers: Maximum number of pages requested at once during a backfill
+        backfill: Ignore the high-water mark and pull depth pages of history
+
+    Returns:
+        The downloaded releases, newest first
+    """
+    releases = download_press_releases(ticker, archive, depth, workers, backfill)
+
+    if archive is not None:
+        archive.add_releases(releases)
+        archive.save()
+
+    return releases
+
+
+def archive_press_releases(
+    tickers: list[str], archive: PressArchive, depth: int = PAGE_DEPTH
+) -> int:
+    """
+    Brings the archive up to date for each ticker, backfilling tickers it has not seen
+
+    Args:
+        tickers: List of symbols for FMP
+        archive: Archive to add the releases to
+        depth: Maximum number of pages to request per ticker
+
+    Returns:
+        Number of new releases archived
+    """
+    added = 0
+    for ticker in tickers:
+        added = added + archive.add_releases(
+            download_press_releases(ticker, archive, depth)
+        )
+        archive.save()
+
+    return added
@@ -6,9 +6,20 @@ import sys
 import xlsxwriter
 
 from fmp import fmp_check_symbols
-from press_utilities import get_diff_between_releases, get_frames, write_press_comments
+from press_archive import PAGE_DEPTH, PressArchive
+from press_utilities import (
+    get_diff_between_releases,
+    get_frames,
+    write_press_comments,
+    write_press_texts,
+)
 from workbook_utilities import close_workbook, set_global_font
 
+# "sheet" links each release to its text on a separate sheet, "comments" attaches the texts
+# as Excel comments, which is only used while there are COMMENT_LIMIT releases or fewer
+TEXT_OUTPUT = "sheet"
+COMMENT_LIMIT = 50
+
 TICKER = input("Ticker: ")
 
 if TICKER not in fmp_check_symbols([TICKER]):
@@ -17,7 +28,7 @@ if TICKER not in fmp_check_symbols([TICKER]):
 
 print(f"\n[Processing] Symbol {TICKER} checked!")
 
-frames = get_frames(TICKER)
+frames = get_frames(TICKER, PressArchive(), PAGE_DEPTH)
 
 if len(frames) == 1:
     print(f"\n[Error] No press releases found for {TICKER}")
@@ -81,6 +92,11 @@ press_frame.write_excel(
 
 press_frame = press_frame.drop("Symbol")
 press_frame = press_frame.drop("Title")
-write_press_comments(worksheet, comment_frame, "D", 5)
+if TEXT_OUTPUT == "comments" and num_rows <= COMMENT_LIMIT:
+    write_press_comments(worksheet, comment_frame, "D", 5)
+else:
+    header_format = WORKBOOK.add_format({"bold": True, "border": 1})
+    worksheet.write("L4", "Text", header_format)
+    worksheet.set_column("L:L", 100)
+    write_press_texts(WORKBOOK, comment_frame, worksheet, "L", 5)
 close_workbook(WORKBOOK, WORKBOOK_NAME)
-
@@ -1,12 +1,16 @@
 """Utilities to aid press_runner.py"""
 
-
 from datetime import date, datetime, timedelta
 
 import polars
+from xlsxwriter import Workbook
 from xlsxwriter.worksheet import Worksheet
 
-from fmp import fmp_historical_prices, fmp_press_releases
+from fmp import fmp_historical_prices
+from press_archive import PressArchive, fetch_press_releases
+
+EXCEL_CELL_LIMIT = 32767  # Maximum characters Excel holds in a cell
+PREVIEW_LENGTH = 120  # Characters of each release shown next to its row
 
 
 def get_diff_between_releases(press_frame: polars.DataFrame) -> int:
@@ -46,6 +50,9 @@ def write_press_comments(
     row_num: int,
 ):
     """
+    Attaches each text as an Excel comment.  Comments are slow to write and bloat the
+    workbook, so only use for small outputs, see write_press_texts
+
     Args:
         worksheet: The worksheet to be written to
         comment_frame: The single column frame containing the comments
@@ -70,7 +77,51 @@ def write_press_comments(
         row_num = row_num + 1
 
 
-def get_frames(ticker: str) -> list[polars.DataFrame]:
+def write_press_texts(
+    workbook: Workbook,
+    comment_frame: polars.DataFrame,
+    worksheet: Worksheet,
+    col_letter: str,
+    row_num: int,
+    sheet_name: str = "Press Texts",
+    preview_length: int = PREVIEW_LENGTH,
+):
+    """
+    A lighter alternative to write_press_comments.  The full texts are written to their own
+    sheet and each row gets a truncated preview that links to its text
+
+    Args:
+        workbook: Workbook to add the texts sheet to
+        comment_frame: The single column frame containing the texts
+        worksheet: The worksheet holding the press frame
+        col_letter: Column letter to write the previews in
+        row_num: Row number of the first release
+        sheet_name: Name of the sheet to hold the full texts
+        preview_length: Number of characters shown in the preview
+    """
+    text_sheet = workbook.add_worksheet(sheet_name)
+    text_sheet.set_column("A:A", 240, workbook.add_format({"text_wrap": True}))
+    link_format = workbook.add_format({"font_color": "blue", "underline": 1})
+
+    for count, text in enumerate(comment_frame.to_series().to_list()):
+        text = text or ""
+        text_sheet.write_string(count, 0, text[:EXCEL_CELL_LIMIT])
+
+        preview = text[:preview_length]
+        if len(text) > preview_length:
+            preview = preview.rstrip() + "..."
+
+        worksheet.write_url(
+            f"{col_letter}{row_num + count}",
+            f"internal:'{sheet_name}'!A{count + 1}",
+            link_format,
+            preview,
+        )
+
+
+def get_frames(
+    ticker: str, archive: PressArchive | None = None, depth: int = 1
+) -> list[polars.DataFrame]:
     """
     Returns List with 2 elements.
     0 = Completed Press frame, with closing prices and percentage changes
@@ -78,12 +129,19 @@ def get_frames(ticker: str) -> list[polars.DataFrame]:
 
     Args:
         ticker: Symbol for FMP
+        archive: If passed, only releases newer than the archive's high-water mark are
+                 downloaded and the frames are built from every archived release
+        depth: Maximum number of pages of releases to request
 
     Returns:
         2 Element list with the frames
     """
 
-    press_frame = polars.DataFrame(fmp_press_releases(ticker))
+    releases = fetch_press_releases(ticker, archive, depth)
+    if archive is not None:
+        releases = archive.releases(ticker)
+
+    press_frame = polars.DataFrame(releases)
 
     if press_frame.shape[0] == 0:
         return [press_frame]
@@ -91,12 +149,7 @@ def get_frames(ticker: str) -> list[polars.DataFrame]:
     comment_frame = polars.DataFrame(press_frame.get_column("text"))
     press_frame = press_frame.drop("text")
 
-    # Generate Test Data
-    # press_frame.write_csv("Test Data\\NVDA_Press.csv")
-    with open("Test Data\\Price_Dict.txt", "w", encoding="utf-8") as dict_file:
-        for key, value in get_price_dict(ticker).items():
-            dict_file.write(f"{key}: {value}\n")
-
+    # Test data is captured by running with fmp.FIXTURE_MODE = "record"
     press_frame = add_closing_prices(ticker, press_frame)
     press_frame = add_percentage_cols(press_frame)
     press_frame = press_frame.rename(
@@ -290,4 +343,3 @@ def get_price_dict(ticker: str) -> dict[str, str]:
         price_dict[price_data["date"]] = price_data["close"]
 
     return price_dict
-
@@ -1,98 +1,59 @@
 """Creates a spreadhsheet with various ratios and a company description for each ticker"""
+
 # pylint: disable=C0103
 
 import sys
 
-from fmp import fmp_company_profile
-from ratios_utilities import add_text, get_ratios_frame, get_tickers
+import polars
+
+from ratios_utilities import (
+    add_text,
+    compile_ratios,
+    get_panel_frame,
+    get_profile_frame,
+    get_ratios_frame,
+    get_text_format,
+    get_tickers,
+    pivot_panel,
+    prefetch_ratio_data,
+    safe_divide,
+    write_panel,
+)
 from workbook_utilities import close_workbook, create_workbook
 
 RATIOS = [
+    ["Date", "ratios.date", False],
+    ["Current Ratio", "ratios.currentRatio", True],
+    ["Quick Ratio", "ratios.quickRatio", True],
+    ["ROA", "ratios.returnOnAssets", True],
+    ["ROE", "ratios.returnOnEquity", True],
+    ["ROIC", "metrics.roic", True],
+    ["Interest Coverage", "metrics.interestCoverage", True],
+    ["Price to Sales", "ratios.priceToSalesRatio", True],
+    ["BVPS", "metrics.bookValuePerShare", True],
+    ["Debt to Equity", "metrics.debtToEquity", True],
+    ["Debt to Assets", "metrics.debtToAssets", True],
+    ["Free Cashflow Yield", "metrics.freeCashFlowYield", True],
+    ["Asset Turnover", "ratios.assetTurnover", True],
     [
-        "date",
-        "Date",
-        "ratios",
+        "Working Capital (M)",
+        (polars.col("metrics.workingCapital") / 1_000_000).cast(polars.Int64),
         False,
     ],
     [
-        "currentRatio",
-        "Current Ratio",
-        "ratios",
-        True,
-    ],
-    [
-        "quickRatio",
-        "Quick Ratio",
-        "ratios",
-        True,
-    ],
-    [
-        "returnOnAssets",
-        "ROA",
-        "ratios",
-        True,
-    ],
-    [
-        "returnOnEquity",
-        "ROE",
-        "ratios",
-        True,
-    ],
-    [
-        "roic",
-        "ROIC",
-        "metrics",
-        True,
-    ],
-    [
-        "interestCoverage",
-        "Interest Coverage",
-        "metrics",
-        True,
-    ],
-    [
-        "priceToSalesRatio",
-        "Price to Sales",
-        "ratios",
-        True,
-    ],
-    [
-        "bookValuePerShare",
-        "BVPS",
-        "metrics",
-        True,
-    ],
-    [
-        "debtToEquity",
-        "Debt to Equity",
-        "metrics",
-        True,
-    ],
-    [
-        "debtToAssets",
-        "Debt to Assets",
-        "metrics",
-        True,
-    ],
-    [
-        "freeCashFlowYield",
-        "Free Cashflow Yield",
-        "metrics",
-        True,
-    ],
-    [
-        "assetTurnover",
-        "Free Cashflow Yield",
-        "ratios",
-        True,
-    ],
-    [
-        "workingCapital",
-        "Working Capital (M)",
-        "metrics",
+        "Working Capital to Assets",
+        safe_divide(
+            polars.col("metrics.workingCapital"), polars.col("balance.totalAssets")
+        ),
         True,
     ],
 ]
+PLAN = compile_ratios(RATIOS)
+
+# Above this many tickers every ratio is written into one panel table rather than one
+# table per ticker.  PANEL_PARQUET optionally exports the long panel frame as well
+PANEL_TICKERS = 10
+PANEL_PARQUET = None  # e.g. "Workbooks/Ratios.parquet"
 
 
 WORKBOOK_NAME = "Workbooks/Ratios.xlsx"
@@ -105,62 +66,82 @@ if len(TICKERS) < 1:
     print("[ERROR] No matching tickers found, quitting")
     sys.exit(0)
 
-ratios_column = 1
-ratios_row = 1
-
-for ticker in TICKERS:
-    ratio_frame = get_ratios_frame(ticker, RATIOS)
-    profile = fmp_company_profile(ticker)
-
-    ratio_frame.write_excel(
-        workbook=WORKBOOK,
-        worksheet=WORKSHEET_NAME,
-        position=[ratios_row, ratios_column],  # type: ignore
-        table_style="TableStyleDark3",
-        column_widths={
-            ticker: 160,
-            "1": 80,
-            "2": 80,
-            "3": 80,
-            "4": 80,
-            "5": 80,
-        },
-        column_formats={
-            ticker: {"bold": True},  # type: ignore
-            "1": {"bold": True},  # type: ignore
-            "2": {"bold": True},  # type: ignore
-            "3": {"bold": True},  # type: ignore
-            "4": {"bold": True},  # type: ignore
-            "5": {"bold": True},  # type: ignore
-        },
-        header_format={"bold": True},
-    )
+print("[Downloading] Gathering Data")
+DATA = prefetch_ratio_data(TICKERS, PLAN["endpoints"] + ["profile"])
 
-    bottom_row = str(ratios_row + ratio_frame.shape[0] - 1)
-    cell_range = f"I{str(ratios_row + 1)}:AD{bottom_row}"
-    add_text(WORKBOOK, worksheet, cell_range, profile["description"])
+if len(TICKERS) > PANEL_TICKERS:
+    panel_frame = get_panel_frame(TICKERS, PLAN, DATA)
+    if PANEL_PARQUET is not None:
+        panel_frame.write_parquet(PANEL_PARQUET)
 
-    bottom_row = str(ratios_row + ratio_frame.shape[0] + 1)
-    cell_range = f"I{bottom_row}:P{bottom_row}"
-    add_text(WORKBOOK, worksheet, cell_range, profile["website"])
-
-    cell_range = f"R{bottom_row}:U{bottom_row}"
-    add_text(WORKBOOK, worksheet, cell_range, profile["exchangeShortName"])
-
-    cell_range = f"W{bottom_row}:Y{bottom_row}"
-    add_text(WORKBOOK, worksheet, cell_range, profile["industry"])
-
-    cell_range = f"AA{bottom_row}:AD{bottom_row}"
-    add_text(
+    write_panel(
         WORKBOOK,
-        worksheet,
-        cell_range,
-        f"No. Full Time Employees: {int(profile['fullTimeEmployees']):,}",
+        WORKSHEET_NAME,
+        pivot_panel(panel_frame),
+        get_profile_frame(TICKERS, DATA),
     )
-
-    ratios_row = ratios_row + ratio_frame.shape[0] + 2
-    print(f"[Processing] {ticker} Completed!")
-
+    print(f"[Processing] {len(TICKERS)} tickers written as a panel")
+else:
+    text_format = get_text_format(WORKBOOK)
+    ratios_column = 1
+    ratios_row = 1
+
+    # Writing stays sequential so row positions are deterministic
+    for ticker in TICKERS:
+        ratio_frame = get_ratios_frame(ticker, PLAN, DATA[ticker])
+        profile = DATA[ticker]["profile"]
+
+        ratio_frame.write_excel(
+            workbook=WORKBOOK,
+            worksheet=WORKSHEET_NAME,
+            position=[ratios_row, ratios_column],  # type: ignore
+            table_style="TableStyleDark3",
+            column_widths={
+                ticker: 160,
+                "1": 80,
+                "2": 80,
+                "3": 80,
+                "4": 80,
+                "5": 80,
+            },
+            column_formats={
+                ticker: {"bold": True},  # type: ignore
+                "1": {"bold": True},  # type: ignore
+                "2": {"bold": True},  # type: ignore
+                "3": {"bold": True},  # type: ignore
+                "4": {"bold": True},  # type: ignore
+                "5": {"bold": True},  # type: ignore
+            },
+            header_format={"bold": True},
+        )
+
+        bottom_row = str(ratios_row + ratio_frame.shape[0] - 1)
+        cell_range = f"I{str(ratios_row + 1)}:AD{bottom_row}"
+        add_text(WORKBOOK, worksheet, cell_range, profile["description"], text_format)
+
+        bottom_row = str(ratios_row + ratio_frame.shape[0] + 1)
+        cell_range = f"I{bottom_row}:P{bottom_row}"
+        add_text(WORKBOOK, worksheet, cell_range, profile["website"], text_format)
+
+        cell_range = f"R{bottom_row}:U{bottom_row}"
+        add_text(
+            WORKBOOK, worksheet, cell_range, profile["exchangeShortName"], text_format
+        )
+
+        cell_range = f"W{bottom_row}:Y{bottom_row}"
+        add_text(WORKBOOK, worksheet, cell_range, profile["industry"], text_format)
+
+        cell_range = f"AA{bottom_row}:AD{bottom_row}"
+        add_text(
+            WORKBOOK,
+            worksheet,
+            cell_range,
+            f"No. Full Time Employees: {int(profile['fullTimeEmployees']):,}",
+            text_format,
+        )
+
+        ratios_row = ratios_row + ratio_frame.shape[0] + 2
+        print(f"[Processing] {ticker} Completed!")
 
 print("")
 close_workbook(WORKBOOK, WORKBOOK_NAME)
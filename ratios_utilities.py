@@ -1,12 +1,28 @@
 """Utility functions for ratio_runner.py"""
 
+import concurrent.futures
 
 import polars
 from xlsxwriter import Workbook
+from xlsxwriter.format import Format
 from xlsxwriter.worksheet import Worksheet
 
-from fmp import (fmp_balance_sheet_annual, fmp_check_symbols, fmp_key_metrics,
-                 fmp_ratios, get_data_no_title)
+from fmp import (
+    fmp_balance_sheet_annual,
+    fmp_check_symbols,
+    fmp_company_profile,
+    fmp_key_metrics,
+    fmp_ratios,
+)
+
+# Endpoints a ratio spec can draw on, keyed by the name used in its "endpoint.key" columns
+ENDPOINTS = {
+    "ratios": fmp_ratios,
+    "metrics": fmp_key_metrics,
+    "balance": fmp_balance_sheet_annual,
+    "profile": fmp_company_profile,
+}
+PREFETCH_WORKERS = 8  # Maximum requests in flight during prefetch_ratio_data
 
 
 def get_tickers() -> list[str]:
@@ -39,7 +55,13 @@ def get_tickers() -> list[str]:
     return output_list
 
 
-def add_text(WORKBOOK: Workbook, worksheet: Worksheet, cell_range: str, text: str):
+def add_text(
+    WORKBOOK: Workbook,
+    worksheet: Worksheet,
+    cell_range: str,
+    text: str,
+    heading_format: Format | None = None,
+):
     """
     Adds text with black background and white text
 
@@ -48,8 +70,28 @@ def add_text(WORKBOOK: Workbook, worksheet: Worksheet, cell_range: str, text: st
         worksheet: The current worksheet
         cell_Range: The cell range to be merged. e.g K68:L68
         text: The text to write
+        heading_format: Format from get_text_format, created here if not passed so reuse
+                        one when writing many ranges
+    """
+    if heading_format is None:
+        heading_format = get_text_format(WORKBOOK)
+
+    worksheet.merge_range(
+        cell_range, text, heading_format
+    )  # pyright: ignore[reportGeneralTypeIssues]
+
+
+def get_text_format(WORKBOOK: Workbook) -> Format:
     """
-    heading_format = WORKBOOK.add_format(
+    Returns the black background, white text format used by add_text
+
+    Args:
+        WORKBOOK: Workbook object to contain the format
+
+    Returns:
+        Format
+    """
+    return WORKBOOK.add_format(
         {
             "bold": 1,
             "fg_color": "black",
@@ -62,96 +104,309 @@ def add_text(WORKBOOK: Workbook, worksheet: Worksheet, cell_range: str, text: st
         }
     )
 
-    worksheet.merge_range(
-        cell_range, text, heading_format
-    )  # pyright: ignore[reportGeneralTypeIssues]
 
+def prefetch_ratio_data(
+    tickers: list[str],
+    endpoints: list[str] | None = None,
+    workers: int = PREFETCH_WORKERS,
+) -> dict[str, dict]:
+    """
+    Requests every endpoint for every ticker concurrently, so the runner's layout loop never
+    waits on the network.  A request that fails is treated as an empty response, so one bad
+    symbol doesn't stop the others
+
+    Args:
+        tickers: Symbols for fmp
+        endpoints: Keys of ENDPOINTS to request, defaults to all of them
+        workers: Maximum number of requests in flight
+
+    Returns:
+        dict{ticker: dict{endpoint: json}}
+    """
+    if endpoints is None:
+        endpoints = list(ENDPOINTS)
+
+    data: dict[str, dict] = {ticker: {} for ticker in tickers}
 
-def get_ratios_frame(ticker: str, ratios: list) -> polars.DataFrame:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+
+        for ticker in tickers:
+            for endpoint in endpoints:
+                future = executor.submit(ENDPOINTS[endpoint], ticker)
+                futures[future] = (ticker, endpoint)
+
+        for future in concurrent.futures.as_completed(futures):
+            ticker, endpoint = futures[future]
+            try:
+                data[ticker][endpoint] = future.result()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                print(f"[ERROR] {ticker} {endpoint}: {error}")
+                data[ticker][endpoint] = []
+
+    return data
+
+
+def safe_divide(numerator: polars.Expr, denominator: polars.Expr) -> polars.Expr:
     """
-    Obtain a polars DataFrame with the passed in ratios
+    Divides two columns, giving 0 where either side is 0 or missing
 
-    Data should be passed in in the following format:
+    Args:
+        numerator: Column expression to divide
+        denominator: Column expression to divide by
+
+    Returns:
+        Column expression
+    """
+    numerator = numerator.fill_null(0)
+    denominator = denominator.fill_null(0)
+
+    return (
+        polars.when((numerator == 0) | (denominator == 0))
+        .then(0.0)
+        .otherwise(numerator / denominator)
+    )
+
+
+def compile_ratios(ratios: list) -> dict:
+    """
+    Compiles a ratio spec into an execution plan: the endpoints to request, the keys to
+    extract from each and one column expression per ratio
+
+    The spec should be passed in in the following format, with every column referenced as
+    "endpoint.key" where endpoint is a key of ENDPOINTS:
     [
         [
-            "dictionary key",
             "Title",
-            "ratios or metrics, whichever one it's in",
+            "endpoint.key" or a polars expression over "endpoint.key" columns,
             Whether to round to 2dp or not,
         ],
         ...
     ]
 
-
     Args:
-        ticker: Symbol for fmp
         ratios: A list of lists
 
+    Returns:
+        dict{"endpoints": [endpoint], "keys": {endpoint: [key]}, "exprs": [Expr]}
+    """
+    keys: dict[str, list[str]] = {}
+    exprs = []
+
+    for title, source, do_round in ratios:
+        expr = polars.col(source) if isinstance(source, str) else source
+
+        for column in expr.meta.root_names():
+            endpoint, key = column.split(".", 1)
+            if endpoint not in ENDPOINTS:
+                raise ValueError(f"Unknown endpoint in ratio spec: {column}")
+
+            endpoint_keys = keys.setdefault(endpoint, [])
+            if key not in endpoint_keys:
+                endpoint_keys.append(key)
+
+        if do_round:
+            expr = expr.round(2)
+
+        exprs.append(expr.alias(title))
+
+    return {"endpoints": list(keys), "keys": keys, "exprs": exprs}
+
+
+def get_plan_frame(plan: dict, data: dict) -> polars.DataFrame:
+    """
+    Evaluates a compiled plan against one ticker's downloaded data.  Endpoints are aligned
+    by position, newest period first, with shorter endpoints padded with nulls
+
+    Args:
+        plan: Output of compile_ratios
+        data: dict{endpoint: json} holding every endpoint in the plan
 
     Returns:
-        DataFrame
+        DataFrame with one column per ratio and one row per period
     """
-    ratios_json = fmp_ratios(ticker)
-    metrics_json = fmp_key_metrics(ticker)
+    num_rows = max(len(data[endpoint]) for endpoint in plan["endpoints"])
+    columns: dict[str, list] = {}
 
-    ratio_dict = {}
-    for ratio in ratios:
-        if ratio[2] == "ratios":
-            ratio_dict[ratio[1]] = get_data_no_title(ratios_json, ratio[0], ratio[3])
-        else:
-            ratio_dict[ratio[1]] = get_data_no_title(metrics_json, ratio[0], ratio[3])
+    for endpoint, keys in plan["keys"].items():
+        json_data = data[endpoint]
+        padding = [None] * (num_rows - len(json_data))
 
-    working_cap = ratio_dict["Working Capital (M)"]
+        for key in keys:
+            values = [json_object.get(key) for json_object in json_data]
+            columns[f"{endpoint}.{key}"] = values + padding
 
-    working_cap_m = []
-    for num in working_cap:
-        working_cap_m.append(str(num)[:-6])
+    return polars.DataFrame(columns, strict=False).select(plan["exprs"])
 
-    ratio_dict["Working Capital (M)"] = working_cap_m
 
-    ratio_dict["Working Capital to Assets"] = get_working_cap_to_assets(
-        metrics_json, fmp_balance_sheet_annual(ticker)
-    )
+def get_ratios_frame(
+    ticker: str, plan: dict, data: dict | None = None
+) -> polars.DataFrame:
+    """
+    Obtain a polars DataFrame with the ratios in the compiled plan, one row per ratio and
+    one column per period, oldest first
 
-    ratio_frame = polars.DataFrame(ratio_dict).reverse().transpose(include_header=True)
+    Args:
+        ticker: Symbol for fmp
+        plan: Output of compile_ratios
+        data: The ticker's entry from prefetch_ratio_data, downloaded here if not passed
+
+    Returns:
+        DataFrame
+    """
+    if data is None:
+        data = prefetch_ratio_data([ticker], plan["endpoints"])[ticker]
+
+    ratio_frame = get_plan_frame(plan, data).reverse().transpose(include_header=True)
     ratio_frame = ratio_frame.rename(
-        {
-            "column": ticker,
-            "column_0": "1",
-            "column_1": "2",
-            "column_2": "3",
-            "column_3": "4",
-            "column_4": "5",
-        }
+        {"column": ticker}
+        | {f"column_{count}": str(count + 1) for count in range(ratio_frame.width - 1)}
     )
 
     return ratio_frame
 
 
-def get_working_cap_to_assets(ratios_json, balance_sheet_json):
+def get_panel_frame(tickers: list[str], plan: dict, data: dict) -> polars.DataFrame:
+    """
+    Returns every ticker's ratios as one long frame.  The plan must include a "Date" ratio,
+    the fiscal year of which becomes the period.  Non numeric ratios other than Date are
+    left out
+
+    Args:
+        tickers: Symbols for fmp, in output order
+        plan: Output of compile_ratios
+        data: Output of prefetch_ratio_data
+
+    Returns:
+        DataFrame with ticker, metric, period, date and value columns
+    """
+    frames = []
+
+    for ticker in tickers:
+        frame = get_plan_frame(plan, data[ticker])
+        if "Date" not in frame.columns:
+            raise ValueError("Panel output needs a Date ratio in the spec")
+
+        metrics = [
+            column
+            for column, dtype in frame.schema.items()
+            if dtype.is_numeric() and column != "Date"
+        ]
+        frames.append(
+            frame.with_columns(polars.lit(ticker).alias("ticker"))
+            .unpivot(
+                index=["ticker", "Date"],
+                on=metrics,
+                variable_name="metric",
+                value_name="value",
+            )
+            .select(
+                polars.col("ticker"),
+                polars.col("metric"),
+                polars.col("Date").cast(polars.Utf8).str.slice(0, 4).alias("period"),
+                polars.col("Date").cast(polars.Utf8).alias("date"),
+                polars.col("value").cast(polars.Float64),
+            )
+        )
+
+    return polars.concat(frames)
+
+
+def pivot_panel(panel_frame: polars.DataFrame) -> polars.DataFrame:
     """
-    Calculates and returns working capital to assets
+    Pivots the long panel into one row per ticker and metric, one column per period
 
     Args:
-        ratios_json: The ratio json from fmp for workingCapital
+        panel_frame: Output of get_panel_frame
 
     Returns:
-        List of working capital to assets
+        DataFrame with Ticker, Metric and period columns, oldest period first
     """
-    working_cap_list = get_data_no_title(ratios_json, "workingCapital", False)
-    total_assets = get_data_no_title(balance_sheet_json, "totalAssets", False)
+    periods = sorted(panel_frame.get_column("period").drop_nulls().unique().to_list())
+
+    return (
+        panel_frame.pivot(
+            on="period",
+            index=["ticker", "metric"],
+            values="value",
+            aggregate_function="first",
+        )
+        .select(["ticker", "metric"] + periods)
+        .rename({"ticker": "Ticker", "metric": "Metric"})
+    )
 
-    if len(total_assets) < len(working_cap_list):
-        total_assets.extend([0] * (len(working_cap_list) - len(total_assets)))
 
-    if len(working_cap_list) < len(total_assets):
-        working_cap_list.extend([0] * (len(total_assets) - len(total_assets)))
+def get_profile_frame(tickers: list[str], data: dict) -> polars.DataFrame:
+    """
+    Returns one row of company profile information per ticker
 
-    data = []
-    for count, entry in enumerate(working_cap_list):
-        if entry == 0 or total_assets[count] == 0:
-            data.append(0)
-        else:
-            data.append(round(entry / total_assets[count], 2))
+    Args:
+        tickers: Symbols for fmp, in output order
+        data: Output of prefetch_ratio_data including the profile endpoint
 
-    return data
+    Returns:
+        DataFrame
+    """
+    rows = []
+    for ticker in tickers:
+        profile = data[ticker]["profile"]
+        rows.append(
+            {
+                "Ticker": ticker,
+                "Exchange": profile["exchangeShortName"],
+                "Industry": profile["industry"],
+                "Employees": int(profile["fullTimeEmployees"] or 0),
+                "Website": profile["website"],
+                "Description": profile["description"],
+            }
+        )
+
+    return polars.DataFrame(rows)
+
+
+def write_panel(
+    WORKBOOK: Workbook,
+    worksheet_name: str,
+    wide_frame: polars.DataFrame,
+    profile_frame: polars.DataFrame,
+):
+    """
+    Writes the pivoted panel as a single table with the profiles in a second table below,
+    so the formats are shared by every ticker
+
+    Args:
+        WORKBOOK: Workbook object to contain the data
+        worksheet_name: Name of the worksheet to write to
+        wide_frame: Output of pivot_panel
+        profile_frame: Output of get_profile_frame
+    """
+    periods = wide_frame.columns[2:]
+
+    wide_frame.write_excel(
+        workbook=WORKBOOK,
+        worksheet=worksheet_name,
+        position="B2",
+        table_style="TableStyleDark3",
+        column_widths={"Ticker": 80, "Metric": 160}
+        | {period: 80 for period in periods},
+        column_formats={"Ticker": {"bold": True}, "Metric": {"bold": True}}  # type: ignore
+        | {period: {"num_format": "#,##0.00"} for period in periods},  # type: ignore
+        header_format={"bold": True},
+    )
+
+    profile_frame.write_excel(
+        workbook=WORKBOOK,
+        worksheet=worksheet_name,
+        position=(wide_frame.shape[0] + 4, 1),
+        table_style="TableStyleDark3",
+        column_widths={
+            "Ticker": 80,
+            "Exchange": 80,
+            "Industry": 240,
+            "Employees": 100,
+            "Website": 240,
+            "Description": 800,
+        },
+        column_formats={"Employees": {"num_format": "#,##0"}},  # type: ignore
+        header_format={"bold": True},
+    )
@@ -0,0 +1,22 @@
+"""Runs the refresh service the xlwings entry points fetch their data from"""
+
+import xw_utilities
+from refresh_utilities import REFRESHES, RefreshService, create_server
+
+SCHEDULE_INTERVAL = 60  # Seconds between checks for data about to go stale
+
+service = RefreshService(REFRESHES)
+server = create_server(service, xw_utilities.REFRESH_HOST, xw_utilities.REFRESH_PORT)
+
+service.start_schedule(SCHEDULE_INTERVAL)
+print(
+    f"[Serving] Refreshes on http://{xw_utilities.REFRESH_HOST}:{xw_utilities.REFRESH_PORT}"
+)
+
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    print("[Stopping] Refresh service")
+finally:
+    service.stop()
+    server.server_close()
@@ -0,0 +1,170 @@
+"""Long lived service keeping the data behind the xlwings refreshes warm"""
+
+import concurrent.futures
+import json
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import commodities_xw
+import constituent_xw
+import consumer_spending_xw
+import fetch_utilities
+import sector_xw
+import state_permits_xw
+
+# Refresh name: (function producing the data, seconds the data is served before a refresh)
+REFRESHES: dict[str, tuple[Callable[[], Any], float]] = {
+    "sector": (sector_xw.get_sector_rows, 300),
+    "constituents": (constituent_xw.get_constituents, 300),
+    "commodities": (commodities_xw.get_commodity_blocks, 300),
+    "permits": (state_permits_xw.get_permits_data, 3600),
+    "spending": (consumer_spending_xw.get_spending_data, 3600),
+}
+
+
+class RefreshService:
+    """
+    Serves the data for each refresh from memory, producing it again once it is older than
+    the refresh's TTL.  Clients asking for the same refresh at once share a single refresh,
+    and a scheduler can refresh everything ahead of the clients so they rarely wait
+    """
+
+    def __init__(self, refreshes: dict[str, tuple[Callable[[], Any], float]]):
+        self.refreshes = refreshes
+        self.cache: dict[str, dict] = {}
+        self.locks = {name: threading.Lock() for name in refreshes}
+        self.stop_event = threading.Event()
+
+    def get(self, name: str, ahead: float = 0) -> dict:
+        """
+        Returns the data for a refresh, refreshing it first if missing or stale
+
+        Args:
+            name: Name of the refresh, e.g. sector
+            ahead: Also refresh if the data will be stale within this many seconds
+
+        Returns:
+            Dictionary of data and updated, the time the data was produced
+        """
+        ttl = self.refreshes[name][1]
+
+        with self.locks[name]:
+            entry = self.cache.get(name)
+            if entry is None or time.time() - entry["updated"] + ahead >= ttl:
+                entry = self.refresh(name)
+
+        return entry
+
+    def refresh(self, name: str) -> dict:
+        """
+        Produces the data for a refresh and caches it
+
+        Args:
+            name: Name of the refresh, e.g. sector
+
+        Returns:
+            Dictionary of data and updated, the time the data was produced
+        """
+        entry = {"data": self.refreshes[name][0](), "updated": time.time()}
+        self.cache[name] = entry
+        print(f"[Refreshed] {name}")
+
+        return entry
+
+    def refresh_all(self, ahead: float = 0):
+        """
+        Refreshes every stale refresh at once, a failed refresh is retried next time
+
+        Args:
+            ahead: Also refresh data that will be stale within this many seconds
+        """
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            futures = {
+                executor.submit(self.get, name, ahead): name for name in self.refreshes
+            }
+
+            for future in concurrent.futures.as_completed(futures):
+                if future.exception() is not None:
+                    print(f"[ERROR] {futures[future]}: {future.exception()}")
+
+    def start_schedule(self, interval: float) -> threading.Thread:
+        """
+        Refreshes everything now and then every interval seconds on a background thread,
+        until stop is called.  Data that would go stale before the next run is refreshed
+        early, so clients are served from memory
+
+        Args:
+            interval: Seconds between scheduled refreshes
+
+        Returns:
+            The scheduler thread
+        """
+
+        def schedule():
+            while not self.stop_event.is_set():
+                self.refresh_all(interval)
+                self.stop_event.wait(interval)
+
+        thread = threading.Thread(target=schedule, daemon=True)
+        thread.start()
+
+        return thread
+
+    def stop(self):
+        """Stops the scheduler"""
+        self.stop_event.set()
+
+
+def create_server(service: RefreshService, host: str, port: int) -> ThreadingHTTPServer:
+    """
+    Creates a HTTP server answering GET /<refresh name> with the refresh's data as JSON,
+    as read by xw_utilities.get_refreshed.  GET /metrics answers with the fetch metrics of
+    each host, see fetch_utilities.get_metrics
+
+    Args:
+        service: Service holding the data
+        host: Address to listen on, keep to 127.0.0.1 as there is no authentication
+        port: Port to listen on, 0 for any free port
+
+    Returns:
+        The server, call serve_forever to start answering
+    """
+
+    class RefreshHandler(BaseHTTPRequestHandler):
+        """Answers requests for a refresh"""
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            """Writes the data for the refresh named by the path"""
+            name = self.path.strip("/")
+            if name == "metrics":
+                self.write_json(fetch_utilities.get_metrics())
+                return
+
+            if name not in service.refreshes:
+                self.send_error(404, f"No refresh named {name}")
+                return
+
+            try:
+                entry = service.get(name)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                self.send_error(502, f"{name} failed: {error}")
+                return
+
+            self.write_json(entry)
+
+        def write_json(self, data):
+            """Writes data as the JSON body of a 200 response"""
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            """Requests aren't logged, refreshes are printed by the service"""
+
+    return ThreadingHTTPServer((host, port), RefreshHandler)
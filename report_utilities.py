@@ -0,0 +1,237 @@
+"""Locates the newest monthly report published at a dated URL"""
+
+import concurrent.futures
+import json
+import os
+import threading
+import urllib.parse
+from datetime import date, timedelta
+
+import polars
+
+REPORT_DIR = os.path.join("Cache", "Reports")
+REPORT_CACHE = os.path.join(REPORT_DIR, "reports.json")
+LOOKBACK_MONTHS = 13  # Months probed, back to the same month of the previous year
+CACHE_LOCK = threading.Lock()
+
+
+def get_candidate_months(today: date, lookback: int = LOOKBACK_MONTHS) -> list[date]:
+    """
+    Returns the first day of this month and each of the months before it, newest first
+
+    Args:
+        today: Date to count back from
+        lookback: Number of months to return
+
+    Returns:
+        List of dates on the first of each month
+    """
+    months = []
+    year, month = today.year, today.month
+
+    for _ in range(lookback):
+        months.append(date(year, month, 1))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+    return months
+
+
+def add_months(month: date, count: int) -> date:
+    """
+    Moves a date on by a number of months, keeping the day
+
+    Args:
+        month: Date to move
+        count: Number of months to move it
+
+    Returns:
+        The moved date
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, month.day)
+
+
+def load_cache(cache_path: str) -> dict[str, dict]:
+    """
+    Reads the located reports
+
+    Args:
+        cache_path: JSON file holding the located reports
+
+    Returns:
+        Dictionary of report names to url, url_format and valid_until
+    """
+    if not os.path.exists(cache_path):
+        return {}
+
+    with open(cache_path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def probe(url: str) -> bool:
+    """
+    Checks a report exists with a HEAD request, without downloading it.  Hosts that don't
+    allow HEAD are sent a GET whose body is never read
+
+    Args:
+        url: URL of the report
+
+    Returns:
+        True if the report exists
+    """
+    import fetch_utilities  # pylint: disable=import-outside-toplevel
+
+    try:
+        response = fetch_utilities.head(url, allow_redirects=True)
+        if response.status_code == 405:
+            with fetch_utilities.get(url, stream=True) as response:
+                pass
+    except fetch_utilities.RequestException:
+        return False
+
+    return response.status_code == 200
+
+
+def locate_report(
+    name: str,
+    url_format: str,
+    publication_lag: int,
+    publication_day: int,
+    today: date | None = None,
+    cache_path: str = REPORT_CACHE,
+) -> str | None:
+    """
+    Returns the URL of the newest report.  Every candidate month is probed at once and the
+    newest hit is cached until the report after it is expected, so most calls return the
+    cached URL without touching the network
+
+    Args:
+        name: Name the report is cached under, e.g. permits
+        url_format: URL with {year} and {month} fields, month is zero padded
+        publication_lag: Months between the month in the URL and its publication
+        publication_day: Day of the month reports are published from
+        today: Date to locate the report on, today if None
+        cache_path: JSON file holding the located reports
+
+    Returns:
+        URL of the newest report, or None if no candidate exists
+    """
+    today = today if today is not None else date.today()
+
+    with CACHE_LOCK:
+        entry = load_cache(cache_path).get(name)
+
+    if (
+        entry is not None
+        and entry["url_format"] == url_format
+        and today < date.fromisoformat(entry["valid_until"])
+    ):
+        return entry["url"]
+
+    months = get_candidate_months(today)
+    urls = [
+        url_format.format(year=month.year, month=f"{month.month:02}")
+        for month in months
+    ]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        hits = list(executor.map(probe, urls))
+
+    if True not in hits:
+        return None
+
+    newest = hits.index(True)
+    next_month = add_months(months[newest], publication_lag + 1)
+    valid_until = max(
+        date(next_month.year, next_month.month, publication_day),
+        today + timedelta(days=1),
+    )
+
+    with CACHE_LOCK:
+        cache = load_cache(cache_path)
+        cache[name] = {
+            "url": urls[newest],
+            "url_format": url_format,
+            "valid_until": valid_until.isoformat(),
+        }
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as file:
+            json.dump(cache, file)
+
+    return urls[newest]
+
+
+def download_report(url: str, report_dir: str = REPORT_DIR) -> str:
+    """
+    Downloads a report into report_dir, unless it has been downloaded already
+
+    Args:
+        url: URL of the report
+        report_dir: Directory the reports are kept in
+
+    Returns:
+        Path of the downloaded report
+    """
+    import fetch_utilities  # pylint: disable=import-outside-toplevel
+
+    # The whole path is kept as some reports have the same file name every month
+    file_name = urllib.parse.urlsplit(url).path.strip("/").replace("/", "_")
+    path = os.path.join(report_dir, file_name)
+    if os.path.exists(path):
+        return path
+
+    response = fetch_utilities.get(url, timeout=30)
+    response.raise_for_status()
+
+    os.makedirs(report_dir, exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(response.content)
+
+    return path
+
+
+def read_report(path: str) -> polars.DataFrame:
+    """
+    Reads the first sheet of a downloaded .xls or .xlsx report with every cell as text, as
+    reports have titles and notes above and below their tables
+
+    Args:
+        path: Path of the report
+
+    Returns:
+        Frame of strings, the columns are named column_1, column_2 etc.
+    """
+    frame = polars.read_excel(path, has_header=False, drop_empty_rows=False)
+    return frame.select(polars.all().cast(polars.Utf8))
+
+
+def update_history(
+    frame: polars.DataFrame, history_path: str, key: str
+) -> polars.DataFrame:
+    """
+    Adds a parsed report to the history kept in history_path.  Rows for a key already in
+    the history, e.g. a revised month, are replaced by the new rows
+
+    Args:
+        frame: Parsed report
+        history_path: Parquet file holding the history
+        key: Column identifying the period of each row, e.g. Month
+
+    Returns:
+        The whole history sorted by key
+    """
+    if os.path.exists(history_path):
+        history = polars.read_parquet(history_path)
+        frame = polars.concat(
+            [
+                history.filter(~polars.col(key).is_in(frame[key].unique().to_list())),
+                frame,
+            ],
+            how="diagonal_relaxed",
+        )
+
+    frame = frame.sort(key, maintain_order=True)
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    frame.write_parquet(history_path)
+
+    return frame
@@ -1,15 +1,13 @@
 # pylint: disable=line-too-long
-"""Test workpad for new code """
+"""Test workpad for new code"""
 
 import concurrent.futures
-import io
 
-import pandas
-import polars
-import requests
 from polars import DataFrame
 
+import fetch_utilities
 from fmp import fmp_check_symbols, fmp_historical_prices
+from html_utilities import read_table
 
 
 def multithreading_last_100(ticker: str):
@@ -61,13 +59,8 @@ def run():
     """Run"""
     url = "https://stockanalysis.com/etf/ura/holdings/"
 
-    header_info = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-    }
-
-    data = requests.get(url, headers=header_info, timeout=5)
-    frames = pandas.read_html(io.StringIO(data.text))
-    frame = polars.from_pandas(frames[0]).drop(["Shares"])
+    data = fetch_utilities.get(url)
+    frame = read_table(data.text, 0).drop(["Shares"])
 
     num_rows = frame.shape[0]
     print(frame)
@@ -83,4 +76,3 @@ def run():
 
 
 run()
-
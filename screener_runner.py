@@ -0,0 +1,28 @@
+"""Checks and formats exported screener files without Excel, in parallel"""
+
+import glob
+import os
+import sys
+import time
+
+from screener_utilities import process_screener_exports
+
+EXPORT_PATTERN = os.path.join("Screener Exports", "*.csv")  # .xlsx exports also work
+OUTPUT_DIR = "Workbooks"
+WORKERS = None  # One process per CPU
+
+if __name__ == "__main__":
+    paths = sorted(glob.glob(EXPORT_PATTERN))
+    if len(paths) == 0:
+        print(f"[ERROR] No exports match {EXPORT_PATTERN}, quitting")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    results = process_screener_exports(paths, OUTPUT_DIR, WORKERS)
+
+    for path, problems in results.items():
+        for problem in problems:
+            print(f"[ERROR] {os.path.basename(path)}: {problem}")
+
+    elapsed = time.perf_counter() - start
+    print(f"[Processing] Checked {len(paths)} exports in {elapsed:.1f}s")
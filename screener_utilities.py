@@ -0,0 +1,634 @@
+"""Vectorised screener calculations shared by screener_xw.py and screener_runner.py"""
+
+import concurrent.futures
+import multiprocessing
+import os
+
+import numpy
+import polars
+from xlsxwriter.utility import xl_cell_to_rowcol, xl_col_to_name
+
+from workbook_utilities import create_workbook
+
+MISSING_VALUES = ("NULL", "NaN", None, "")
+
+# Columns the screener must have, in their usual order from column L
+LAYOUT_COLUMNS = [
+    "Market Cap",
+    "Revenue FY0 - Previous Financial Year",
+    "Revenue FY1 - Current Financial Year",
+    "Revenue FY2 - Next Financial Year",
+    "Revenue FY3",
+    "Revenue NTM",
+    "Revenue Growth FY1",
+    "Revenue Growth FY2",
+    "Revenue Growth FY3",
+    "EPS FY0 - Previous Financial Year",
+    "EPS FY1 - Current Financial Year",
+    "EPS FY2 - Next Financial Year",
+    "EPS FY3",
+    "EPS NTM",
+    "EG F1",
+    "EG F2",
+    "EG F3",
+    "PE FY1",
+    "PE FY2",
+    "PE FY3",
+    "PEG F1",
+    "PEG F2",
+    "PEG F3",
+    "Debt/Equity %",
+    "Net Profit Margin (LTM)",
+    "Dividend Yield",
+    "Earnings Surprise % FQ-3",
+    "Earnings Surprise % FQ-2",
+    "Earnings Surprise % FQ-1",
+    "Earnings Surprise % - FQ0",
+    "Percent Change in FY1  EPS Estimates (Prev 60 Days)",
+    "Percent Change in FY2 EPS Estimates (Prev 60 Days)",
+    "Next EPS Report Date",
+]
+
+# Column filled on every row, the last row of data is found from it
+LAST_ROW_COLUMN = "Market Cap"
+
+# [Older column, newer column, growth column calculated by the screener]
+GROWTH_CHECKS = [
+    [
+        "Revenue FY0 - Previous Financial Year",
+        "Revenue FY1 - Current Financial Year",
+        "Revenue Growth FY1",
+    ],
+    [
+        "Revenue FY1 - Current Financial Year",
+        "Revenue FY2 - Next Financial Year",
+        "Revenue Growth FY2",
+    ],
+    ["Revenue FY2 - Next Financial Year", "Revenue FY3", "Revenue Growth FY3"],
+    ["EPS FY0 - Previous Financial Year", "EPS FY1 - Current Financial Year", "EG F1"],
+    ["EPS FY1 - Current Financial Year", "EPS FY2 - Next Financial Year", "EG F2"],
+    ["EPS FY2 - Next Financial Year", "EPS FY3", "EG F3"],
+]
+
+# [P/E column, EG column, PEG column calculated by the screener]
+PEG_CHECKS = [
+    ["PE FY1", "EG F1", "PEG F1"],
+    ["PE FY2", "EG F2", "PEG F2"],
+    ["PE FY3", "EG F3", "PEG F3"],
+]
+
+COLOUR_COLUMNS = [
+    "Market Cap",
+    "Revenue Growth FY1",
+    "Revenue Growth FY2",
+    "Revenue Growth FY3",
+    "EG F1",
+    "EG F2",
+    "EG F3",
+    "PE FY1",
+    "PE FY2",
+    "PE FY3",
+    "PEG F1",
+    "PEG F2",
+    "PEG F3",
+    "Earnings Surprise % FQ-3",
+    "Earnings Surprise % FQ-2",
+    "Earnings Surprise % FQ-1",
+    "Earnings Surprise % - FQ0",
+    "Percent Change in FY1  EPS Estimates (Prev 60 Days)",
+    "Percent Change in FY2 EPS Estimates (Prev 60 Days)",
+]
+REVERSE_COLOUR_COLUMNS = ["Debt/Equity %"]  # Red is high and green is low
+
+AVERAGE_COLUMNS = [
+    "Revenue Growth FY1",
+    "Revenue Growth FY2",
+    "Revenue Growth FY3",
+    "EG F1",
+    "EG F2",
+    "EG F3",
+    "PE FY1",
+    "PE FY2",
+    "PE FY3",
+    "PEG F1",
+    "PEG F2",
+    "PEG F3",
+]
+
+# A blank column is inserted before each of these to separate the groups
+SPACE_BEFORE = [
+    "Revenue Growth FY1",
+    "EPS FY0 - Previous Financial Year",
+    "EG F1",
+    "PE FY1",
+    "PEG F1",
+    "Net Profit Margin (LTM)",
+    "Percent Change in FY1  EPS Estimates (Prev 60 Days)",
+]
+
+# [Screener column, weight in the score, True if higher values rank better].  For columns
+# where lower is better, values of 0 or less (losses, shrinking earnings) are not ranked
+RANKINGS = [
+    ["Revenue Growth FY1", 1, True],
+    ["Revenue Growth FY2", 1, True],
+    ["Revenue Growth FY3", 1, True],
+    ["EG F1", 1, True],
+    ["EG F2", 1, True],
+    ["EG F3", 1, True],
+    ["PE FY1", 1, False],
+    ["PE FY2", 1, False],
+    ["PE FY3", 1, False],
+    ["PEG F1", 1, False],
+    ["PEG F2", 1, False],
+    ["PEG F3", 1, False],
+    ["Debt/Equity %", 1, False],
+]
+
+
+def to_floats(values: list) -> numpy.ndarray:
+    """
+    Converts a column of cell values to floats, with the screener's NULL/NaN strings and
+    blanks becoming NaN
+
+    Args:
+        values: Cell values as read from the sheet
+
+    Returns:
+        Float array
+    """
+    return numpy.array(
+        [numpy.nan if value in MISSING_VALUES else float(value) for value in values],
+        dtype=float,
+    )
+
+
+def truncate_str(values: numpy.ndarray) -> list[str]:
+    """
+    Returns the first 6 characters of each number as a string, used as a fallback
+    comparison when rounding differs by 0.01
+
+    Args:
+        values: Float array
+
+    Returns:
+        List of strings
+    """
+    return [str(value)[:6] for value in values.tolist()]
+
+
+def growth_check(
+    old: numpy.ndarray, new: numpy.ndarray, calc: numpy.ndarray
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Checks the sheet's growth calculations, see screener_xw.check_growth_calc.  A move from
+    negative to positive is capped at 100% and from positive to negative at -100%
+
+    Args:
+        old: Older values
+        new: Newer values
+        calc: Growth calculated by the sheet
+
+    Returns:
+        (corrections, errors) where corrections holds the capped value for rows that should
+        be overwritten and NaN elsewhere, and errors is a boolean array of wrong rows
+    """
+    valid = ~numpy.isnan(old) & ~numpy.isnan(new) & (old != 0)
+    corrections = numpy.full(len(old), numpy.nan)
+
+    to_positive = valid & (old < 0) & (new > 0)
+    to_negative = valid & (old > 0) & (new < 0)
+    corrections[to_positive] = 1
+    corrections[to_negative] = -1
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        growth = numpy.where(
+            (old < 0) & (new < 0),
+            (numpy.abs(new) - numpy.abs(old)) / old,
+            (new - old) / old,
+        )
+
+    check = valid & ~to_positive & ~to_negative
+    errors = check & ~(numpy.round(calc, 4) == numpy.round(growth, 4))
+
+    # Sometimes there is a 0.01 rounding error in the numbers.  A straight string
+    # comparison of the unrounded numbers is a safe fallback
+    for row in numpy.flatnonzero(errors):
+        if truncate_str(calc[row : row + 1]) == truncate_str(growth[row : row + 1]):
+            errors[row] = False
+
+    return corrections, errors
+
+
+def peg_check(
+    pe_ratio: numpy.ndarray, earnings_growth: numpy.ndarray, peg: numpy.ndarray
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Checks the sheet's PEG calculations, see screener_xw.check_peg.  If the EG is 100% or
+    -100% the PEG is re-calculated on the principle that growth_check has adjusted the EG
+    due to a shift from negative to positive
+
+    Args:
+        pe_ratio: P/E values
+        earnings_growth: EG values
+        peg: PEG calculated by the sheet
+
+    Returns:
+        (corrections, errors) where corrections holds the re-calculated PEG for rows that
+        should be overwritten and NaN elsewhere, and errors is a boolean array of wrong rows
+    """
+    valid = ~numpy.isnan(pe_ratio) & ~numpy.isnan(earnings_growth)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        calc_peg = numpy.round((pe_ratio / earnings_growth) / 100, 4)
+        recalculated = pe_ratio / earnings_growth
+
+    wrong = valid & ~(numpy.round(peg, 4) == calc_peg)
+    adjusted = wrong & numpy.isin(earnings_growth, (1, -1))
+
+    corrections = numpy.where(adjusted, recalculated, numpy.nan)
+    errors = wrong & ~adjusted
+
+    return corrections, errors
+
+
+def check_layout(columns: list) -> list[str]:
+    """
+    Confirm every column is present in case screener has changed.  Columns are found by
+    name, so their order doesn't matter
+
+    Args:
+        columns: Every header in the export, starting from column A
+
+    Returns:
+        List of error messages, empty if the layout is correct
+    """
+    return [
+        f"Column {name} not found" for name in LAYOUT_COLUMNS if name not in columns
+    ]
+
+
+def get_column_index(headers: list) -> dict[str, str]:
+    """
+    Maps each header to its column letter, so columns can be found by name
+
+    Args:
+        headers: Header row starting from column A, None for blank headers
+
+    Returns:
+        dict{name: column letter}, the first column wins if a name repeats
+    """
+    index: dict[str, str] = {}
+    for count, header in enumerate(headers):
+        if header is not None and header not in index:
+            index[header] = xl_col_to_name(count)
+
+    return index
+
+
+def read_screener_export(path: str) -> polars.DataFrame:
+    """
+    Reads an exported screener with every column as text, so NULL/NaN placeholders survive
+
+    Args:
+        path: Path to a .csv or .xlsx export
+
+    Returns:
+        DataFrame of strings
+    """
+    if path.lower().endswith(".csv"):
+        return polars.read_csv(path, infer_schema=False)
+
+    frame = polars.read_excel(path)
+    return frame.select(polars.all().cast(polars.Utf8))
+
+
+def validate_screener(frame: polars.DataFrame) -> tuple[dict, dict]:
+    """
+    Runs the growth and PEG checks over an export, applying the same corrections as
+    screener_xw
+
+    Args:
+        frame: Output of read_screener_export
+
+    Returns:
+        (values, errors) where values maps every numeric layout column to its corrected
+        float array and errors maps the checked columns to boolean arrays of wrong rows
+    """
+    values = {
+        name: to_floats(frame.get_column(name).to_list())
+        for name in LAYOUT_COLUMNS[:-1]
+    }
+    errors: dict[str, numpy.ndarray] = {}
+
+    for old_col, new_col, calc_col in GROWTH_CHECKS:
+        corrections, errors[calc_col] = growth_check(
+            values[old_col], values[new_col], values[calc_col]
+        )
+        values[calc_col] = numpy.where(
+            numpy.isnan(corrections), values[calc_col], corrections
+        )
+
+    for pe_col, eg_col, peg_col in PEG_CHECKS:
+        corrections, errors[peg_col] = peg_check(
+            values[pe_col], values[eg_col], values[peg_col]
+        )
+        values[peg_col] = numpy.where(
+            numpy.isnan(corrections), values[peg_col], corrections
+        )
+
+    return values, errors
+
+
+def get_column_width(header: str, values: list) -> float:
+    """
+    Returns a column width that fits the header and values, used in place of autofit
+
+    Args:
+        header: Column header
+        values: Cell values in the column
+
+    Returns:
+        Width in characters
+    """
+    longest = max(
+        [len(header)]
+        + [
+            len(f"{value:,.2f}") if isinstance(value, float) else len(str(value))
+            for value in values
+            if value is not None
+        ]
+    )
+    return min(longest + 2, 60)
+
+
+def col_index(col_letter: str) -> int:
+    """Returns the zero based index of a column letter, e.g. A is 0"""
+    return xl_cell_to_rowcol(f"{col_letter}1")[1]
+
+
+def shift_column(col_letter: str, insert_columns: list[str]) -> str:
+    """
+    Returns where a column ends up once a column is inserted before each of
+    insert_columns
+
+    Args:
+        col_letter: Original column letter
+        insert_columns: Letters of the columns new ones were inserted before
+
+    Returns:
+        New column letter
+    """
+    index = col_index(col_letter)
+    shift = sum(1 for col in insert_columns if col_index(col) <= index)
+    return xl_col_to_name(index + shift)
+
+
+def join_addresses(addresses: list[str], limit: int = 255) -> list[str]:
+    """
+    Joins addresses into as few union addresses as possible.  Excel limits a range address
+    to 255 characters, so longer unions are split
+
+    Args:
+        addresses: Range addresses, e.g. ["R5", "AF:AF"]
+        limit: Maximum length of a union address
+
+    Returns:
+        List of union addresses, e.g. ["R5,AF:AF"]
+    """
+    unions: list[str] = []
+    union = ""
+
+    for address in addresses:
+        if union != "" and len(union) + len(address) + 1 > limit:
+            unions.append(union)
+            union = ""
+
+        union = address if union == "" else f"{union},{address}"
+
+    if union != "":
+        unions.append(union)
+
+    return unions
+
+
+def group_widths(widths: dict[str, float]) -> dict[float, list[str]]:
+    """
+    Groups columns by width so each width can be set with one union range
+
+    Args:
+        widths: Dictionary of column letters to widths
+
+    Returns:
+        dict{width: union addresses, e.g. ["A:A,C:C"]}
+    """
+    groups: dict[float, list[str]] = {}
+    for col, width in widths.items():
+        groups.setdefault(width, []).append(f"{col}:{col}")
+
+    return {width: join_addresses(cols) for width, cols in groups.items()}
+
+
+def write_screener_workbook(
+    frame: polars.DataFrame, values: dict, errors: dict, output_path: str
+):
+    """
+    Writes a checked export with the screener_xw formatting: spacer columns between the
+    groups, wrong cells in red, averages under the main columns and colour scales
+
+    Args:
+        frame: Output of read_screener_export
+        values: Corrected values from validate_screener
+        errors: Error masks from validate_screener
+        output_path: Path of the xlsx to write
+    """
+    workbook = create_workbook(output_path)
+    worksheet = workbook.add_worksheet("Screener")
+    header_format = workbook.add_format({"bold": True, "border": 1})
+    error_format = workbook.add_format({"bg_color": "#FF0000"})
+    average_format = workbook.add_format({"border": 2, "num_format": "0.00"})
+
+    last_row = frame.shape[0]
+    col = 0
+
+    for name in frame.columns:
+        if name in SPACE_BEFORE:
+            col = col + 1
+
+        raw = frame.get_column(name).to_list()
+        if name in values:
+            cells = [
+                raw[row] if numpy.isnan(value) else float(value)
+                for row, value in enumerate(values[name])
+            ]
+        else:
+            cells = raw
+
+        worksheet.write(0, col, name, header_format)
+        worksheet.write_column(1, col, cells)
+        worksheet.set_column(col, col, get_column_width(name, cells))
+
+        for row in numpy.flatnonzero(errors.get(name, numpy.zeros(0, dtype=bool))):
+            worksheet.write(int(row) + 1, col, cells[row], error_format)
+
+        cell_range = f"{xl_col_to_name(col)}2:{xl_col_to_name(col)}{last_row + 1}"
+
+        if name in AVERAGE_COLUMNS:
+            worksheet.write_formula(
+                last_row + 2, col, f"=AVERAGE({cell_range})", average_format
+            )
+
+        if name in COLOUR_COLUMNS:
+            worksheet.conditional_format(cell_range, {"type": "3_color_scale"})
+
+        if name in REVERSE_COLOUR_COLUMNS:
+            worksheet.conditional_format(
+                cell_range,
+                {
+                    "type": "3_color_scale",
+                    "min_color": "#63BE7B",
+                    "max_color": "#F8696B",
+                },
+            )
+
+        col = col + 1
+
+    worksheet.freeze_panes(1, 0)
+    workbook.close()
+
+
+def process_screener_export(path: str, output_dir: str) -> list[str]:
+    """
+    Checks and formats a single export without Excel
+
+    Args:
+        path: Path to a .csv or .xlsx export
+        output_dir: Directory the formatted workbook is written to
+
+    Returns:
+        List of problems found, empty if the export was clean
+    """
+    frame = read_screener_export(path)
+
+    problems = check_layout(frame.columns)
+    if len(problems) > 0:
+        return problems
+
+    values, errors = validate_screener(frame)
+    for name, error_mask in errors.items():
+        problems.extend(
+            f"{name} row {row + 2} is wrong" for row in numpy.flatnonzero(error_mask)
+        )
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    write_screener_workbook(
+        frame, values, errors, os.path.join(output_dir, f"{name}_checked.xlsx")
+    )
+
+    return problems
+
+
+def process_screener_exports(
+    paths: list[str], output_dir: str, workers: int | None = None
+) -> dict[str, list[str]]:
+    """
+    Processes many exports in parallel, one process per export.  Workers are spawned
+    rather than forked, as forking after polars has started its thread pool deadlocks
+
+    Args:
+        paths: Paths to .csv or .xlsx exports
+        output_dir: Directory the formatted workbooks are written to
+        workers: Maximum number of processes, defaults to the number of CPUs
+
+    Returns:
+        dict{path: problems}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        results = executor.map(
+            process_screener_export, paths, [output_dir] * len(paths)
+        )
+        return dict(zip(paths, results))
+
+
+def percentile_ranks(values: numpy.ndarray, higher_is_better: bool) -> numpy.ndarray:
+    """
+    Ranks values from 0 (worst) to 1 (best), with tied values sharing their average rank
+
+    Args:
+        values: Float array, NaN for missing values
+        higher_is_better: False to rank the lowest positive value best
+
+    Returns:
+        Float array of percentiles, NaN where a value could not be ranked
+    """
+    valid = ~numpy.isnan(values)
+    if not higher_is_better:
+        valid = valid & (values > 0)
+        values = -values
+
+    ranks = numpy.full(len(values), numpy.nan)
+    data = values[valid]
+    if len(data) == 0:
+        return ranks
+
+    ordered = numpy.sort(data)
+    left = numpy.searchsorted(ordered, data, side="left")
+    right = numpy.searchsorted(ordered, data, side="right")
+    average = (left + right - 1) / 2
+
+    ranks[valid] = average / (len(data) - 1) if len(data) > 1 else 1.0
+    return ranks
+
+
+def rank_screener(
+    columns: dict[str, list], rankings: list | None = None
+) -> tuple[list[str], numpy.ndarray]:
+    """
+    Percentile ranks each ranking column and combines them into a weighted score.  A row's
+    score is the weighted average of the ranks it has, so a missing figure neither helps
+    nor hurts
+
+    Args:
+        columns: Dictionary of screener column names to cell values
+        rankings: Ranking spec, defaults to RANKINGS
+
+    Returns:
+        (headers, block) where block has a row per screener row, a column per ranking and
+        the score last
+    """
+    rankings = RANKINGS if rankings is None else rankings
+
+    ranks = numpy.column_stack(
+        [
+            percentile_ranks(to_floats(columns[name]), higher_is_better)
+            for name, _, higher_is_better in rankings
+        ]
+    )
+    weights = numpy.array([weight for _, weight, _ in rankings], dtype=float)
+
+    ranked = ~numpy.isnan(ranks)
+    total_weight = (ranked * weights).sum(axis=1)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        score = numpy.where(ranked, ranks, 0) @ weights / total_weight
+
+    headers = [f"{name} Rank" for name, _, _ in rankings] + ["Score"]
+    return headers, numpy.column_stack([ranks, score])
+
+
+def to_cells(block: numpy.ndarray) -> list[list]:
+    """
+    Converts a float block to nested lists for writing, with NaN as empty cells
+
+    Args:
+        block: 2D float array
+
+    Returns:
+        List of rows
+    """
+    return [
+        [None if numpy.isnan(value) else value for value in row]
+        for row in block.tolist()
+    ]
@@ -1,6 +1,35 @@
 """Runs sector screener for improved visualisation"""
 
+import numpy
 import xlwings
+from xlsxwriter.utility import xl_cell_to_rowcol, xl_col_to_name
+
+from screener_utilities import (
+    AVERAGE_COLUMNS,
+    COLOUR_COLUMNS,
+    GROWTH_CHECKS,
+    LAST_ROW_COLUMN,
+    PEG_CHECKS,
+    REVERSE_COLOUR_COLUMNS,
+    SPACE_BEFORE,
+    check_layout,
+    col_index,
+    get_column_index,
+    get_column_width,
+    group_widths,
+    growth_check,
+    join_addresses,
+    peg_check,
+    rank_screener,
+    shift_column,
+    to_cells,
+    to_floats,
+)
+from xw_utilities import suspend_app
+
+# Colour scale colours in Excel's BGR order
+GREEN = 0x7BBE63
+RED = 0x6B69F8
 
 
 def run(sheet_name: str):
@@ -10,145 +39,138 @@ def run(sheet_name: str):
     Args:
         sheet_name: Name of active sheet in workbook
     """
-
     workbook = xlwings.Book.caller()
-    sheet = workbook.sheets[sheet_name]
-    last_row = sheet.range("L1").end("down").row
-    error_list: list[bool] = []
-
-    print(f"Last Row: {last_row}")
-    error_list.append(checkLayout(sheet))
-
-    if checkErrors(error_list):
-        return
-
-    print("Layout checks complete")
-
-    error_list.append(check_growth_calc(sheet, "M", "N", "R", last_row))  # Revenue FY0
-    error_list.append(check_growth_calc(sheet, "N", "O", "S", last_row))  # Revenue FY1
-    error_list.append(check_growth_calc(sheet, "O", "P", "T", last_row))  # Revenue FY2
-    print("Revenue Checked")
-
-    error_list.append(check_growth_calc(sheet, "U", "V", "Z", last_row))  # EG 1
-    error_list.append(check_growth_calc(sheet, "V", "W", "AA", last_row))  # EG 2
-    error_list.append(check_growth_calc(sheet, "W", "X", "AB", last_row))  # EG 3
-    print("EG Checked")
-
-    if checkErrors(error_list):
-        return
-
-    error_list.append(check_peg(sheet, "AC", "Z", "AF", last_row))  # PEG F1
-    error_list.append(check_peg(sheet, "AD", "AA", "AG", last_row))  # PEG F2
-    error_list.append(check_peg(sheet, "AE", "AB", "AH", last_row))  # PEG F3
-    print("PEG Checked")
-
-    if checkErrors(error_list):
-        return
-
-    colour_columns = [
-        "L",
-        "R",
-        "S",
-        "T",
-        "Z",
-        "AA",
-        "AB",
-        "AC",
-        "AD",
-        "AE",
-        "AF",
-        "AG",
-        "AH",
-        "AL",
-        "AM",
-        "AN",
-        "AO",
-        "AP",
-        "AQ",
-    ]
-    reverse_colour_columns = ["AI"]
-
-    colour_scale(workbook, colour_columns, last_row, False)
-    colour_scale(workbook, reverse_colour_columns, last_row, True)
-    print("Colour Scale Added")
-
-    macro = workbook.macro("Filterer")
-    macro("")
-
-    space_columns = [
-        "R:R",
-        "V:V",
-        "AB:AB",
-        "AF:AF",
-        "AJ:AJ",
-        "AO:AO",
-        "AV:AV",
-    ]
-
-    add_new_cols(sheet, space_columns)
-    print("Columns Added")
-
-    average_columns = [
-        "S",
-        "T",
-        "U",
-        "AC",
-        "AD",
-        "AE",
-        "AG",
-        "AH",
-        "AI",
-        "AK",
-        "AL",
-        "AM",
-    ]
-    add_averages(sheet, average_columns, last_row)
-    print("Averages Added")
-
-    macro = workbook.macro("StockDataPrice")
-    macro("")
-    print("Tickers converted to stocks and price added")
-
-    # ranking_columns = [
-    #     "S",
-    #     "T",
-    #     "U",
-    #     "AC",
-    #     "AD",
-    #     "AE",
-    #     "AG",
-    #     "AH",
-    #     "AI",
-    #     "AK",
-    #     "AL",
-    #     "AM",
-    # ]
-
-    sheet.autofit(axis="columns")
-
-
-def add_new_cols(sheet, columns: list[str]):
+
+    with suspend_app(workbook, "screener_xw"):
+        sheet = workbook.sheets[sheet_name]
+        last_col = xl_col_to_name(sheet.used_range.last_cell.column - 1)
+        error_list: list[bool] = []
+
+        # The header row and the block below it are each read in a single call, and
+        # every column is found by its header rather than its letter
+        headers = sheet.range(f"A1:{last_col}1").options(ndim=1).value
+        index = get_column_index(headers)
+        error_list.append(checkLayout(headers))
+
+        if checkErrors(error_list):
+            return
+
+        print("Layout checks complete")
+
+        last_row = sheet.range(f"{index[LAST_ROW_COLUMN]}1").end("down").row
+        print(f"Last Row: {last_row}")
+
+        columns = read_columns(sheet, "A", last_col, last_row)
+        error_cells: list[str] = []
+
+        for old_name, new_name, calc_name in GROWTH_CHECKS:
+            error_list.append(
+                check_growth_calc(
+                    columns, index, old_name, new_name, calc_name, error_cells
+                )
+            )
+        print("Revenue and EG Checked")
+
+        write_columns(
+            sheet,
+            columns,
+            sorted([index[calc] for _, _, calc in GROWTH_CHECKS], key=col_index),
+        )
+        colour_cells(sheet, error_cells, "#FF0000")
+
+        if checkErrors(error_list):
+            return
+
+        for pe_name, eg_name, peg_name in PEG_CHECKS:
+            error_list.append(
+                check_peg(columns, index, pe_name, eg_name, peg_name, error_cells)
+            )
+        print("PEG Checked")
+
+        write_columns(
+            sheet,
+            columns,
+            sorted([index[peg] for _, _, peg in PEG_CHECKS], key=col_index),
+        )
+        colour_cells(sheet, error_cells, "#FF0000")
+
+        if checkErrors(error_list):
+            return
+
+        # Ranks and the score go to the right of the data, leaving a blank column
+        named_columns = {name: columns[col] for name, col in index.items()}
+        rank_headers, rank_block = rank_screener(named_columns)
+        rank_cells = to_cells(rank_block)
+        rank_start = col_index(last_col) + 2
+        rank_cell = f"{xl_col_to_name(rank_start)}1"
+        sheet.range(rank_cell).value = [rank_headers] + rank_cells
+
+        rank_columns = {
+            xl_col_to_name(rank_start + count): [row[count] for row in rank_cells]
+            for count in range(len(rank_headers))
+        }
+        index["Score"] = list(rank_columns)[-1]
+        print("Rankings Added")
+
+        colour_scale(sheet, index, COLOUR_COLUMNS + ["Score"], last_row, False)
+        colour_scale(sheet, index, REVERSE_COLOUR_COLUMNS, last_row, True)
+        print("Colour Scale Added")
+
+        macro = workbook.macro("Filterer")
+        macro("")
+
+        insert_columns = add_new_cols(sheet, [index[name] for name in SPACE_BEFORE])
+        index = {name: shift_column(col, insert_columns) for name, col in index.items()}
+        print("Columns Added")
+
+        add_averages(sheet, index, AVERAGE_COLUMNS, last_row)
+        print("Averages Added")
+
+        macro = workbook.macro("StockDataPrice")
+        macro("")
+        print("Tickers converted to stocks and price added")
+
+        widths = {
+            shift_column(col, insert_columns): get_column_width(str(header), values)
+            for (col, values), header in zip(
+                (columns | rank_columns).items(), headers + rank_headers
+            )
+            if header is not None
+        }
+        set_column_widths(sheet, widths)
+
+
+def add_new_cols(sheet, columns: list[str]) -> list[str]:
     """
-    Inserts new columns
+    Inserts a new column before each of the columns in a single step through one union
+    range
 
     Args:
         sheet: Sheet with data
-        columns: List of column letters in format A:A, B:B
+        columns: List of column letters
+
+    Returns:
+        The column letters sorted, for use with shift_column
     """
-    for col in columns:
-        sheet.range(col).insert("right")
+    insert_columns = sorted(columns, key=col_index)
+    sheet.range(",".join(f"{col}:{col}" for col in insert_columns)).insert("right")
+
+    return insert_columns
 
 
-def add_averages(sheet: xlwings.Sheet, columns: list[str], last_row: int):
+def add_averages(
+    sheet: xlwings.Sheet, index: dict[str, str], names: list[str], last_row: int
+):
     """
     Adds average formula to cells below main columns
 
     Args:
         sheet: Sheet to write to
-        columns: List of column letters
+        index: Dictionary of column names to letters, see get_column_index
+        names: Names of the columns to average
         last_row: Last used row in columns
     """
-    for col in columns:
+    for col in [index[name] for name in names]:
         average_cell = f"{col}{last_row + 2}"
         average_range = f"{col}2:{col}{last_row}"
         sheet[average_cell].formula = f"=Average({average_range})"
@@ -156,25 +178,45 @@ def add_averages(sheet: xlwings.Sheet, columns: list[str], last_row: int):
 
 
 def colour_scale(
-    workbook: xlwings.Book, columns: list[str], last_row: int, reverse: bool
+    sheet: xlwings.Sheet,
+    index: dict[str, str],
+    names: list[str],
+    last_row: int,
+    reverse: bool,
 ):
     """
-    Uses the workbook macros to colour scale the columns
+    Adds a native 3 colour scale to each column, rather than running a workbook macro per
+    column.  Each column keeps its own scale, as one rule over a multi-area range would
+    scale every column against the others
 
     Args:
-        workbook: Workbookwith macros
-        cells: List of column letters
+        sheet: Sheet with data
+        index: Dictionary of column names to letters, see get_column_index
+        names: Names of the columns to colour
         last_row: Last row num
         reverse: Use reverse colours where red it high and green is low
     """
-    if reverse:
-        macro = workbook.macro("ReverseColourer")
-    else:
-        macro = workbook.macro("Colourer")
+    for col in [index[name] for name in names]:
+        scale = sheet.range(
+            f"{col}2:{col}{last_row}"
+        ).api.FormatConditions.AddColorScale(3)
 
-    for col in columns:
-        cell_range = f"{col}2:{col}{last_row}"
-        macro(cell_range)
+        if reverse:
+            scale.ColorScaleCriteria(1).FormatColor.Color = GREEN
+            scale.ColorScaleCriteria(3).FormatColor.Color = RED
+
+
+def set_column_widths(sheet: xlwings.Sheet, widths: dict[str, float]):
+    """
+    Sets column widths with one union range per width, in place of sheet.autofit
+
+    Args:
+        sheet: Sheet with data
+        widths: Dictionary of column letters to widths
+    """
+    for width, addresses in group_widths(widths).items():
+        for address in addresses:
+            sheet.range(address).column_width = width
 
 
 def checkErrors(error_list: list[bool]) -> bool:
@@ -198,212 +240,154 @@ def checkErrors(error_list: list[bool]) -> bool:
     return False
 
 
-def check_peg(
-    sheet: xlwings.Sheet, pe_col: str, eg_col: str, peg_col: str, last_row: int
-) -> bool:
+def read_columns(
+    sheet: xlwings.Sheet, first_col: str, last_col: str, last_row: int
+) -> dict[str, list]:
     """
-    Checks PEG.  If the EG is 100% and the PEG is wrong, the PEG will be re-calculated on the principle
-    that check_growth_calc has adjusted the EG due to a shift from negative to positive
+    Reads a block of columns from row 2 to last_row in a single call
 
     Args:
-        sheet: Sheet containing data
-        pe_col: Column letter of P/E to use
-        eg_col: Column letter of EG to use
-        peg_col: Column letter of PEG figure
+        sheet: Sheet with data
+        first_col: Column letter of the first column in the block
+        last_col: Column letter of the last column in the block
         last_row: Last row of data
 
     Returns:
-        True if errors found, otherwise False
+        Dictionary of column letters to lists of cell values
     """
-    errors = False
+    block = sheet.range(f"{first_col}2:{last_col}{last_row}").options(ndim=2).value
+    first_index = xl_cell_to_rowcol(f"{first_col}1")[1]
 
-    for cur_row in range(2, last_row + 1):
-        pe_value = sheet[f"{pe_col}{str(cur_row)}"].value
-        eg_value = sheet[f"{eg_col}{str(cur_row)}"].value
-        peg_value = sheet[f"{peg_col}{str(cur_row)}"].value
+    return {
+        xl_col_to_name(first_index + count): [row[count] for row in block]
+        for count in range(len(block[0]))
+    }
 
-        if pe_value in ("NULL", "NaN"):
-            continue
 
-        if eg_value in ("NULL", "NaN"):
-            continue
+def write_columns(
+    sheet: xlwings.Sheet, columns: dict[str, list], col_letters: list[str]
+):
+    """
+    Writes columns back from row 2, with each run of adjacent columns written as a single
+    2D block
 
-        pe_value_f = float(pe_value)  # pyright: ignore[reportGeneralTypeIssues]
-        eg_value_f = float(eg_value)  # pyright: ignore[reportGeneralTypeIssues]
-        peg_value_f = float(peg_value)  # pyright: ignore[reportGeneralTypeIssues]
-        peg_value_f = round(peg_value, 4)  # pyright: ignore[reportGeneralTypeIssues]
+    Args:
+        sheet: Sheet to write to
+        columns: Dictionary of column letters to lists of cell values
+        col_letters: Columns to write, in sheet order
+    """
+    runs: list[list[str]] = []
+    for col in col_letters:
+        index = xl_cell_to_rowcol(f"{col}1")[1]
+        if len(runs) > 0 and xl_cell_to_rowcol(f"{runs[-1][-1]}1")[1] == index - 1:
+            runs[-1].append(col)
+        else:
+            runs.append([col])
 
-        calc_peg = round((pe_value_f / eg_value_f) / 100, 4)
+    for run in runs:
+        block = [list(row) for row in zip(*[columns[col] for col in run])]
+        sheet.range(f"{run[0]}2").value = block
 
-        if peg_value_f != calc_peg:
-            if eg_value_f in (1, -1):
-                # If 100% or -100% then code likely adjusted EG due to shift from negative to positive
-                # or vice versa, so re-calculate PEG
-                sheet[f"{peg_col}{str(cur_row)}"].value = float(pe_value_f / eg_value_f)
-            else:
-                sheet.range(f"{peg_col}{str(cur_row)}").color = "#FF0000"
-                errors = True
 
-    return errors
+def colour_cells(sheet: xlwings.Sheet, cells: list[str], colour: str):
+    """
+    Colours many cells using as few union ranges as possible.  Excel limits a range address
+    to 255 characters, so the cells are split into addresses under that length
 
+    Args:
+        sheet: Sheet containing the cells
+        cells: Cell addresses, e.g. ["R5", "AF12"]
+        colour: Hex colour, e.g. #FF0000
+    """
+    for address in join_addresses(cells):
+        sheet.range(address).color = colour
 
-def check_growth_calc(
-    sheet: xlwings.Sheet, old_col: str, new_col: str, calc_col: str, last_row: int
+
+def check_peg(
+    columns: dict[str, list],
+    index: dict[str, str],
+    pe_name: str,
+    eg_name: str,
+    peg_name: str,
+    error_cells: list[str],
 ) -> bool:
     """
-    Checks each growth calculation on the spreadsheet for errors
+    Checks PEG.  If the EG is 100% and the PEG is wrong, the PEG will be re-calculated on the principle
+    that check_growth_calc has adjusted the EG due to a shift from negative to positive
 
     Args:
-        sheet: Sheet with data
-        old_col: Column letter of older data for calculation
-        new_col: Column letter of newer data for calculation
-        calc_col: Column letter of data that sheet has calculated
-        last_row: Last row of data on sheet
+        columns: Output of read_columns, corrected PEGs are written into it
+        index: Dictionary of column names to letters, see get_column_index
+        pe_name: Name of the P/E column to use
+        eg_name: Name of the EG column to use
+        peg_name: Name of the PEG column
+        error_cells: Addresses of wrong cells are appended to this list
 
     Returns:
-        True if errors were found, otherwise false
+        True if errors found, otherwise False
     """
-    errors = False
-
-    for cur_row in range(2, last_row + 1):
-        old_value = sheet[f"{old_col}{str(cur_row)}"].value
-        new_value = sheet[f"{new_col}{str(cur_row)}"].value
-
-        if old_value in ("NULL", "NaN"):
-            continue
-
-        if new_value in ("NULL", "NaN"):
-            continue
+    pe_col, eg_col, peg_col = index[pe_name], index[eg_name], index[peg_name]
+    corrections, errors = peg_check(
+        to_floats(columns[pe_col]),
+        to_floats(columns[eg_col]),
+        to_floats(columns[peg_col]),
+    )
 
-        new_value_f = float(new_value)  # pyright: ignore[reportGeneralTypeIssues]
-        old_value_f = float(old_value)  # pyright: ignore[reportGeneralTypeIssues]
+    for row in numpy.flatnonzero(~numpy.isnan(corrections)):
+        columns[peg_col][row] = float(corrections[row])
 
-        # If moving from negative to positive then should be 100%, no greater
-        if old_value_f < 0 < new_value_f:
-            growth_val = sheet.range(f"{calc_col}{str(cur_row)}").value = 1
-            continue
+    error_cells.extend(f"{peg_col}{row + 2}" for row in numpy.flatnonzero(errors))
+    return bool(errors.any())
 
-        # If moving from positive to negative than loss can be no more than -100%
-        if old_value_f > 0 > new_value_f:
-            growth_val = sheet.range(f"{calc_col}{str(cur_row)}").value = -1
-            continue
 
-        if new_value_f < 0 and old_value_f < 0:
-            my_growth_val_f = (abs(new_value_f) - abs(old_value_f)) / old_value_f
-        else:
-            my_growth_val_f = (new_value_f - old_value_f) / old_value_f
+def check_growth_calc(
+    columns: dict[str, list],
+    index: dict[str, str],
+    old_name: str,
+    new_name: str,
+    calc_name: str,
+    error_cells: list[str],
+) -> bool:
+    """
+    Checks each growth calculation on the spreadsheet for errors
 
-        my_growth_val_s = str(my_growth_val_f)[:6]
-        my_growth_val_f = round(my_growth_val_f, 4)
+    Args:
+        columns: Output of read_columns, corrected growth figures are written into it
+        index: Dictionary of column names to letters, see get_column_index
+        old_name: Name of the column with older data for calculation
+        new_name: Name of the column with newer data for calculation
+        calc_name: Name of the column the sheet has calculated
+        error_cells: Addresses of wrong cells are appended to this list
 
-        growth_val = sheet.range(f"{calc_col}{str(cur_row)}").value
-        growth_val_f = float(growth_val)  # pyright: ignore[reportGeneralTypeIssues]
-        growth_val_s = str(growth_val)[:6]
-        growth_val_f = round(growth_val_f, 4)
+    Returns:
+        True if errors were found, otherwise false
+    """
+    old_col, new_col, calc_col = index[old_name], index[new_name], index[calc_name]
+    corrections, errors = growth_check(
+        to_floats(columns[old_col]),
+        to_floats(columns[new_col]),
+        to_floats(columns[calc_col]),
+    )
 
-        if growth_val_f != my_growth_val_f:
-            # Sometimes there is a 0.01 rounding error in the numbers.  A straight
-            # string comparison of the unrounded numbers is a safe fallback
-            if growth_val_s != my_growth_val_s:
-                sheet.range(f"{calc_col}{str(cur_row)}").color = "#FF0000"
-                errors = True
+    for row in numpy.flatnonzero(~numpy.isnan(corrections)):
+        columns[calc_col][row] = int(corrections[row])
 
-    return errors
+    error_cells.extend(f"{calc_col}{row + 2}" for row in numpy.flatnonzero(errors))
+    return bool(errors.any())
 
 
-def checkLayout(sheet) -> bool:
+def checkLayout(headers: list) -> bool:
     """
-    Confirm columns are in correct positions in case screener has changed
+    Confirm every column the screener needs is present in case screener has changed
 
     Args:
-        sheet: Sheet to check
+        headers: Header row of the sheet
 
     Returns:
         True if errors were found
     """
+    errors = check_layout(headers)
+    for error in errors:
+        print(f"[ERROR] {error}")
 
-    cells = [
-        "L1",
-        "M1",
-        "N1",
-        "O1",
-        "P1",
-        "Q1",
-        "R1",
-        "S1",
-        "T1",
-        "U1",
-        "V1",
-        "W1",
-        "X1",
-        "Y1",
-        "Z1",
-        "AA1",
-        "AB1",
-        "AC1",
-        "AD1",
-        "AE1",
-        "AF1",
-        "AG1",
-        "AH1",
-        "AI1",
-        "AJ1",
-        "AK1",
-        "AL1",
-        "AM1",
-        "AN1",
-        "AO1",
-        "AP1",
-        "AQ1",
-        "AR1",
-    ]
-
-    column_names = [
-        "Market Cap",
-        "Revenue FY0 - Previous Financial Year",
-        "Revenue FY1 - Current Financial Year",
-        "Revenue FY2 - Next Financial Year",
-        "Revenue FY3",
-        "Revenue NTM",
-        "Revenue Growth FY1",
-        "Revenue Growth FY2",
-        "Revenue Growth FY3",
-        "EPS FY0 - Previous Financial Year",
-        "EPS FY1 - Current Financial Year",
-        "EPS FY2 - Next Financial Year",
-        "EPS FY3",
-        "EPS NTM",
-        "EG F1",
-        "EG F2",
-        "EG F3",
-        "PE FY1",
-        "PE FY2",
-        "PE FY3",
-        "PEG F1",
-        "PEG F2",
-        "PEG F3",
-        "Debt/Equity %",
-        "Net Profit Margin (LTM)",
-        "Dividend Yield",
-        "Earnings Surprise % FQ-3",
-        "Earnings Surprise % FQ-2",
-        "Earnings Surprise % FQ-1",
-        "Earnings Surprise % - FQ0",
-        "Percent Change in FY1  EPS Estimates (Prev 60 Days)",
-        "Percent Change in FY2 EPS Estimates (Prev 60 Days)",
-        "Next EPS Report Date",
-    ]
-
-    errors = False
-
-    for count, cell in enumerate(cells):
-        cell_value = sheet.range(cell).value
-
-        if cell_value != column_names[count]:
-            print(
-                f"[ERROR] Cell {cell} expected to have {column_names[count]}, found {cell_value}"
-            )
-            errors = True
-
-    return errors
-
+    return len(errors) > 0
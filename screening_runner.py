@@ -0,0 +1,33 @@
+"""Runs a screen over the local fundamentals store and writes the results to xlsx"""
+
+import sys
+import time
+
+from screening_utilities import load_screen_index, write_screen
+
+# ["Metric", low or None, high or None], every filter must pass
+FILTERS = [
+    ["ROIC", 0.15, None],
+    ["PEG", 0, 1.5],
+    ["Debt to Equity", None, 1],
+]
+
+# ["Metric", count, descending] or None to keep every ticker that passes
+TOP = ["ROIC", 50, True]
+
+COLUMNS = ["ROIC", "PEG", "PE", "Debt to Equity", "Net Profit Margin", "Market Cap"]
+
+start = time.perf_counter()
+screen_index = load_screen_index()
+print(f"[Processing] Indexed {len(screen_index.tickers)} tickers")
+
+screen_start = time.perf_counter()
+screen_frame = screen_index.screen(FILTERS, TOP, COLUMNS)
+screen_ms = (time.perf_counter() - screen_start) * 1000
+print(f"[Processing] {screen_frame.shape[0]} tickers passed in {screen_ms:.1f}ms")
+
+if screen_frame.shape[0] == 0:
+    print("[ERROR] No tickers passed the screen, quitting")
+    sys.exit(0)
+
+write_screen(screen_frame, "Workbooks/Screen.xlsx")
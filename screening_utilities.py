@@ -0,0 +1,202 @@
+"""Screens the local fundamentals store with per-metric sorted indexes"""
+
+import numpy
+import polars
+
+from fundamentals_utilities import FUNDAMENTALS_DIR, read_fundamentals
+from screener_utilities import (
+    LAYOUT_COLUMNS,
+    validate_screener,
+    write_screener_workbook,
+)
+
+# Fundamentals metrics measuring the same thing as a screener column, with the multiplier
+# that converts them.  The rest follow the screener columns
+SCREENER_COLUMNS = {
+    "Market Cap": ["Market Cap", 1],
+    "Debt to Equity": ["Debt/Equity %", 100],
+    "Net Profit Margin": ["Net Profit Margin (LTM)", 1],
+    "Dividend Yield": ["Dividend Yield", 1],
+}
+
+
+class ScreenIndex:
+    """
+    Holds the latest value of every metric for every ticker in the fundamentals store, plus
+    one sorted index per metric.  Range filters are two binary searches and top-N queries a
+    slice, so compound screens over thousands of tickers take milliseconds
+    """
+
+    def __init__(self, fundamentals: polars.DataFrame | polars.LazyFrame):
+        latest = (
+            fundamentals.lazy()
+            .drop_nulls("date")
+            .sort("date")
+            .group_by(["ticker", "metric"])
+            .agg(polars.col("value").last())
+            .collect()
+        )
+        self.frame = latest.pivot(on="metric", index="ticker", values="value").sort(
+            "ticker"
+        )
+        self.tickers = self.frame.get_column("ticker").to_numpy()
+        self.values: dict[str, numpy.ndarray] = {}
+        self.orders: dict[str, numpy.ndarray] = {}
+
+        for metric in self.frame.columns[1:]:
+            values = (
+                self.frame.get_column(metric)
+                .cast(polars.Float64)
+                .fill_null(numpy.nan)
+                .to_numpy()
+            )
+            order = numpy.argsort(values, kind="stable")
+            # argsort puts NaN last, so drop them from the index
+            order = order[~numpy.isnan(values[order])]
+
+            self.values[metric] = values[order]
+            self.orders[metric] = order
+
+    def metrics(self) -> list[str]:
+        """Returns the metrics that can be screened on"""
+        return list(self.orders)
+
+    def range_rows(
+        self, metric: str, low: float | None = None, high: float | None = None
+    ) -> numpy.ndarray:
+        """
+        Returns the rows whose metric is between low and high inclusive
+
+        Args:
+            metric: Metric name, e.g. ROIC
+            low: Smallest value to include, or None for no lower bound
+            high: Largest value to include, or None for no upper bound
+
+        Returns:
+            Array of row numbers into self.frame
+        """
+        values = self.values[metric]
+        start = 0 if low is None else numpy.searchsorted(values, low, side="left")
+        end = len(values) if high is None else numpy.searchsorted(values, high, "right")
+
+        return self.orders[metric][start:end]
+
+    def top_rows(
+        self,
+        metric: str,
+        count: int,
+        descending: bool = True,
+        mask: numpy.ndarray | None = None,
+    ) -> numpy.ndarray:
+        """
+        Returns the rows with the highest (or lowest) values of metric
+
+        Args:
+            metric: Metric name
+            count: Number of rows to return
+            descending: True for the highest values, False for the lowest
+            mask: Boolean array of rows allowed in the result
+
+        Returns:
+            Array of row numbers into self.frame, best first
+        """
+        order = self.orders[metric]
+        if descending:
+            order = order[::-1]
+
+        if mask is not None:
+            order = order[mask[order]]
+
+        return order[:count]
+
+    def screen(
+        self, filters: list, top: list | None = None, columns: list[str] | None = None
+    ) -> polars.DataFrame:
+        """
+        Runs a compound screen.  Filters should be passed in the following format:
+        [
+            ["Metric", low or None, high or None],
+            ...
+        ]
+        and top, if passed, as ["Metric", count, descending]
+
+        Args:
+            filters: Every filter must pass for a ticker to be included
+            top: Keep only the best count tickers by the metric
+            columns: Metrics to return, defaults to every metric
+
+        Returns:
+            DataFrame with a ticker column and one column per metric
+        """
+        mask = numpy.ones(len(self.tickers), dtype=bool)
+
+        for metric, low, high in filters:
+            passed = numpy.zeros(len(self.tickers), dtype=bool)
+            passed[self.range_rows(metric, low, high)] = True
+            mask = mask & passed
+
+        if top is None:
+            rows = numpy.flatnonzero(mask)
+        else:
+            rows = self.top_rows(top[0], top[1], top[2], mask)
+
+        frame = self.frame[rows]
+        if columns is not None:
+            frame = frame.select(["ticker"] + columns)
+
+        return frame
+
+
+def load_screen_index(store_dir: str = FUNDAMENTALS_DIR) -> ScreenIndex:
+    """
+    Builds a ScreenIndex over the fundamentals store
+
+    Args:
+        store_dir: Root of the parquet store written by fundamentals_utilities
+
+    Returns:
+        ScreenIndex
+    """
+    return ScreenIndex(read_fundamentals(store_dir))
+
+
+def get_screener_frame(screen_frame: polars.DataFrame) -> polars.DataFrame:
+    """
+    Lays a screen result out as a screener export, tickers first, then every screener
+    column with the matching metrics filled in, then the metrics the screener lacks
+
+    Args:
+        screen_frame: Output of ScreenIndex.screen
+
+    Returns:
+        DataFrame in the screener layout
+    """
+    metrics = screen_frame.columns[1:]
+    screener_metrics = {
+        SCREENER_COLUMNS[metric][0]: polars.col(metric) * SCREENER_COLUMNS[metric][1]
+        for metric in metrics
+        if metric in SCREENER_COLUMNS
+    }
+
+    return screen_frame.select(
+        polars.col("ticker").alias("Ticker"),
+        *[
+            screener_metrics.get(name, polars.lit(None, polars.Float64)).alias(name)
+            for name in LAYOUT_COLUMNS
+        ],
+        *[metric for metric in metrics if metric not in SCREENER_COLUMNS],
+    )
+
+
+def write_screen(screen_frame: polars.DataFrame, output_path: str):
+    """
+    Writes a screen result in the screener workbook layout, with the same spacer columns,
+    averages and colour scales as a checked screener export
+
+    Args:
+        screen_frame: Output of ScreenIndex.screen
+        output_path: Path of the xlsx to write
+    """
+    screener_frame = get_screener_frame(screen_frame)
+    values, errors = validate_screener(screener_frame)
+    write_screener_workbook(screener_frame, values, errors, output_path)
@@ -2,9 +2,10 @@
 
 from datetime import datetime
 
-import requests
 import xlwings
 
+from xw_utilities import get_refreshed, suspend_app
+
 
 def get_data(sector_dict: dict, key: str, percentage: bool) -> str:
     """
@@ -33,9 +34,31 @@ def run(sheet_name: str):
     Args:
         sheet_name: The name of the shee to write to
     """
+    workbook = xlwings.Book.caller()
+
+    with suspend_app(workbook, "sector_xw"):
+        rows = get_refreshed("sector", get_sector_rows)
+
+        # Each region is written as a single block
+        sheet = workbook.sheets[sheet_name]
+        sheet.range("B4").value = rows
+        sheet.range("K4").value = rows
+        sheet["Q13"].value = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        sheet.range("Q13").select()
+
+
+def get_sector_rows() -> list[list]:
+    """
+    Downloads industry performance for every sector
+
+    Returns:
+        One row per industry: Industry, 1M Change, YTD, 3Y Change, Stocks
+    """
+    import fetch_utilities  # pylint: disable=import-outside-toplevel
+
     url = "https://stockanalysis.com/api/aggregation/industries_by_sector/?cols=industry_name,profitMargin,change,ch1m,chYTD,ch3y,stocks"  # pylint: disable=line-too-long
 
-    full_data = requests.get(url, timeout=5).json()["data"]
+    full_data = fetch_utilities.get(url).json()["data"]
 
     sectors = [
         "Communication Services",
@@ -51,38 +74,19 @@ def run(sheet_name: str):
         "Utilities",
     ]
 
-    data_dict: dict[str, list] = {
-        "Industry": [],
-        "1M Change": [],
-        "YTD": [],
-        "3Y Change": [],
-        "Stocks": [],
-    }
+    rows: list[list] = []
 
     for sector in sectors:
         sector_data = full_data[sector]
         for sub_sector in sector_data:
-            data_dict["Industry"].append(get_data(sub_sector, "industry_name", False))
-            data_dict["1M Change"].append(get_data(sub_sector, "ch1m", True))
-            data_dict["YTD"].append(get_data(sub_sector, "chYTD", True))
-            data_dict["3Y Change"].append(get_data(sub_sector, "ch3y", True))
-            data_dict["Stocks"].append(get_data(sub_sector, "stocks", False))
-
-    workbook = xlwings.Book.caller()
-    sheet = workbook.sheets[sheet_name]
-    sheet.range("B4").options(transpose=True).value = data_dict["Industry"]
-    sheet.range("C4").options(transpose=True).value = data_dict["1M Change"]
-    sheet.range("D4").options(transpose=True).value = data_dict["YTD"]
-    sheet.range("E4").options(transpose=True).value = data_dict["3Y Change"]
-    sheet.range("F4").options(transpose=True).value = data_dict["Stocks"]
-
-    sheet.range("K4").options(transpose=True).value = data_dict["Industry"]
-    sheet.range("L4").options(transpose=True).value = data_dict["1M Change"]
-    sheet.range("M4").options(transpose=True).value = data_dict["YTD"]
-    sheet.range("N4").options(transpose=True).value = data_dict["3Y Change"]
-    sheet.range("O4").options(transpose=True).value = data_dict["Stocks"]
-
-    update_time = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    sheet["Q13"].value = update_time
-    sheet.range("Q13").select()
-
+            rows.append(
+                [
+                    get_data(sub_sector, "industry_name", False),
+                    get_data(sub_sector, "ch1m", True),
+                    get_data(sub_sector, "chYTD", True),
+                    get_data(sub_sector, "ch3y", True),
+                    get_data(sub_sector, "stocks", False),
+                ]
+            )
+
+    return rows
@@ -0,0 +1,132 @@
+"""Parses the BEA weekly consumer spending reports into a local history"""
+
+import os
+from datetime import date, timedelta
+
+import polars
+
+from report_utilities import REPORT_DIR, download_report, read_report, update_history
+
+SPENDING_HISTORY = os.path.join(REPORT_DIR, "spending.parquet")
+SPENDING_SERIES: list[str] | None = None  # Series written to the sheet, None for all
+SPENDING_ROWS = 52  # Weeks written to the sheet
+EXCEL_EPOCH = date(1899, 12, 30)
+
+
+def to_date(cell: str | None) -> date | None:
+    """
+    Converts a cell to a date, whether it was read as an ISO date or an Excel serial
+
+    Args:
+        cell: Text of the cell
+
+    Returns:
+        The date, or None if the cell isn't a date
+    """
+    if cell is None:
+        return None
+
+    text = cell.strip()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+
+    try:
+        serial = float(text)
+    except ValueError:
+        return None
+
+    # Serials of plausible report dates only, so ordinary numbers aren't taken as dates
+    if 30000 <= serial <= 80000:
+        return EXCEL_EPOCH + timedelta(days=int(serial))
+
+    return None
+
+
+def parse_spending(report: polars.DataFrame) -> polars.DataFrame:
+    """
+    Parses a spending report.  The table starts at the first row dated in its first
+    column, and the series are named by the row above it
+
+    Args:
+        report: Output of read_report
+
+    Returns:
+        Frame of Date and one Float64 column per series
+    """
+    rows = report.rows()
+
+    first_index = next(
+        (count for count, row in enumerate(rows) if to_date(row[0]) is not None), None
+    )
+    if first_index is None or first_index == 0:
+        raise ValueError("No dated rows found, the spending layout has changed")
+
+    header = rows[first_index - 1]
+    series_cols = [
+        count
+        for count in range(1, len(header))
+        if header[count] is not None and header[count].strip() != ""
+    ]
+    series_names = [header[count].strip() for count in series_cols]
+
+    data_rows = []
+    for row in rows[first_index:]:
+        row_date = to_date(row[0])
+        if row_date is None:
+            break
+        data_rows.append([row_date] + [row[count] for count in series_cols])
+
+    frame = polars.DataFrame(
+        data_rows,
+        schema={"Date": polars.Date} | {name: polars.Utf8 for name in series_names},
+        orient="row",
+    )
+
+    return frame.with_columns(
+        polars.col(series_names)
+        .str.replace_all(",", "")
+        .cast(polars.Float64, strict=False)
+    )
+
+
+def update_spending(url: str, history_path: str = SPENDING_HISTORY) -> polars.DataFrame:
+    """
+    Downloads, parses and stores the report at url.  Each report repeats earlier weeks, so
+    revised weeks replace the stored ones
+
+    Args:
+        url: URL of the report, see consumer_spending_xw.find_report_url
+        history_path: Parquet file holding the history
+
+    Returns:
+        History of every stored week
+    """
+    report = read_report(download_report(url))
+    return update_history(parse_spending(report), history_path, "Date")
+
+
+def get_spending_block(
+    history: polars.DataFrame,
+    series: list[str] | None = SPENDING_SERIES,
+    rows: int = SPENDING_ROWS,
+) -> list[list]:
+    """
+    Lays out the latest weeks of the selected series, newest first, for writing to the
+    sheet in one block
+
+    Args:
+        history: Output of update_spending
+        series: Names of the series to include, None for every series
+        rows: Number of weeks to include
+
+    Returns:
+        Header row of Date and the series names, then a row per week
+    """
+    series = series if series is not None else history.columns[1:]
+    frame = history.sort("Date", descending=True).head(rows).select(["Date"] + series)
+
+    return [frame.columns] + [
+        [row[0].isoformat()] + list(row[1:]) for row in frame.rows()
+    ]
@@ -1,36 +1,63 @@
-"""Opens latest building permits"""
+"""Refreshes the latest state building permits"""
 
-import sys
 from datetime import datetime
 
-import requests
 import xlwings
 
+from permits_utilities import get_permits_block, update_permits
+from report_utilities import locate_report
+from xw_utilities import get_refreshed, suspend_app
 
-def run():
-    """Checks for last month's report"""
-    current_month = datetime.now().month
-    current_year = datetime.now().year
+PERMITS_URL = "https://www.census.gov/construction/bps/xls/statemonthly_{year}{month}.xls"  # pylint: disable=line-too-long
+# State permits for a month are published around the 18th of the month after it
+PUBLICATION_LAG = 1
+PUBLICATION_DAY = 18
 
-    # If January, then previous month will be last year
-    if current_month == 1:
-        current_year = current_year - 1
 
-    while current_month > 0:
-        # Ensure leading 0 for dates
-        str_month = str(current_month) if current_month >= 10 else f"0{current_month}"
-        url = f"https://www.census.gov/construction/bps/xls/statemonthly_{current_year}{str_month}.xls"
+def run(sheet_name: str = "Permits"):
+    """
+    Refreshes state building permits from the latest report, written into the workbook in
+    one block
 
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            print(f"Web site exists: {url}")
-            workbook = xlwings.Book.caller()
-            macro = workbook.macro("OpenLink")
-            macro(url)
+    Args:
+        sheet_name: Name of the sheet to write to, added if missing
+    """
+    workbook = xlwings.Book.caller()
 
-            sys.exit(0)
-        else:
-            print(f"Web site does not exist: {url}")
+    with suspend_app(workbook, "state_permits_xw"):
+        block = get_refreshed("permits", get_permits_data)
 
-        current_month = current_month - 1
+        if block is None:
+            print("No report found")
+            return
 
+        if sheet_name not in [sheet.name for sheet in workbook.sheets]:
+            workbook.sheets.add(sheet_name)
+
+        sheet = workbook.sheets[sheet_name]
+        sheet.range("B4").value = block
+        sheet["B2"].value = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+
+def get_permits_data() -> list[list] | None:
+    """
+    Locates the latest report and adds it to the local history
+
+    Returns:
+        Block of cells from get_permits_block, or None if no report was found
+    """
+    url = find_report_url()
+    if url is None:
+        return None
+
+    return get_permits_block(update_permits(url))
+
+
+def find_report_url() -> str | None:
+    """
+    Locates the most recent report, see report_utilities.locate_report
+
+    Returns:
+        URL of the report, or None if no report was found
+    """
+    return locate_report("permits", PERMITS_URL, PUBLICATION_LAG, PUBLICATION_DAY)
@@ -0,0 +1,105 @@
+"""Unittests for commodities_utilities.py"""
+
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import polars
+from xlsxwriter import Workbook
+
+from commodities_utilities import (
+    COMMODITIES_SCHEMA,
+    get_commodities_frame,
+    get_commodity_sections,
+    parse_commodities,
+    write_commodity_sections,
+)
+
+HEADER_ROW = "<th>{}</th><th>Price</th><th>Day</th><th>%</th><th>Weekly</th><th>Monthly</th><th>YoY</th><th>Date</th>"
+
+
+def get_table(category: str, rows: list[list[str]]) -> str:
+    """Returns a table laid out like the commodities page"""
+    body = "".join(
+        "<tr>" + "".join(f"<td>{value}</td>" for value in row) + "</tr>" for row in rows
+    )
+    return f"<table><thead><tr>{HEADER_ROW.format(category)}</tr></thead><tbody>{body}</tbody></table>"
+
+
+PAGE = get_table(
+    "Energy",
+    [
+        ["Crude Oil", "70.1", "0.5", "0.71%", "-1.2%", "3.4%", "-10.0%", "Oct/18"],
+        ["Natural gas", "2.5", "-0.1", "-2%", "5%", "12.5%", "20%", "Oct/18"],
+    ],
+) + get_table(
+    "Metals",
+    [["Gold", "2650", "10", "0.38%", "1%", "4%", "30%", "Oct/18"]],
+)
+
+
+class TestCommodities(unittest.TestCase):
+    """Unit tests for commodities_utilities.py"""
+
+    def get_response(self, status_code: int, headers: dict) -> SimpleNamespace:
+        """Response as returned by fetch_utilities.get"""
+        return SimpleNamespace(
+            status_code=status_code,
+            headers=headers,
+            text=PAGE if status_code == 200 else "",
+            raise_for_status=lambda: None,
+        )
+
+    def test_parse_commodities(self):
+        """Every table is parsed into one typed frame with fractions for percentages"""
+        frame = parse_commodities(PAGE)
+
+        self.assertTrue(frame.schema == polars.Schema(COMMODITIES_SCHEMA))
+        self.assertTrue(frame["Category"].to_list() == ["Energy", "Energy", "Metals"])
+        self.assertTrue(frame["Weekly"].to_list() == [-0.012, 0.05, 0.01])
+
+        sections = get_commodity_sections(frame)
+        self.assertTrue(len(sections) == 2)
+        self.assertTrue(
+            sections[1].columns == ["Metals", "Weekly", "Monthly", "YoY", "Date"]
+        )
+
+    def test_cache(self):
+        """The page is only downloaded again once the TTL expires and it has changed"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with mock.patch(
+                "fetch_utilities.get",
+                return_value=self.get_response(200, {"ETag": '"v1"'}),
+            ) as get:
+                first = get_commodities_frame(cache_dir=temp_dir)
+                second = get_commodities_frame(cache_dir=temp_dir)
+
+            self.assertTrue(get.call_count == 1)
+            self.assertTrue(first.equals(second))
+
+            with mock.patch(
+                "fetch_utilities.get",
+                return_value=self.get_response(304, {}),
+            ) as get:
+                revalidated = get_commodities_frame(ttl=0, cache_dir=temp_dir)
+
+            headers = get.call_args.kwargs["headers"]
+            self.assertTrue(headers["If-None-Match"] == '"v1"')
+            self.assertTrue(revalidated.equals(first))
+
+    def test_write_commodity_sections(self):
+        """Every section is written as a table sharing one set of formats"""
+        sections = get_commodity_sections(parse_commodities(PAGE))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            workbook = Workbook(f"{temp_dir}/Commodities.xlsx")
+            worksheet = workbook.add_worksheet("Commodities")
+            format_count = len(workbook.formats)
+
+            write_commodity_sections(workbook, worksheet, sections, 3, 1)
+
+            self.assertTrue(len(workbook.formats) == format_count + 4)
+            self.assertTrue(len(worksheet.tables) == 2)
+            self.assertTrue(worksheet.tables[1]["range"] == "B8:F9")
+            workbook.close()
@@ -0,0 +1,87 @@
+"""Unittests for fetch_utilities.py"""
+
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+import fetch_utilities
+
+
+class TestFetch(unittest.TestCase):
+    """Unit tests for fetch_utilities.py against a local server that fails on request"""
+
+    def setUp(self):
+        self.statuses: list[int] = []
+        statuses = self.statuses
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers with the next status in statuses, 200 once they run out"""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Writes a small body with the next status"""
+                body = b"report"
+                self.send_response(statuses.pop(0) if len(statuses) > 0 else 200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                """Requests aren't logged"""
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.host_name = f"127.0.0.1:{self.server.server_address[1]}"
+        self.patch = mock.patch.object(fetch_utilities, "BACKOFF", 0)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_retries(self):
+        """Server errors are retried and the outcome recorded in the host's metrics"""
+        self.statuses.extend([503, 502])
+
+        response = fetch_utilities.get(f"http://{self.host_name}/report")
+        self.assertTrue(response.status_code == 200)
+
+        metrics = fetch_utilities.get_metrics()[self.host_name]
+        self.assertTrue(metrics["requests"] == 1)
+        self.assertTrue(metrics["retries"] == 2)
+        self.assertTrue(metrics["bytes"] == 6)
+        self.assertTrue(metrics["failures"] == 0)
+
+        # Other statuses are the caller's to check
+        self.statuses.append(404)
+        response = fetch_utilities.get(f"http://{self.host_name}/report")
+        self.assertTrue(response.status_code == 404)
+
+    def test_circuit_breaker(self):
+        """Failed requests in a row open the breaker, which fails later requests at once"""
+        with socket.socket() as closed:
+            closed.bind(("127.0.0.1", 0))
+            url = f"http://127.0.0.1:{closed.getsockname()[1]}/report"
+
+        for _ in range(fetch_utilities.BREAKER_FAILURES):
+            with self.assertRaises(requests.ConnectionError):
+                fetch_utilities.get(url, retries=0)
+
+        with mock.patch.object(
+            fetch_utilities.Host, "record", side_effect=AssertionError
+        ), self.assertRaises(fetch_utilities.CircuitOpenError):
+            fetch_utilities.get(url)
+
+        _, host = fetch_utilities.get_host(url)
+        host.opened_at -= fetch_utilities.BREAKER_RESET
+
+        # The host isn't listening, so the request let through fails and reopens the breaker
+        with self.assertRaises(requests.ConnectionError):
+            fetch_utilities.get(url, retries=0)
+        with self.assertRaises(fetch_utilities.CircuitOpenError):
+            fetch_utilities.get(url)
@@ -1,9 +1,14 @@
 """Unittests for fmp.py"""
+
 import json
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 import requests
 
+import fmp
 from fmp import (
     check_for_error,
     fmp_balance_sheet_annual,
@@ -17,11 +22,13 @@ from fmp import (
     fmp_sales_per_segment,
     get_data,
     get_data_no_title,
+    get_json,
+    load_fixture,
+    save_fixture,
 )
 
 
 class TestFMP(unittest.TestCase):
-
     """Unit tests for fmp.py"""
 
     TICKERS = ["NVDA"]  # self.TICKERS
@@ -131,3 +138,45 @@ class TestFMP(unittest.TestCase):
         self.assertTrue(check_for_error(requests.get(faulty_url, timeout=5).json()))
         self.assertFalse(check_for_error(fmp_historical_prices(self.GOOD_TICKER)))
 
+    def test_fixtures(self):
+        """Round trips a response through record and replay without the network"""
+        fixture_dir = fmp.FIXTURE_DIR
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with fmp.use_fixtures("", os.path.join(temp_dir, "Fixtures")):
+                data = {
+                    "symbol": "NVDA",
+                    "historical": [{"date": "2023-05-26", "close": 389.02}],
+                }
+
+                save_fixture("historical_prices_NVDA", data)
+                self.assertTrue(
+                    os.path.exists(fmp.fixture_path("historical_prices_NVDA"))
+                )
+                self.assertTrue(fmp.fixture_path("x").endswith(".json.gz"))
+                self.assertTrue(load_fixture("historical_prices_NVDA") == data)
+
+                with fmp.use_fixtures("replay"):
+                    self.assertTrue(
+                        get_json(
+                            "https://unreachable.invalid", "historical_prices_NVDA"
+                        )
+                        == data
+                    )
+                    self.assertTrue(fmp_historical_prices("NVDA") == data)
+
+            self.assertTrue(fmp.FIXTURE_DIR == fixture_dir)
+
+    def test_record_skips_errors(self):
+        """Error payloads are returned but never recorded"""
+        error = {"Error Message": "Invalid API KEY."}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with fmp.use_fixtures("record", os.path.join(temp_dir, "Fixtures")):
+                with mock.patch.object(fmp.fetch_utilities, "get") as get:
+                    get.return_value.json.return_value = error
+                    self.assertTrue(
+                        get_json("https://unreachable.invalid", "error") == error
+                    )
+
+                self.assertFalse(os.path.exists(fmp.fixture_path("error")))
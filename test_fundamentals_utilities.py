@@ -0,0 +1,145 @@
+"""Unittests for fundamentals_utilities.py"""
+
+import contextlib
+import os
+import tempfile
+import time
+import unittest
+
+import fmp
+from fmp import RateLimiter
+from fundamentals_utilities import (
+    get_partition_dir,
+    get_universe,
+    is_complete,
+    load_checkpoint,
+    read_fundamentals,
+    save_checkpoint,
+    scan_fundamentals,
+)
+
+
+class TestFundamentals(unittest.TestCase):
+    """Unit tests for fundamentals_utilities.py.  FMP responses are replayed from
+    recordings written into a temporary fixture directory"""
+
+    TICKERS = ["AAA", "BBB", "CCC", "DDD", "EEE"]  # self.TICKERS
+
+    RATIOS = [
+        ["Date", "ratios.date", False],
+        ["Current Ratio", "ratios.currentRatio", True],
+        ["ROIC", "metrics.roic", True],
+    ]
+
+    def setUp(self):
+        self.exit_stack = contextlib.ExitStack()
+        self.temp_dir = self.exit_stack.enter_context(tempfile.TemporaryDirectory())
+        self.store_dir = os.path.join(self.temp_dir, "Fundamentals")
+        self.exit_stack.enter_context(
+            fmp.use_fixtures("replay", os.path.join(self.temp_dir, "Fixtures"))
+        )
+
+        symbols = [
+            {"symbol": ticker, "exchangeShortName": "NASDAQ", "type": "stock"}
+            for ticker in self.TICKERS
+        ]
+        symbols.append({"symbol": "ETF", "exchangeShortName": "NASDAQ", "type": "etf"})
+        symbols.append({"symbol": "LSE", "exchangeShortName": "LSE", "type": "stock"})
+        fmp.save_fixture("symbol_list", symbols)
+
+        for count, ticker in enumerate(self.TICKERS):
+            dates = ["2023-12-31", "2022-12-31"]
+            fmp.save_fixture(
+                f"ratios_{ticker}",
+                [{"date": day, "currentRatio": count + 1} for day in dates],
+            )
+            fmp.save_fixture(
+                f"key_metrics_{ticker}",
+                [{"date": day, "roic": count / 10} for day in dates],
+            )
+
+        # No data for this one, it should be left out of the store
+        fmp.save_fixture("ratios_EEE", [])
+
+    def tearDown(self):
+        self.exit_stack.close()
+
+    def test_get_universe(self):
+        """Only stocks on the exchange"""
+        self.assertTrue(get_universe("NASDAQ") == self.TICKERS)
+        self.assertTrue(get_universe("LSE") == ["LSE"])
+
+    def test_checkpoint(self):
+        """Round trips the checkpoint"""
+        os.makedirs(self.store_dir)
+        self.assertTrue(load_checkpoint(self.store_dir) is None)
+
+        checkpoint = {"symbols": ["A"], "chunk_size": 1, "completed": [0]}
+        save_checkpoint(self.store_dir, checkpoint)
+        self.assertTrue(load_checkpoint(self.store_dir) == checkpoint)
+        self.assertTrue(is_complete(checkpoint))
+
+        checkpoint = {"symbols": ["A", "B", "C"], "chunk_size": 2, "completed": [1]}
+        self.assertFalse(is_complete(checkpoint))
+
+    def test_scan_fundamentals(self):
+        """Chunks become parquet parts and a second run resumes rather than repeats"""
+        written = scan_fundamentals("NASDAQ", self.store_dir, 2, ratios=self.RATIOS)
+        self.assertTrue(written == 3)
+
+        partition_dir = get_partition_dir(self.store_dir, "NASDAQ")
+        self.assertTrue(load_checkpoint(partition_dir)["completed"] == [0, 1, 2])
+        self.assertTrue(len(os.listdir(partition_dir)) == 3)  # EEE chunk is empty
+
+        frame = read_fundamentals(self.store_dir).collect()
+        self.assertTrue(frame.shape[0] == 4 * 2 * 2)
+        self.assertTrue(
+            sorted(frame.get_column("ticker").unique().to_list()) == self.TICKERS[:4]
+        )
+        self.assertTrue(frame.get_column("exchange").unique().to_list() == ["NASDAQ"])
+
+        # Simulate an interruption during the second chunk
+        checkpoint = load_checkpoint(partition_dir)
+        checkpoint["completed"] = [0, 2]
+        save_checkpoint(partition_dir, checkpoint)
+        os.remove(os.path.join(partition_dir, "part-00001.parquet"))
+
+        written = scan_fundamentals("NASDAQ", self.store_dir, 2, ratios=self.RATIOS)
+        self.assertTrue(written == 1)
+        self.assertTrue(read_fundamentals(self.store_dir).collect().shape[0] == 16)
+        self.assertTrue(fmp.RATE_LIMITER is None)
+
+        # The scan is complete, so the next run takes a fresh snapshot
+        written = scan_fundamentals("NASDAQ", self.store_dir, 2, ratios=self.RATIOS)
+        self.assertTrue(written == 3)
+        self.assertTrue(read_fundamentals(self.store_dir).collect().shape[0] == 16)
+
+        # Refresh restarts an interrupted scan rather than resuming it
+        checkpoint = load_checkpoint(partition_dir)
+        checkpoint["completed"] = [0]
+        save_checkpoint(partition_dir, checkpoint)
+        written = scan_fundamentals(
+            "NASDAQ", self.store_dir, 2, ratios=self.RATIOS, refresh=True
+        )
+        self.assertTrue(written == 3)
+
+    def test_scan_failed_ticker(self):
+        """A ticker whose request fails is left out rather than stopping the scan"""
+        os.remove(fmp.fixture_path("key_metrics_CCC"))
+
+        written = scan_fundamentals("NASDAQ", self.store_dir, 2, ratios=self.RATIOS)
+        self.assertTrue(written == 3)
+
+        frame = read_fundamentals(self.store_dir).collect()
+        self.assertTrue(
+            sorted(frame.get_column("ticker").unique().to_list())
+            == ["AAA", "BBB", "DDD"]
+        )
+
+    def test_rate_limiter(self):
+        """Calls are spaced by the interval"""
+        limiter = RateLimiter(60 * 50)  # 20ms apart
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.wait()
+        self.assertTrue(time.monotonic() - start >= 0.06)
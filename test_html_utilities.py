@@ -0,0 +1,73 @@
+"""Unittests for html_utilities.py"""
+
+import io
+import unittest
+
+import pandas
+import polars
+
+from html_utilities import benchmark_read_tables, read_table, read_tables
+
+
+def get_page(table_count: int, row_count: int) -> str:
+    """Returns a page of tables laid out like the scraped sites, with text between them"""
+    tables = []
+    for table in range(table_count):
+        rows = "".join(
+            f"<tr><td>Name &amp; {table}-{row}</td><td>{row * 1000.5:,.2f}</td><td>{row}%</td></tr>"
+            for row in range(row_count)
+        )
+        tables.append(
+            f"<p>Section {table}</p><table id='table{table}'><thead><tr><th>Name</th>"
+            f"<th>Price</th><th>Change</th></tr></thead><tbody>{rows}</tbody></table>"
+        )
+
+    return f"<html><body>{''.join(tables)}</body></html>"
+
+
+class TestHTML(unittest.TestCase):
+    """Unit tests for html_utilities.py"""
+
+    def test_read_tables(self):
+        """Every table matches read_html once the declared schema is applied"""
+        page = get_page(3, 5)
+        schema = {"Price": polars.Float64}
+
+        frames = read_tables(page, schema=schema)
+        expected = [
+            polars.from_pandas(frame) for frame in pandas.read_html(io.StringIO(page))
+        ]
+
+        self.assertTrue(len(frames) == 3)
+        for frame, expected_frame in zip(frames, expected):
+            self.assertTrue(frame.equals(expected_frame))
+
+    def test_select(self):
+        """Tables are selected by position or id, in the order asked for"""
+        page = get_page(3, 2)
+
+        frames = read_tables(page, [2, "table0"])
+        self.assertTrue(frames[0]["Name"][0] == "Name & 2-0")
+        self.assertTrue(frames[1]["Name"][0] == "Name & 0-0")
+
+        with self.assertRaises(ValueError):
+            read_table(page, "missing")
+
+    def test_early_stop(self):
+        """Nothing after the selected table is read from a stream"""
+
+        def get_chunks():
+            yield get_page(1, 2)
+            raise AssertionError("Read past the selected table")
+
+        frame = read_table(get_chunks(), 0)
+        self.assertTrue(frame.shape == (2, 3))
+
+        # The same table selected by position and id still stops the parser
+        frames = read_tables(get_chunks(), [0, "table0"])
+        self.assertTrue(frames[0].equals(frames[1]))
+
+    def test_benchmark(self):
+        """Both parsers are timed"""
+        timings = benchmark_read_tables(get_page(2, 5), [0], 1)
+        self.assertTrue(list(timings) == ["read_tables", "read_html"])
@@ -0,0 +1,68 @@
+"""Import time budgets for the xlwings entry points"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+# Milliseconds each entry point may add to the interpreter started by RunPython.  xlwings
+# is imported first, as RunPython always loads it, so only the entry point's own imports
+# count against the budget
+IMPORT_BUDGETS = {
+    "screener_xw": 80,
+    "sector_xw": 20,
+    "constituent_xw": 30,
+    "commodities_xw": 40,
+    "state_permits_xw": 20,
+    "consumer_spending_xw": 20,
+}
+RUNS = 3  # The fastest of these runs is compared with the budget
+
+
+def get_import_times(module: str) -> dict[str, float]:
+    """
+    Imports module in a fresh interpreter with python -X importtime
+
+    Args:
+        module: Name of the module to import
+
+    Returns:
+        Dictionary of every module imported after xlwings to its cumulative milliseconds
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import xlwings; import {module}"],
+        capture_output=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        text=True,
+    ).stderr.splitlines()
+
+    times = {}
+    for line in output[[line.endswith("| xlwings") for line in output].index(True) :]:
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1000
+
+    return times
+
+
+class TestImportTimes(unittest.TestCase):
+    """Fails when an entry point takes longer to import than its budget"""
+
+    def test_budgets(self):
+        """Every entry point imports within its budget"""
+        for module, budget in IMPORT_BUDGETS.items():
+            with self.subTest(module=module):
+                import_time = min(get_import_times(module)[module] for _ in range(RUNS))
+                self.assertTrue(
+                    import_time <= budget,
+                    f"{module} took {import_time:.1f}ms against a {budget}ms budget",
+                )
+
+    def test_lazy_imports(self):
+        """requests and xlsxwriter.workbook are only imported where they are needed"""
+        for module in IMPORT_BUDGETS:
+            with self.subTest(module=module):
+                import_times = get_import_times(module)
+                self.assertTrue("requests" not in import_times)
+
+        self.assertTrue("xlsxwriter" not in get_import_times("commodities_xw"))
@@ -0,0 +1,104 @@
+"""Unittests for permits_utilities.py and spending_utilities.py"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import polars
+
+from permits_utilities import (
+    get_permits_block,
+    get_report_month,
+    parse_permits,
+    update_permits,
+)
+from report_utilities import update_history
+from spending_utilities import get_spending_block, parse_spending
+
+
+def get_report(rows: list[list]) -> polars.DataFrame:
+    """Returns rows as read_report does, every cell as text"""
+    width = max(len(row) for row in rows)
+    return polars.DataFrame(
+        [row + [None] * (width - len(row)) for row in rows],
+        schema={f"column_{count + 1}": polars.Utf8 for count in range(width)},
+        orient="row",
+    )
+
+
+def get_permits_report(total: int) -> polars.DataFrame:
+    """Returns a permits report with a title, two header rows, states and a note"""
+    return get_report(
+        [
+            ["New Privately-Owned Housing Units Authorized", None, None],
+            [None, "Total", "1 Unit"],
+            ["Location", None, None],
+            ["United States", f"{total * 3:,}", "2,000"],
+            ["Alabama", str(total), "100"],
+            ["Wyoming", str(total * 2), "(S)"],
+            ["Note: data are not seasonally adjusted", None, None],
+        ]
+    )
+
+
+class TestReports(unittest.TestCase):
+    """Unit tests for permits_utilities.py and spending_utilities.py"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.history_path = os.path.join(self.temp_dir.name, "permits.parquet")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_permits(self):
+        """State rows are typed and title, header and note rows are skipped"""
+        frame = parse_permits(get_permits_report(1000), date(2025, 12, 1))
+
+        self.assertTrue(frame.columns == ["State", "Month", "Total", "1 Unit"])
+        self.assertTrue(frame["Total"].to_list() == [3000, 1000, 2000])
+        self.assertTrue(frame["1 Unit"].to_list() == [2000, 100, None])
+        self.assertTrue(frame["Month"].dtype == polars.Date)
+
+        with self.assertRaises(ValueError):
+            parse_permits(get_report([["No table"]]), date(2025, 12, 1))
+
+    def test_permits_history(self):
+        """Months accumulate, a revised month replaces the stored one"""
+        for month, total in [(11, 900), (12, 1000), (11, 950)]:
+            frame = parse_permits(get_permits_report(total), date(2025, month, 1))
+            history = update_history(frame, self.history_path, "Month")
+
+        self.assertTrue(history.height == 6)
+
+        block = get_permits_block(history)
+        self.assertTrue(block[0] == ["State", "Dec 2025", "Nov 2025"])
+        self.assertTrue(block[2] == ["Alabama", 1000, 950])
+
+        # A month already stored isn't downloaded again
+        url = "https://www.census.gov/construction/bps/xls/statemonthly_202512.xls"
+        self.assertTrue(get_report_month(url) == date(2025, 12, 1))
+        self.assertTrue(update_permits(url, self.history_path).equals(history))
+
+    def test_parse_spending(self):
+        """Weeks are read from ISO dates or Excel serials until the table ends"""
+        report = get_report(
+            [
+                ["Weekly Event Study of Spending"],
+                ["Week", "Total", "Restaurants"],
+                ["2025-12-06 00:00:00", "1.5", "-2"],
+                ["46004", "2.5", "3"],
+                ["Source: BEA"],
+            ]
+        )
+        frame = parse_spending(report)
+
+        self.assertTrue(frame.columns == ["Date", "Total", "Restaurants"])
+        self.assertTrue(
+            frame["Date"].to_list() == [date(2025, 12, 6), date(2025, 12, 13)]
+        )
+        self.assertTrue(frame["Restaurants"].to_list() == [-2.0, 3.0])
+
+        block = get_spending_block(frame, ["Total"], 1)
+        self.assertTrue(block == [["Date", "Total"], ["2025-12-13", 2.5]])
@@ -0,0 +1,147 @@
+"""Unittests for press_archive.py"""
+
+import os
+import tempfile
+import unittest
+
+import polars
+
+import fmp
+from press_archive import (
+    PressArchive,
+    archive_press_releases,
+    fetch_press_releases,
+    tokenize,
+)
+
+
+class TestPressArchive(unittest.TestCase):
+    """Unit tests for press_archive.py"""
+
+    RELEASES = [
+        {
+            "symbol": "NVDA",
+            "date": "2023-08-24 17:00:00",
+            "title": "NVIDIA ANNOUNCES SHARE BUYBACK",
+            "text": "The board approved a $25 billion buyback program.",
+        },
+        {
+            "symbol": "NVDA",
+            "date": "2021-05-21 17:00:00",
+            "title": "NVIDIA ANNOUNCES STOCK SPLIT",
+            "text": "A four-for-one stock split was approved.",
+        },
+        {
+            "symbol": "AAPL",
+            "date": "2023-05-04 16:30:00",
+            "title": "APPLE REPORTS SECOND QUARTER RESULTS",
+            "text": "The board authorised an additional $90 billion share buyback.",
+        },
+    ]
+
+    def test_tokenize(self):
+        """Lower cases and splits on anything other than letters and numbers"""
+        self.assertTrue(
+            tokenize("Four-for-One SPLIT") == {"four", "for", "one", "split"}
+        )
+        self.assertTrue(tokenize(None) == set())  # type: ignore
+
+    def test_search(self):
+        """Filters by every term, symbol and date range"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive = PressArchive(temp_dir)
+            self.assertTrue(archive.add_releases(self.RELEASES) == 3)
+            self.assertTrue(archive.add_releases(self.RELEASES) == 0)
+
+            frame = archive.search("buyback")
+            self.assertTrue(frame.columns == ["Symbol", "Date", "Title"])
+            self.assertTrue(frame.get_column("Symbol").to_list() == ["NVDA", "AAPL"])
+
+            frame = archive.search(["Buyback", "board"], symbols=["aapl"])
+            self.assertTrue(frame.get_column("Symbol").to_list() == ["AAPL"])
+
+            frame = archive.search("approved", start="2022-01-01")
+            self.assertTrue(
+                frame.get_column("Date").to_list() == ["2023-08-24 17:00:00"]
+            )
+
+            frame = archive.search("approved", end="2021-05-21")
+            self.assertTrue(
+                frame.get_column("Date").to_list() == ["2021-05-21 17:00:00"]
+            )
+
+            self.assertTrue(archive.search("buyback split").shape[0] == 0)
+            self.assertTrue(archive.search("missing").shape[0] == 0)
+            self.assertTrue(archive.latest_date("NVDA") == "2023-08-24 17:00:00")
+            self.assertTrue(archive.latest_date("MSFT") is None)
+
+    def test_persistence(self):
+        """Saved parts reload into the same index and new releases append a new part"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive = PressArchive(temp_dir)
+            archive.add_releases(self.RELEASES[:2])
+            archive.save()
+            archive.add_releases(self.RELEASES[2:])
+            archive.save()
+
+            reloaded = PressArchive(temp_dir)
+            self.assertTrue(len(reloaded) == 3)
+            self.assertTrue(reloaded.add_releases(self.RELEASES) == 0)
+            self.assertTrue(reloaded.search("buyback").shape[0] == 2)
+
+            press_frame = polars.DataFrame(self.RELEASES).rename(
+                {"symbol": "Symbol", "date": "Date", "title": "Title"}
+            )
+            joined = press_frame.join(
+                reloaded.search("split"), on=["Symbol", "Date", "Title"], how="semi"
+            )
+            self.assertTrue(joined.item(0, 2) == "NVIDIA ANNOUNCES STOCK SPLIT")
+
+    def test_fetch_press_releases(self):
+        """Backfills pages in parallel, then only requests releases past the high-water mark"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with fmp.use_fixtures("replay", os.path.join(temp_dir, "Fixtures")):
+                pages = [
+                    [self.RELEASES[0], self.RELEASES[1]],
+                    [
+                        {
+                            "symbol": "NVDA",
+                            "date": "2020-01-02 17:00:00",
+                            "title": "NVIDIA OLD NEWS",
+                            "text": "",
+                        }
+                    ],
+                    [],
+                ]
+                fmp.save_fixture("press_releases_NVDA", pages[0])
+                fmp.save_fixture("press_releases_NVDA_1", pages[1])
+                fmp.save_fixture("press_releases_NVDA_2", pages[2])
+
+                archive = PressArchive(os.path.join(temp_dir, "Press"))
+                releases = fetch_press_releases("NVDA", archive, depth=3)
+                self.assertTrue(len(releases) == 3)
+                self.assertTrue(archive.latest_date("NVDA") == "2023-08-24 17:00:00")
+
+                # Page 0 now holds one release newer than the high-water mark
+                newest = {
+                    "symbol": "NVDA",
+                    "date": "2023-11-21 16:20:00",
+                    "title": "NVIDIA ANNOUNCES THIRD QUARTER RESULTS",
+                    "text": "",
+                }
+                fmp.save_fixture("press_releases_NVDA", [newest] + pages[0])
+                os.remove(fmp.fixture_path("press_releases_NVDA_1"))
+
+                releases = fetch_press_releases("NVDA", archive, depth=3)
+                self.assertTrue(releases == [newest, self.RELEASES[0]])
+                self.assertTrue(len(archive.releases("NVDA")) == 4)
+                self.assertTrue(archive.releases("NVDA")[0] == newest)
+
+                # A second release with the same timestamp as the high-water mark
+                same_time = dict(newest, title="NVIDIA ANNOUNCES DIVIDEND")
+                fmp.save_fixture(
+                    "press_releases_NVDA", [same_time, newest] + pages[0][1:]
+                )
+                self.assertTrue(archive_press_releases(["NVDA"], archive, 3) == 1)
+                self.assertTrue(len(archive.releases("NVDA")) == 5)
+                self.assertTrue(archive_press_releases(["NVDA"], archive, 3) == 0)
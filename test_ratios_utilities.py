@@ -0,0 +1,188 @@
+"""Unittests for ratios_utilities.py"""
+
+import contextlib
+import os
+import tempfile
+import unittest
+
+import polars
+import xlsxwriter
+
+import fmp
+from ratios_utilities import (
+    compile_ratios,
+    get_panel_frame,
+    get_plan_frame,
+    get_profile_frame,
+    get_ratios_frame,
+    pivot_panel,
+    prefetch_ratio_data,
+    safe_divide,
+    write_panel,
+)
+
+
+class TestRatios(unittest.TestCase):
+    """Unit tests for ratios_utilities.py.  FMP responses are replayed from recordings
+    written into a temporary fixture directory"""
+
+    TICKERS = ["NVDA", "AMD"]  # self.TICKERS
+
+    RATIOS = [
+        ["Date", "ratios.date", False],
+        ["Current Ratio", "ratios.currentRatio", True],
+        ["ROIC", "metrics.roic", True],
+        [
+            "Working Capital (M)",
+            (polars.col("metrics.workingCapital") / 1_000_000).cast(polars.Int64),
+            False,
+        ],
+    ]
+
+    def setUp(self):
+        self.exit_stack = contextlib.ExitStack()
+        self.temp_dir = self.exit_stack.enter_context(tempfile.TemporaryDirectory())
+        self.exit_stack.enter_context(
+            fmp.use_fixtures("replay", os.path.join(self.temp_dir, "Fixtures"))
+        )
+
+        for ticker in self.TICKERS:
+            dates = ["2023-01-29", "2022-01-30"]
+            fmp.save_fixture(
+                f"ratios_{ticker}",
+                [{"date": day, "currentRatio": 3.5152} for day in dates],
+            )
+            fmp.save_fixture(
+                f"key_metrics_{ticker}",
+                [
+                    {"date": day, "roic": 0.1, "workingCapital": 12_000_000}
+                    for day in dates
+                ],
+            )
+            fmp.save_fixture(
+                f"balance_sheet_annual_{ticker}",
+                [{"date": day, "totalAssets": 48_000_000} for day in dates],
+            )
+            fmp.save_fixture(
+                f"company_profile_{ticker}",
+                [
+                    {
+                        "symbol": ticker,
+                        "exchangeShortName": "NASDAQ",
+                        "industry": "Semiconductors",
+                        "fullTimeEmployees": "26196",
+                        "website": "https://example.com",
+                        "description": "Designs chips.",
+                    }
+                ],
+            )
+
+    def tearDown(self):
+        self.exit_stack.close()
+
+    def test_prefetch_ratio_data(self):
+        """Every endpoint is gathered for every ticker"""
+        data = prefetch_ratio_data(self.TICKERS)
+        self.assertTrue(sorted(data) == ["AMD", "NVDA"])
+        self.assertTrue(
+            sorted(data["NVDA"]) == ["balance", "metrics", "profile", "ratios"]
+        )
+        self.assertTrue(data["AMD"]["profile"]["symbol"] == "AMD")
+
+        data = prefetch_ratio_data(self.TICKERS, ["ratios"], workers=1)
+        self.assertTrue(list(data["NVDA"]) == ["ratios"])
+        self.assertTrue(data["NVDA"]["ratios"][0]["currentRatio"] == 3.5152)
+
+    def test_compile_ratios(self):
+        """Only the endpoints referenced by the spec end up in the plan"""
+        plan = compile_ratios(self.RATIOS)
+        self.assertTrue(plan["endpoints"] == ["ratios", "metrics"])
+        self.assertTrue(plan["keys"]["ratios"] == ["date", "currentRatio"])
+        self.assertTrue(plan["keys"]["metrics"] == ["roic", "workingCapital"])
+        self.assertTrue(len(plan["exprs"]) == 4)
+
+        plan = compile_ratios(
+            self.RATIOS
+            + [
+                [
+                    "Working Capital to Assets",
+                    safe_divide(
+                        polars.col("metrics.workingCapital"),
+                        polars.col("balance.totalAssets"),
+                    ),
+                    True,
+                ]
+            ]
+        )
+        self.assertTrue(plan["endpoints"] == ["ratios", "metrics", "balance"])
+
+        with self.assertRaises(ValueError):
+            compile_ratios([["Bad", "income.revenue", True]])
+
+    def test_get_plan_frame(self):
+        """Derived columns are evaluated and short endpoints are padded"""
+        plan = compile_ratios(
+            [
+                ["Current Ratio", "ratios.currentRatio", True],
+                [
+                    "Working Capital to Assets",
+                    safe_divide(
+                        polars.col("metrics.workingCapital"),
+                        polars.col("balance.totalAssets"),
+                    ),
+                    True,
+                ],
+            ]
+        )
+        data = {
+            "ratios": [{"currentRatio": 1.234}, {"currentRatio": 2}],
+            "metrics": [{"workingCapital": 10}, {"workingCapital": 5}],
+            "balance": [{"totalAssets": 30}],
+        }
+        frame = get_plan_frame(plan, data)
+        self.assertTrue(frame.get_column("Current Ratio").to_list() == [1.23, 2.0])
+        self.assertTrue(
+            frame.get_column("Working Capital to Assets").to_list() == [0.33, 0.0]
+        )
+
+    def test_get_ratios_frame(self):
+        """One row per ratio, periods oldest to newest, and nothing else is requested"""
+        plan = compile_ratios(self.RATIOS)
+        frame = get_ratios_frame("NVDA", plan)
+        self.assertTrue(frame.columns == ["NVDA", "1", "2"])
+        self.assertTrue(frame.get_column("NVDA").to_list()[0] == "Date")
+        self.assertTrue(frame.row(0) == ("Date", "2022-01-30", "2023-01-29"))
+        self.assertTrue(frame.row(1)[1] == "3.52")
+        self.assertTrue(frame.row(3)[1] == "12")
+
+        os.remove(fmp.fixture_path("balance_sheet_annual_NVDA"))
+        self.assertTrue(get_ratios_frame("NVDA", plan).shape == (4, 3))
+
+    def test_panel(self):
+        """All tickers land in one long frame that pivots into one table"""
+        plan = compile_ratios(self.RATIOS)
+        data = prefetch_ratio_data(self.TICKERS)
+
+        panel_frame = get_panel_frame(self.TICKERS, plan, data)
+        self.assertTrue(
+            panel_frame.columns == ["ticker", "metric", "period", "date", "value"]
+        )
+        self.assertTrue(panel_frame.shape[0] == 2 * 3 * 2)
+        self.assertTrue(panel_frame.get_column("value").dtype == polars.Float64)
+
+        wide_frame = pivot_panel(panel_frame)
+        self.assertTrue(wide_frame.columns == ["Ticker", "Metric", "2022", "2023"])
+        self.assertTrue(wide_frame.shape[0] == 6)
+        self.assertTrue(wide_frame.row(0) == ("NVDA", "Current Ratio", 3.52, 3.52))
+        self.assertTrue(wide_frame.row(5) == ("AMD", "Working Capital (M)", 12, 12))
+
+        profile_frame = get_profile_frame(self.TICKERS, data)
+        self.assertTrue(profile_frame.get_column("Employees").to_list()[0] == 26196)
+
+        workbook = xlsxwriter.Workbook(os.path.join(self.temp_dir, "Ratios.xlsx"))
+        workbook.add_worksheet("Ratios")
+        write_panel(workbook, "Ratios", wide_frame, profile_frame)
+        workbook.close()
+
+        with self.assertRaises(ValueError):
+            get_panel_frame(self.TICKERS, compile_ratios(self.RATIOS[1:]), data)
@@ -0,0 +1,94 @@
+"""Unittests for refresh_utilities.py"""
+
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import sector_xw
+import xw_utilities
+from refresh_utilities import RefreshService, create_server
+from xw_utilities import get_refreshed
+
+
+class Sheet(dict):
+    """Stands in for an xlwings sheet, as the entry points index it by address as well as
+    calling range.  Each range is a plain object recording the value written to it"""
+
+    def __missing__(self, address: str) -> SimpleNamespace:
+        self[address] = SimpleNamespace(value=None, select=lambda: None)
+        return self[address]
+
+    def range(self, address: str) -> SimpleNamespace:
+        """Returns the range at address"""
+        return self[address]
+
+
+class TestRefresh(unittest.TestCase):
+    """Unit tests for refresh_utilities.py.  Excel is stood in for by plain objects holding
+    the application settings and a Sheet"""
+
+    def setUp(self):
+        self.calls = 0
+        self.service = RefreshService({"sector": (self.get_rows, 300)})
+        self.server = create_server(self.service, "127.0.0.1", 0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_workbook(self, sheet_name: str) -> SimpleNamespace:
+        """Workbook with an app in Excel's default state and a single empty sheet"""
+        app = SimpleNamespace(
+            screen_updating=True, enable_events=True, calculation="automatic"
+        )
+        return SimpleNamespace(app=app, sheets={sheet_name: Sheet()})
+
+    def get_rows(self) -> list[list]:
+        """Sector rows, counting how often they are produced"""
+        self.calls += 1
+        return [["Semiconductors", 0.01, 0.2, 0.5, 60]]
+
+    def test_service(self):
+        """Data is produced once and served until it is due to go stale"""
+        first = self.service.get("sector")
+        self.assertTrue(self.service.get("sector") is first)
+        self.assertTrue(self.calls == 1)
+
+        self.service.refresh_all(ahead=300)
+        self.assertTrue(self.calls == 2)
+
+    def test_client(self):
+        """Entry points read from the service, or refresh locally without it"""
+        port = self.server.server_address[1]
+
+        with mock.patch.object(xw_utilities, "REFRESH_PORT", port):
+            rows = get_refreshed("sector", lambda: [])
+            self.assertTrue(rows == self.get_rows())
+
+        self.server.shutdown()
+        self.server.server_close()
+
+        with mock.patch.object(xw_utilities, "REFRESH_PORT", port):
+            self.assertTrue(get_refreshed("sector", lambda: ["local"]) == ["local"])
+
+    def test_sector_run(self):
+        """sector_xw writes the service's rows to both regions in one block each"""
+        book = self.get_workbook("Sectors")
+        port = self.server.server_address[1]
+
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch.object(
+            sector_xw.xlwings.Book, "caller", return_value=book
+        ), mock.patch.object(xw_utilities, "REFRESH_PORT", port), mock.patch.object(
+            xw_utilities, "RUN_TIMES_PATH", os.path.join(temp_dir, "run_times.csv")
+        ):
+            sector_xw.run("Sectors")
+
+        sheet = book.sheets["Sectors"]
+        self.assertTrue(sheet["B4"].value == self.get_rows())
+        self.assertTrue(sheet["K4"].value == self.get_rows())
+        self.assertTrue(book.app.calculation == "automatic")
@@ -0,0 +1,69 @@
+"""Unittests for report_utilities.py"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import report_utilities
+from report_utilities import get_candidate_months, locate_report
+
+URL_FORMAT = "https://example.com/report_{year}{month}.xls"
+
+
+class TestReports(unittest.TestCase):
+    """Unit tests for report_utilities.py.  Probes are answered from a set of URLs"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "reports.json")
+        self.published = {
+            URL_FORMAT.format(year=2025, month="11"),
+            URL_FORMAT.format(year=2025, month="12"),
+        }
+        self.probed: list[str] = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def probe(self, url: str) -> bool:
+        """Answers a probe, recording the URL"""
+        self.probed.append(url)
+        return url in self.published
+
+    def locate(self, today: date) -> str | None:
+        """Locates the report on today with probes answered by self.probe"""
+        with mock.patch.object(report_utilities, "probe", self.probe):
+            return locate_report("test", URL_FORMAT, 1, 18, today, self.cache_path)
+
+    def test_candidate_months(self):
+        """Candidates run back into the previous year, newest first"""
+        months = get_candidate_months(date(2026, 2, 10))
+
+        self.assertTrue(len(months) == 13)
+        self.assertTrue(months[0] == date(2026, 2, 1))
+        self.assertTrue(months[2] == date(2025, 12, 1))
+        self.assertTrue(months[-1] == date(2025, 2, 1))
+
+    def test_locate_report(self):
+        """The newest report is found and reused until the next one is due"""
+        expected = URL_FORMAT.format(year=2025, month="12")
+
+        self.assertTrue(self.locate(date(2026, 1, 20)) == expected)
+        self.assertTrue(len(self.probed) == 13)
+
+        # December's report is followed by January's around 18 February
+        self.assertTrue(self.locate(date(2026, 2, 17)) == expected)
+        self.assertTrue(len(self.probed) == 13)
+
+        self.published.add(URL_FORMAT.format(year=2026, month="01"))
+        self.assertTrue(self.locate(date(2026, 2, 18)).endswith("202601.xls"))
+        self.assertTrue(len(self.probed) == 26)
+
+    def test_no_report(self):
+        """Nothing is cached when no report exists"""
+        self.published.clear()
+
+        self.assertTrue(self.locate(date(2026, 1, 20)) is None)
+        self.assertTrue(not os.path.exists(self.cache_path))
@@ -0,0 +1,199 @@
+"""Unittests for screener_utilities.py"""
+
+import os
+import tempfile
+import unittest
+import zipfile
+
+import numpy
+import polars
+
+from screener_utilities import (
+    LAYOUT_COLUMNS,
+    PEG_CHECKS,
+    RANKINGS,
+    check_layout,
+    get_column_index,
+    group_widths,
+    growth_check,
+    join_addresses,
+    peg_check,
+    percentile_ranks,
+    process_screener_exports,
+    rank_screener,
+    read_screener_export,
+    shift_column,
+    to_cells,
+    to_floats,
+    validate_screener,
+)
+
+
+def get_export_frame() -> polars.DataFrame:
+    """Two row export with a wrong Revenue Growth FY1 on the second row"""
+    columns = [f"Info {count}" for count in range(11)] + LAYOUT_COLUMNS
+    rows = []
+
+    for growth in ["0.1", "0.5"]:
+        row = {name: "1" for name in columns}
+        row.update(
+            {
+                "Revenue FY0 - Previous Financial Year": "100",
+                "Revenue FY1 - Current Financial Year": "110",
+                "Revenue FY2 - Next Financial Year": "121",
+                "Revenue FY3": "133.1",
+                "Revenue Growth FY1": growth,
+                "Revenue Growth FY2": "0.1",
+                "Revenue Growth FY3": "0.1",
+                "EPS FY0 - Previous Financial Year": "NULL",
+                "EPS FY1 - Current Financial Year": "1",
+                "EPS FY2 - Next Financial Year": "2",
+                "EPS FY3": "4",
+                "Next EPS Report Date": "2024-05-01",
+            }
+        )
+        row.update({pe_col: "20" for pe_col, _, _ in PEG_CHECKS})
+        row.update({peg_col: "0.2" for _, _, peg_col in PEG_CHECKS})
+        rows.append(row)
+
+    return polars.DataFrame(rows)
+
+
+class TestScreener(unittest.TestCase):
+    """Unit tests for screener_utilities.py"""
+
+    def test_to_floats(self):
+        """Screener placeholders become NaN"""
+        values = to_floats([1, "2.5", "NULL", "NaN", None])
+        self.assertTrue(values[0] == 1 and values[1] == 2.5)
+        self.assertTrue(numpy.isnan(values[2:]).all())
+
+    def test_growth_check(self):
+        """Sign changes are capped, wrong growth is flagged and placeholders skipped"""
+        old = to_floats([100, -50, 50, -100, 100, "NULL", 100, 100])
+        new = to_floats([110, 25, -25, -50, 110, 5, 110, 120])
+        calc = to_floats([0.1, 1.5, -1.5, -0.5, 0.2, 9, 0.10004, 0.2])
+
+        corrections, errors = growth_check(old, new, calc)
+        self.assertTrue(corrections[1] == 1)
+        self.assertTrue(corrections[2] == -1)
+        self.assertTrue(numpy.isnan(corrections[[0, 3, 4, 5, 6, 7]]).all())
+
+        # Both negative: (|new| - |old|) / old = (50 - 100) / -100 = 0.5, sheet has -0.5
+        self.assertTrue(errors.tolist() == [0, 0, 0, 1, 1, 0, 0, 0])
+
+    def test_peg_check(self):
+        """A wrong PEG with 100% EG is re-calculated, otherwise flagged"""
+        pe_ratio = to_floats([20, 30, 40, "NaN"])
+        earnings_growth = to_floats([0.2, 1, 0.5, 0.1])
+        peg = to_floats([1, 5, 9, 1])
+
+        corrections, errors = peg_check(pe_ratio, earnings_growth, peg)
+        self.assertTrue(corrections[1] == 30)
+        self.assertTrue(numpy.isnan(corrections[[0, 2, 3]]).all())
+        self.assertTrue(errors.tolist() == [False, False, True, False])
+
+    def test_check_layout(self):
+        """Moved or renamed columns are reported"""
+        columns = get_export_frame().columns
+        self.assertTrue(check_layout(columns) == [])
+
+        columns[11] = "Market Capitalisation"
+        errors = check_layout(columns[:-1])
+        self.assertTrue(len(errors) == 2)
+        self.assertTrue("Market Cap" in errors[0])
+
+        # A reordered screener is fine
+        self.assertTrue(check_layout(list(reversed(get_export_frame().columns))) == [])
+
+    def test_get_column_index(self):
+        """Headers map to letters, blanks are skipped and the first repeat wins"""
+        index = get_column_index(["Ticker", None, "PE FY1", "Ticker"])
+        self.assertTrue(index == {"Ticker": "A", "PE FY1": "C"})
+
+    def test_validate_screener(self):
+        """Export columns are checked by name"""
+        values, errors = validate_screener(get_export_frame())
+        self.assertTrue(errors["Revenue Growth FY1"].tolist() == [False, True])
+        self.assertTrue(not errors["PEG F1"].any())
+        self.assertTrue(values["Revenue Growth FY1"][0] == 0.1)
+
+    def test_process_screener_exports(self):
+        """Exports are written as formatted workbooks with problems reported"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for name in ["US", "UK"]:
+                path = os.path.join(temp_dir, f"{name}.csv")
+                get_export_frame().write_csv(path)
+                paths.append(path)
+
+            self.assertTrue(read_screener_export(paths[0]).dtypes[0] == polars.Utf8)
+
+            output_dir = os.path.join(temp_dir, "Output")
+            results = process_screener_exports(paths, output_dir, 2)
+            self.assertTrue(results[paths[0]] == ["Revenue Growth FY1 row 3 is wrong"])
+
+            output = os.path.join(output_dir, "UK_checked.xlsx")
+            with zipfile.ZipFile(output) as xlsx:
+                sheet = xlsx.read("xl/worksheets/sheet1.xml").decode()
+
+            self.assertTrue(sheet.count("<colorScale>") == 20)
+            self.assertTrue("AVERAGE(S2:S3)" in sheet)  # Spacer column at R
+
+    def test_insert_columns(self):
+        """Columns shift right past every column inserted before them"""
+        insert_columns = ["R", "U", "Z", "AC", "AF", "AJ", "AP"]
+
+        self.assertTrue(shift_column("Q", insert_columns) == "Q")
+        self.assertTrue(shift_column("R", insert_columns) == "S")
+        self.assertTrue(shift_column("AI", insert_columns) == "AN")
+        self.assertTrue(shift_column("AP", insert_columns) == "AW")
+
+    def test_union_addresses(self):
+        """Unions stay under Excel's address length limit"""
+        addresses = join_addresses([f"R{row}" for row in range(100)])
+        self.assertTrue(len(addresses) == 2)
+        self.assertTrue(all(len(address) <= 255 for address in addresses))
+        self.assertTrue(",".join(addresses).count("R") == 100)
+
+        groups = group_widths({"A": 10, "B": 12, "C": 10})
+        self.assertTrue(groups == {10: ["A:A,C:C"], 12: ["B:B"]})
+
+    def test_percentile_ranks(self):
+        """Ties share a rank, missing values are skipped and low is best where asked"""
+        values = to_floats([10, "NULL", 30, 20, 20])
+        ranks = percentile_ranks(values, True)
+        self.assertTrue(ranks[0] == 0 and ranks[2] == 1)
+        self.assertTrue(ranks[3] == ranks[4] == 0.5)
+        self.assertTrue(numpy.isnan(ranks[1]))
+
+        ranks = percentile_ranks(to_floats([10, -5, 30, "NaN"]), False)
+        self.assertTrue(ranks[0] == 1 and ranks[2] == 0)
+        self.assertTrue(numpy.isnan(ranks[[1, 3]]).all())
+
+        self.assertTrue(percentile_ranks(to_floats([5]), True)[0] == 1)
+
+    def test_rank_screener(self):
+        """The score is the weighted average of the ranks a row has"""
+        columns = {
+            "Revenue Growth FY1": [0.1, 0.3, 0.2, "NULL"],
+            "PE FY1": [10, 30, 20, "NaN"],
+        }
+        rankings = [["Revenue Growth FY1", 3, True], ["PE FY1", 1, False]]
+        headers, block = rank_screener(columns, rankings)
+
+        self.assertTrue(headers == ["Revenue Growth FY1 Rank", "PE FY1 Rank", "Score"])
+        self.assertTrue(block.shape == (4, 3))
+        self.assertTrue(block[0, 2] == 0.25)  # (0 * 3 + 1 * 1) / 4
+        self.assertTrue(block[1, 2] == 0.75)
+
+        cells = to_cells(block)
+        self.assertTrue(cells[3] == [None, None, None])
+
+        generator = numpy.random.default_rng(1)
+        columns = {
+            name: generator.normal(1, 1, 5000).tolist() for name, _, _ in RANKINGS
+        }
+        headers, block = rank_screener(columns)
+        self.assertTrue(block.shape == (5000, len(RANKINGS) + 1))
+        self.assertTrue(numpy.nanmax(block) <= 1 and numpy.nanmin(block) >= 0)
@@ -0,0 +1,122 @@
+"""Unittests for screening_utilities.py"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy
+import polars
+
+from screener_utilities import LAYOUT_COLUMNS
+from screening_utilities import ScreenIndex, get_screener_frame, write_screen
+
+
+class TestScreening(unittest.TestCase):
+    """Unit tests for screening_utilities.py"""
+
+    def get_fundamentals(self) -> polars.DataFrame:
+        """Long frame in the fundamentals store format, an old and a new period per ticker"""
+        rows = []
+        for ticker, roic, peg in [
+            ("AAA", 0.30, 1.2),
+            ("BBB", 0.10, 0.8),
+            ("CCC", 0.20, None),
+            ("DDD", 0.25, 2.5),
+            ("EEE", None, 0.5),
+        ]:
+            for date, scale in [("2022-12-31", 0.5), ("2023-12-31", 1)]:
+                for metric, value in [("ROIC", roic), ("PEG", peg)]:
+                    rows.append(
+                        {
+                            "ticker": ticker,
+                            "metric": metric,
+                            "period": date[:4],
+                            "date": date,
+                            "value": None if value is None else value * scale,
+                        }
+                    )
+
+        return polars.DataFrame(rows)
+
+    def test_latest_values(self):
+        """Only the newest period is indexed and nulls are left out of the index"""
+        screen_index = ScreenIndex(self.get_fundamentals())
+        self.assertTrue(sorted(screen_index.metrics()) == ["PEG", "ROIC"])
+        self.assertTrue(screen_index.frame.shape == (5, 3))
+        self.assertTrue(len(screen_index.orders["ROIC"]) == 4)
+        self.assertTrue(screen_index.frame.row(0) == ("AAA", 0.3, 1.2))
+
+    def test_screen(self):
+        """Range filters combine and top-N picks the best of the survivors"""
+        screen_index = ScreenIndex(self.get_fundamentals())
+
+        frame = screen_index.screen([["ROIC", 0.2, None]])
+        self.assertTrue(frame.get_column("ticker").to_list() == ["AAA", "CCC", "DDD"])
+
+        frame = screen_index.screen([["ROIC", 0.2, None], ["PEG", None, 2]])
+        self.assertTrue(frame.get_column("ticker").to_list() == ["AAA"])
+
+        frame = screen_index.screen([["PEG", 0.5, 2.5]], ["ROIC", 2, True], ["ROIC"])
+        self.assertTrue(frame.columns == ["ticker", "ROIC"])
+        self.assertTrue(frame.get_column("ticker").to_list() == ["AAA", "DDD"])
+
+        frame = screen_index.screen([], ["PEG", 1, False])
+        self.assertTrue(frame.get_column("ticker").to_list() == ["EEE"])
+
+    def test_index_lookups(self):
+        """Each range bound costs one binary search rather than a scan of every ticker"""
+        generator = numpy.random.default_rng(1)
+        num_tickers = 5000
+        frame = polars.DataFrame(
+            {
+                "ticker": [f"T{count}" for count in range(num_tickers)] * 3,
+                "metric": ["ROIC"] * num_tickers
+                + ["PEG"] * num_tickers
+                + ["Debt to Equity"] * num_tickers,
+                "period": ["2023"] * num_tickers * 3,
+                "date": ["2023-12-31"] * num_tickers * 3,
+                "value": generator.normal(1, 1, num_tickers * 3),
+            }
+        )
+        screen_index = ScreenIndex(frame)
+        filters = [["ROIC", 0.5, None], ["PEG", 0, 1.5], ["Debt to Equity", None, 1]]
+
+        with mock.patch.object(
+            numpy, "searchsorted", wraps=numpy.searchsorted
+        ) as searchsorted:
+            result = screen_index.screen(filters, ["ROIC", 50, True])
+
+        self.assertTrue(searchsorted.call_count == 4)
+
+        expected = (
+            screen_index.frame.filter(
+                (polars.col("ROIC") >= 0.5)
+                & polars.col("PEG").is_between(0, 1.5)
+                & (polars.col("Debt to Equity") <= 1)
+            )
+            .sort("ROIC", descending=True)
+            .head(50)
+        )
+        self.assertTrue(result.equals(expected))
+
+    def test_write_screen(self):
+        """Results are laid out as a screener export"""
+        screen_index = ScreenIndex(self.get_fundamentals())
+        screen_frame = screen_index.screen([["ROIC", 0.2, None]])
+        screen_frame = screen_frame.with_columns(
+            polars.lit(0.5).alias("Debt to Equity")
+        )
+
+        frame = get_screener_frame(screen_frame)
+        self.assertTrue(frame.columns[0] == "Ticker")
+        self.assertTrue(frame.columns[1 : len(LAYOUT_COLUMNS) + 1] == LAYOUT_COLUMNS)
+        self.assertTrue(
+            sorted(frame.columns[len(LAYOUT_COLUMNS) + 1 :]) == ["PEG", "ROIC"]
+        )
+        self.assertTrue(frame.get_column("Debt/Equity %").to_list() == [50] * 3)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "Screen.xlsx")
+            write_screen(screen_frame, output_path)
+            self.assertTrue(os.path.exists(output_path))
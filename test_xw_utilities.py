@@ -0,0 +1,69 @@
+"""Unittests for xw_utilities.py"""
+
+import contextlib
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import polars
+
+import xw_utilities
+from xw_utilities import suspend_app
+
+
+class TestXW(unittest.TestCase):
+    """Unit tests for xw_utilities.py.  Excel is stood in for by a plain object holding
+    the application settings"""
+
+    def setUp(self):
+        self.exit_stack = contextlib.ExitStack()
+        temp_dir = self.exit_stack.enter_context(tempfile.TemporaryDirectory())
+        self.run_times_path = os.path.join(temp_dir, "Cache", "run_times.csv")
+        self.exit_stack.enter_context(
+            mock.patch.object(xw_utilities, "RUN_TIMES_PATH", self.run_times_path)
+        )
+
+    def tearDown(self):
+        self.exit_stack.close()
+
+    def get_workbook(self) -> SimpleNamespace:
+        """Workbook with an app in Excel's default state"""
+        app = SimpleNamespace(
+            screen_updating=True, enable_events=True, calculation="automatic"
+        )
+        return SimpleNamespace(app=app)
+
+    def test_suspend_app(self):
+        """Settings are suspended inside the block and restored after it"""
+        workbook = self.get_workbook()
+
+        with suspend_app(workbook, "test"):  # type: ignore
+            self.assertFalse(workbook.app.screen_updating)
+            self.assertFalse(workbook.app.enable_events)
+            self.assertTrue(workbook.app.calculation == "manual")
+
+        self.assertTrue(workbook.app.screen_updating)
+        self.assertTrue(workbook.app.enable_events)
+        self.assertTrue(workbook.app.calculation == "automatic")
+
+        with suspend_app(workbook, "test"):  # type: ignore
+            pass
+
+        run_times = polars.read_csv(self.run_times_path)
+        self.assertTrue(run_times.columns == ["time", "name", "seconds"])
+        self.assertTrue(run_times["name"].to_list() == ["test", "test"])
+
+    def test_suspend_app_error(self):
+        """Settings are restored when the run fails"""
+        workbook = self.get_workbook()
+        workbook.app.calculation = "semiautomatic"
+
+        with self.assertRaises(KeyError):
+            with suspend_app(workbook, "failing"):  # type: ignore
+                raise KeyError("Sheet")
+
+        self.assertTrue(workbook.app.screen_updating)
+        self.assertTrue(workbook.app.calculation == "semiautomatic")
+        self.assertTrue(polars.read_csv(self.run_times_path)["seconds"][0] >= 0)
@@ -0,0 +1,93 @@
+"""Utilities shared by the xlwings entry points"""
+
+import contextlib
+import os
+import time
+from collections.abc import Callable
+from typing import Any
+
+import xlwings
+
+# Each run is its own process, so run times are appended to a CSV of time, name, seconds
+RUN_TIMES_PATH = os.path.join("Cache", "run_times.csv")
+
+# Address of the refresh service started by refresh_runner.py
+REFRESH_HOST = "127.0.0.1"
+REFRESH_PORT = 8765
+REFRESH_TIMEOUT = 60  # Seconds to wait for the service, a cold refresh downloads pages
+
+
+@contextlib.contextmanager
+def suspend_app(workbook: xlwings.Book, name: str):
+    """
+    Turns off screen updating, events and automatic calculation for the duration of a with
+    block, so writes and column inserts don't trigger a repaint and recalculation each.
+    The previous settings are restored even if the block raises, and the time taken is
+    appended to RUN_TIMES_PATH
+
+    Args:
+        workbook: Workbook whose application is suspended
+        name: Name the run time is recorded under, e.g. sector_xw
+    """
+    app = workbook.app
+    screen_updating = app.screen_updating
+    enable_events = app.enable_events
+    calculation = app.calculation
+
+    app.screen_updating = False
+    app.enable_events = False
+    app.calculation = "manual"
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+
+        app.calculation = calculation
+        app.enable_events = enable_events
+        app.screen_updating = screen_updating
+        print(f"[Completed] {name} ran in {elapsed:.2f}s with Excel suspended")
+        record_run_time(name, elapsed)
+
+
+def record_run_time(name: str, seconds: float):
+    """
+    Appends a run time to RUN_TIMES_PATH, writing the header first if the file is new
+
+    Args:
+        name: Name of the run, e.g. sector_xw
+        seconds: Time the run took
+    """
+    os.makedirs(os.path.dirname(RUN_TIMES_PATH), exist_ok=True)
+    is_new = not os.path.exists(RUN_TIMES_PATH)
+
+    with open(RUN_TIMES_PATH, "a", encoding="utf-8") as file:
+        if is_new:
+            file.write("time,name,seconds\n")
+        file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')},{name},{seconds:.3f}\n")
+
+
+def get_refreshed(name: str, fallback: Callable[[], Any]) -> Any:
+    """
+    Returns the data for a refresh from the refresh service, see refresh_utilities.  If
+    the service isn't running the data is produced in this process by fallback instead
+
+    Args:
+        name: Name of the refresh, e.g. sector
+        fallback: Function producing the same data as the service
+
+    Returns:
+        The refreshed data, decoded from JSON
+    """
+    # Imported here so entry points don't pay for them at import time
+    import json  # pylint: disable=import-outside-toplevel
+    import urllib.request  # pylint: disable=import-outside-toplevel
+
+    url = f"http://{REFRESH_HOST}:{REFRESH_PORT}/{name}"
+    try:
+        with urllib.request.urlopen(url, timeout=REFRESH_TIMEOUT) as response:
+            return json.load(response)["data"]
+    except OSError:
+        print(f"[Refresh] Service not available, refreshing {name} locally")
+        return fallback()
@@ -1,12 +1,14 @@
 """Scrape historical data from Yahoo Finance"""
 
 import calendar
+import io
 import time
 from enum import Enum
-from urllib.error import HTTPError
 
 import polars
 
+import fetch_utilities
+
 
 class YahooInterval(Enum):
     """Intervals for get_historical_prices"""
@@ -54,27 +56,25 @@ def get_historical_prices(ticker: str, interval: Enum):
         + "&events=history&includeAdjustedClose=true"
     )
 
-    try:
-        return (
-            polars.read_csv(
-                url,
-                ignore_errors=True,
-                schema={
-                    "Date": polars.Utf8,
-                    "Open": polars.Float64,
-                    "High": polars.Float64,
-                    "Low": polars.Float64,
-                    "Close": polars.Float64,
-                    "Adj Close": polars.Float64,
-                    "Volume": polars.Int64,
-                },
-            )
-            .sort("Date", descending=True)
-            .drop_nulls()
-            .with_columns(
-                polars.col("Open", "High", "Low", "Close", "Adj Close").round(2)
-            )
-        )
-
-    except HTTPError:
+    response = fetch_utilities.get(url)
+    if response.status_code != 200:
         return polars.DataFrame()
+
+    return (
+        polars.read_csv(
+            io.BytesIO(response.content),
+            ignore_errors=True,
+            schema={
+                "Date": polars.Utf8,
+                "Open": polars.Float64,
+                "High": polars.Float64,
+                "Low": polars.Float64,
+                "Close": polars.Float64,
+                "Adj Close": polars.Float64,
+                "Volume": polars.Int64,
+            },
+        )
+        .sort("Date", descending=True)
+        .drop_nulls()
+        .with_columns(polars.col("Open", "High", "Low", "Close", "Adj Close").round(2))
+    )